@@ -0,0 +1,161 @@
+"""
+Embedding micro-batching benchmark: tune EMBEDDING_BATCH_WINDOW_MS
+
+Simulates concurrent analyses, each embedding a few resume chunks at a time
+(like SimpleEmbeddings.embed_batch on cache misses), first straight against
+the backend with MODEL_WORKERS threads, then through an EmbeddingBatcher for
+every window in --windows. Reports throughput, per-call latency percentiles,
+and the batcher's average batch size and queue wait, so the window can be
+picked against the throughput it buys.
+
+The "event_loop" section replays the same load from asyncio tasks, the way
+the API calls the batcher: through a MODEL_WORKERS thread pool (callers
+hold a pool thread while their batch fills) and by awaiting the batcher's
+futures (SimpleEmbeddings.aembed_batch).
+
+    cd backend
+    python benchmarks/bench_batching.py
+    python benchmarks/bench_batching.py --backend onnx --callers 32 --windows 0 2 5 10
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_embeddings import make_texts
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def drive(encode, texts, callers, calls, seed=5):
+    """callers threads x calls encode() requests of 1-4 distinct texts each"""
+    latencies = []
+    lock = threading.Lock()
+
+    def caller(k):
+        rng = random.Random(seed + k)
+        for _ in range(calls):
+            batch = rng.sample(texts, rng.randint(1, 4))
+            start = time.perf_counter()
+            encode(batch)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=caller, args=(k,)) for k in range(callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    return {
+        "calls_per_s": round(len(latencies) / wall, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def drive_async(call, texts, callers, calls, seed=5):
+    """callers asyncio tasks x calls awaited requests of 1-4 distinct texts each"""
+    latencies = []
+
+    async def caller(k):
+        rng = random.Random(seed + k)
+        for _ in range(calls):
+            batch = rng.sample(texts, rng.randint(1, 4))
+            start = time.perf_counter()
+            await call(batch)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async def run():
+        await asyncio.gather(*[caller(k) for k in range(callers)])
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    wall = time.perf_counter() - start
+    return {
+        "calls_per_s": round(len(latencies) / wall, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+def event_loop(backend, texts, args, window):
+    from concurrent.futures import ThreadPoolExecutor
+    from embedding_batcher import EmbeddingBatcher
+    from config import Config
+
+    report = {}
+    pool = ThreadPoolExecutor(max_workers=Config.MODEL_WORKERS)
+    for name in ("model_pool", "futures"):
+        batcher = EmbeddingBatcher(backend, window_ms=window, max_batch=args.max_batch)
+        if name == "model_pool":
+            async def call(batch):
+                return await asyncio.get_running_loop().run_in_executor(pool, batcher.encode, batch)
+        else:
+            async def call(batch):
+                return await asyncio.wrap_future(batcher.submit(batch))
+        run = drive_async(call, texts, args.callers, args.calls, seed=17)
+        stats = batcher.stats()
+        batcher.close()
+        run.update(avg_batch=stats["avg_batch"], batches=stats["batches"])
+        report[name] = run
+    pool.shutdown()
+    report["futures"]["speedup_x"] = round(report["futures"]["calls_per_s"] / report["model_pool"]["calls_per_s"], 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default=None, help="torch or onnx (default: EMBEDDING_BACKEND)")
+    parser.add_argument("--callers", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=40, help="encode calls per caller")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5, 10])
+    parser.add_argument("--max-batch", type=int, default=None)
+    args = parser.parse_args()
+
+    from embedding_backends import create_embedding_backend
+    from embedding_batcher import EmbeddingBatcher
+    from config import Config
+
+    backend = create_embedding_backend(args.backend)
+    # Unique texts per run: the point is the model, not the cache
+    texts = make_texts(args.callers * args.calls * 4, seed=9)
+    backend.encode(texts[:8])  # warm the session / first-call allocations
+
+    slots = threading.BoundedSemaphore(Config.MODEL_WORKERS)
+
+    def direct(batch):
+        with slots:
+            return backend.encode(batch)
+
+    report = {"backend": backend.info(), "callers": args.callers, "calls": args.calls,
+              "direct": drive(direct, texts, args.callers, args.calls), "batched": {}}
+    for window in args.windows:
+        batcher = EmbeddingBatcher(backend, window_ms=window, max_batch=args.max_batch)
+        run = drive(batcher.encode, texts, args.callers, args.calls)
+        stats = batcher.stats()
+        batcher.close()
+        run.update(avg_batch=stats["avg_batch"], avg_wait_ms=stats["avg_wait_ms"], batches=stats["batches"],
+                   speedup_x=round(run["calls_per_s"] / report["direct"]["calls_per_s"], 2))
+        report["batched"][f"{window:g}ms"] = run
+
+    window = args.windows[len(args.windows) // 2]
+    report["event_loop"] = {"window_ms": window, **event_loop(backend, texts, args, window)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
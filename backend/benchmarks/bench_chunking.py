@@ -0,0 +1,149 @@
+"""
+Chunking benchmark: legacy 200-word windows vs. section-aware token chunks
+
+Runs both chunkers over a fixed synthetic corpus (benchmarks/corpus.py) and
+reports, per chunker:
+
+- chunk counts and token sizes, and how many chunks exceed the model's
+  256-position limit (their tail is silently truncated by the encoder)
+- time to embed every chunk of the corpus with the configured backend
+- retrieval quality: each query is one bullet of a resume; a hit is a
+  retrieved chunk that contains the whole bullet. hit@1 and MRR@5 are
+  reported within the bullet's own resume (what retrieve_context_node does)
+  and across the whole corpus (SimpleRAG.search)
+
+Token counts are exact when export_onnx.py has saved the tokenizer, else
+estimated (see chunking.count_tokens).
+
+    cd backend
+    python benchmarks/bench_chunking.py
+    python benchmarks/bench_chunking.py --resumes 60 --backend onnx
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+
+from corpus import resume_lines
+from sections import is_bullet
+
+MODEL_POSITIONS = 256
+
+
+def legacy_chunks(text, chunk_size=200):
+    """SimpleRAG.chunk_text before section-aware chunking"""
+    words = text.split()
+    return [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
+
+
+def section_chunks(text):
+    from chunking import chunk_resume
+    return [chunk.text for chunk in chunk_resume(text)]
+
+
+CHUNKERS = {"legacy": legacy_chunks, "sections": section_chunks}
+
+
+def make_corpus(count, queries_per_resume, seed=21):
+    rng = random.Random(seed)
+    resumes, queries = [], []
+    for i in range(count):
+        lines = resume_lines(rng, ("small", "medium", "large")[i % 3])
+        resumes.append("\n".join(lines))
+        bullets = [line for line in lines if is_bullet(line)]
+        for bullet in rng.sample(bullets, min(queries_per_resume, len(bullets))):
+            queries.append((i, " ".join(bullet.split()[1:])))
+    return resumes, queries
+
+
+def contains(chunk, needle):
+    return needle in " ".join(chunk.split())
+
+
+def reciprocal_rank(ranked_texts, needle, k=5):
+    for rank, text in enumerate(ranked_texts[:k], start=1):
+        if contains(text, needle):
+            return 1.0 / rank
+    return 0.0
+
+
+def evaluate(name, resumes, queries, backend, query_vectors):
+    from chunking import count_tokens
+
+    chunker = CHUNKERS[name]
+    chunks, owner = [], []
+    for i, text in enumerate(resumes):
+        for chunk in chunker(text):
+            chunks.append(chunk)
+            owner.append(i)
+    owner = np.asarray(owner)
+
+    tokens = np.asarray([count_tokens(chunk) + 2 for chunk in chunks])  # + [CLS] / [SEP]
+    over = tokens > MODEL_POSITIONS
+
+    start = time.perf_counter()
+    matrix = np.asarray(backend.encode(chunks), dtype=np.float32)
+    embed_s = time.perf_counter() - start
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    own_rr, corpus_rr = [], []
+    scores = query_vectors @ matrix.T
+    for (resume, needle), row in zip(queries, scores):
+        ranked = np.argsort(-row)
+        own = [chunks[j] for j in ranked if owner[j] == resume][:5]
+        own_rr.append(reciprocal_rank(own, needle))
+        corpus_rr.append(reciprocal_rank([chunks[j] for j in ranked[:5]], needle))
+
+    def quality(rr):
+        rr = np.asarray(rr)
+        return {"hit_at_1": round(float((rr == 1.0).mean()), 3), "mrr_at_5": round(float(rr.mean()), 3)}
+
+    return {
+        "chunks": len(chunks),
+        "chunks_per_resume": round(len(chunks) / len(resumes), 2),
+        "avg_tokens": round(float(tokens.mean()), 1),
+        "max_tokens": int(tokens.max()),
+        "truncated_chunks": int(over.sum()),
+        "truncated_tokens": int((tokens[over] - MODEL_POSITIONS).sum()),
+        "embed_s": round(embed_s, 3),
+        "own_resume": quality(own_rr),
+        "corpus": quality(corpus_rr),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=30)
+    parser.add_argument("--queries-per-resume", type=int, default=3)
+    parser.add_argument("--backend", default=None, help="torch or onnx (default: EMBEDDING_BACKEND)")
+    parser.add_argument("--chunkers", nargs="+", default=list(CHUNKERS), choices=list(CHUNKERS))
+    args = parser.parse_args()
+
+    from embedding_backends import create_embedding_backend
+    from chunking import _get_tokenizer
+
+    backend = create_embedding_backend(args.backend)
+    resumes, queries = make_corpus(args.resumes, args.queries_per_resume)
+    query_vectors = np.asarray(backend.encode([q for _, q in queries]), dtype=np.float32)
+    query_vectors /= np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+
+    report = {
+        "backend": backend.info(),
+        "resumes": len(resumes),
+        "queries": len(queries),
+        "exact_tokens": _get_tokenizer() is not None,
+        "chunkers": {name: evaluate(name, resumes, queries, backend, query_vectors) for name in args.chunkers},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Embedding backend benchmark and parity check: torch vs. ONNX (fp32 / int8)
+
+Each backend is loaded in a fresh subprocess so load time and RSS are not
+polluted by the others. Every run reports import+load time, resident memory
+after loading and after encoding, and throughput on a batch of resume-like
+chunks. The vectors are then compared against the torch reference: the run
+fails (exit code 1) if any backend's minimum cosine similarity falls below
+--min-cosine. Run `python export_onnx.py` first.
+
+    cd backend
+    python benchmarks/bench_embeddings.py
+    python benchmarks/bench_embeddings.py --backends torch onnx-int8 --texts 512
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+
+
+WORDS = ("built designed scaled python services kubernetes latency postgres pipeline team "
+         "customers revenue migrated react dashboards models training inference aws terraform "
+         "reduced costs led engineers api graphql kafka streaming reliability monitoring").split()
+
+# name -> (EMBEDDING_BACKEND, ONNX_QUANTIZED)
+VARIANTS = {
+    "torch": ("torch", "false"),
+    "onnx-fp32": ("onnx", "false"),
+    "onnx-int8": ("onnx", "true"),
+}
+
+
+def make_texts(n, seed=3):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 120))) for _ in range(n)]
+
+
+def rss_mb():
+    # Linux; falls back to peak RSS elsewhere
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    import resource
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_child(texts_path, out_path, rounds):
+    """Runs inside the subprocess: load one backend, encode, dump vectors + stats"""
+    baseline = rss_mb()
+    start = time.perf_counter()
+    from embedding_backends import create_embedding_backend
+    from config import Config
+    backend = create_embedding_backend()
+    load_s = time.perf_counter() - start
+    loaded = rss_mb()
+
+    with open(texts_path) as f:
+        texts = json.load(f)
+    backend.encode(texts[:8])  # warm up
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        vectors = backend.encode(texts)
+        samples.append(time.perf_counter() - start)
+
+    single = []
+    for text in texts[:50]:
+        start = time.perf_counter()
+        backend.encode([text])
+        single.append((time.perf_counter() - start) * 1000)
+    single.sort()
+
+    np.save(out_path, vectors)
+    print(json.dumps({
+        "backend": backend.info(),
+        "requested": Config.EMBEDDING_BACKEND,
+        "load_s": round(load_s, 2),
+        "rss_baseline_mb": baseline,
+        "rss_loaded_mb": loaded,
+        "rss_after_encode_mb": rss_mb(),
+        "texts_per_s": round(len(texts) / min(samples), 1),
+        "single_p50_ms": round(single[len(single) // 2], 2),
+    }))
+
+
+def run_variant(name, texts_path, workdir, rounds):
+    backend, quantized = VARIANTS[name]
+    env = dict(os.environ, EMBEDDING_BACKEND=backend, ONNX_QUANTIZED=quantized)
+    out_path = os.path.join(workdir, f"{name}.npy")
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", texts_path, out_path, "--rounds", str(rounds)],
+        env=env, cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}, None
+    stats = json.loads(proc.stdout.strip().splitlines()[-1])
+    if stats["backend"]["backend"] != backend:
+        stats["error"] = f"fell back to {stats['backend']['backend']}"
+    return stats, np.load(out_path)
+
+
+def cosine_parity(reference, vectors):
+    ref = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    vec = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    cos = (ref * vec).sum(axis=1)
+    return {"min_cosine": round(float(cos.min()), 5), "mean_cosine": round(float(cos.mean()), 5)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--child", nargs=2, metavar=("TEXTS", "OUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.rounds)
+        return
+
+    report = {"texts": args.texts, "runs": {}}
+    vectors = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        texts_path = os.path.join(workdir, "texts.json")
+        with open(texts_path, "w") as f:
+            json.dump(make_texts(args.texts), f)
+        for name in args.backends:
+            report["runs"][name], vectors[name] = run_variant(name, texts_path, workdir, args.rounds)
+
+    failed = any("error" in run for run in report["runs"].values())
+    reference = vectors.get("torch")
+    if reference is not None:
+        for name, vec in vectors.items():
+            if name == "torch" or vec is None:
+                continue
+            parity = cosine_parity(reference, vec)
+            parity["passed"] = parity["min_cosine"] >= args.min_cosine
+            report["runs"][name]["parity_vs_torch"] = parity
+            failed = failed or not parity["passed"]
+
+            torch_run = report["runs"]["torch"]
+            run = report["runs"][name]
+            run["speedup_x"] = round(run["texts_per_s"] / torch_run["texts_per_s"], 2)
+            run["rss_saved_mb"] = round(torch_run["rss_loaded_mb"] - run["rss_loaded_mb"], 1)
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Prompt budget regression benchmark
+
+Builds the analysis prompt for a set of generated resumes (with the usual
+PDF artifacts: repeated page headers, page numbers, hyphenation, (cid:N)
+glyphs) both raw, as before, and through prompt.prepare_prompt_inputs, and
+reports the token reduction. Scores must not move: by default the
+deterministic skills and education scores are compared on raw vs. prepared
+text; with --llm (needs GROQ_API_KEY) both prompts are sent to Groq and the
+ATS scores compared.
+
+    cd backend
+    python benchmarks/bench_prompt.py --resumes 20 --budget 3000
+    python benchmarks/bench_prompt.py --resumes 5 --llm
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt import prepare_prompt_inputs, count_tokens
+from extract import extract_resume_info_fast, extract_jd_requirements_fast
+from scoring import calculate_skills_score, calculate_education_score
+
+
+SKILLS = ["Python", "Go", "Java", "TypeScript", "React", "Node.js", "Docker", "Kubernetes", "Terraform",
+          "AWS", "GCP", "PostgreSQL", "Redis", "Kafka", "Airflow", "PyTorch", "scikit-learn", "FastAPI",
+          "Django", "GraphQL", "CI/CD", "Linux", "Spark", "Snowflake", "MongoDB"]
+
+VERBS = ["Built", "Designed", "Led", "Migrated", "Automated", "Optimized", "Shipped", "Scaled"]
+
+JD = """Senior Backend Engineer
+
+About us:
+We are a fast-growing company on a mission to make hiring fair. Our team is remote-first and
+spread across twelve time zones, and we care deeply about craft, kindness and shipping.
+
+Requirements:
+- 5+ years of experience building backend services in Python or Go
+- Production experience with Docker, Kubernetes and Terraform on AWS
+- Strong PostgreSQL and Redis skills
+- Bachelor's degree in Computer Science or equivalent
+
+Nice to have:
+- Kafka, Airflow, PyTorch
+
+Benefits:
+- Competitive salary and equity
+- Unlimited PTO, home office budget, learning stipend
+- Equal opportunity employer: we welcome applicants of every background
+"""
+
+
+def make_resume(rng, pages=2, jobs=4, bullets=8):
+    name = f"Candidate {rng.randint(100, 999)}"
+    header = [name, f"{name.split()[1]}@example.com | +1 555 {rng.randint(100, 999)} 0101 | linkedin.com/in/c{rng.randint(1, 99)}"]
+    skills = rng.sample(SKILLS, 10)
+
+    body = header + ["Summary", "Backend engineer focused on reliable distrib-", "uted systems and developer tooling."]
+    body += ["Experience"]
+    for j in range(jobs):
+        body.append(f"Senior Engineer, Company {j} ({2023 - 2 * j} - {2025 - 2 * j if j else 'Present'})")
+        for _ in range(bullets):
+            body.append(f"(cid:127) {rng.choice(VERBS)} {rng.choice(skills)} services handling {rng.randint(2, 90)}k "
+                        f"requests per second, cutting costs by {rng.randint(5, 60)}% for the {rng.choice(['payments', 'search', 'data', 'growth'])} team")
+    body += ["Education", "B.S. Computer Science, State University"]
+    body += ["Skills", ", ".join(skills)]
+
+    # Spread across pages: every page repeats the header and ends with a page number
+    per_page = len(body) // pages + 1
+    lines = []
+    for p in range(pages):
+        if p:
+            lines += header
+        lines += body[p * per_page:(p + 1) * per_page]
+        lines.append(f"Page {p + 1} of {pages}")
+    return "\n".join(lines) + "\n"
+
+
+def raw_rag_context(resume_text):
+    # What retrieve_context_node produces: the top resume chunks, which repeat the resume
+    words = resume_text.split()
+    chunks = [" ".join(words[i:i + 200]) for i in range(0, len(words), 200)]
+    return "\n".join(f"- {c[:200]}" for c in chunks[:3])
+
+
+def deterministic_scores(resume_text, jd_requirements):
+    info = extract_resume_info_fast(resume_text)
+    skills_score, _, _ = calculate_skills_score(info, jd_requirements, semantic=False)
+    return {"skills": skills_score, "education": calculate_education_score(info, jd_requirements)}
+
+
+async def llm_scores(resume_text, jd_text, rag_context):
+    from graph import build_analysis_prompts
+    from llm import get_llm
+
+    system_prompt, user_prompt = build_analysis_prompts(resume_text, jd_text, rag_context)
+    result = await get_llm(temperature=0.0).aextract_json(user_prompt, system_prompt)
+    return float(result.get("ats_score", 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--llm", action="store_true", help="compare Groq ATS scores on raw vs. prepared prompts")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    jd_requirements = extract_jd_requirements_fast(JD)
+    rows = []
+    for i in range(args.resumes):
+        resume = make_resume(rng, pages=rng.choice([1, 2, 3]), jobs=rng.choice([2, 4, 6]), bullets=rng.choice([4, 8, 12]))
+        context = raw_rag_context(resume)
+        raw_tokens = count_tokens(resume) + count_tokens(JD) + count_tokens(context)
+
+        cleaned = prepare_prompt_inputs(resume, JD, context, budget=0)
+        budgeted = prepare_prompt_inputs(resume, JD, context, budget=args.budget)
+
+        row = {
+            "raw_tokens": raw_tokens,
+            "cleaned_tokens": cleaned.report["input_tokens"],
+            "budgeted_tokens": budgeted.report["input_tokens"],
+            "trimmed": budgeted.report["trimmed"],
+            "scores_raw": deterministic_scores(resume, jd_requirements),
+            "scores_budgeted": deterministic_scores(budgeted.resume_text, jd_requirements),
+        }
+        if args.llm:
+            import asyncio
+            row["ats_raw"] = asyncio.run(llm_scores(resume, JD, context))
+            row["ats_budgeted"] = asyncio.run(llm_scores(budgeted.resume_text, budgeted.jd_text, budgeted.rag_context))
+        rows.append(row)
+
+    raw = [r["raw_tokens"] for r in rows]
+    budgeted = [r["budgeted_tokens"] for r in rows]
+    report = {
+        "resumes": len(rows),
+        "budget": args.budget,
+        "mean_raw_tokens": round(statistics.mean(raw), 1),
+        "mean_cleaned_tokens": round(statistics.mean(r["cleaned_tokens"] for r in rows), 1),
+        "mean_budgeted_tokens": round(statistics.mean(budgeted), 1),
+        "reduction_pct": round(100 * (1 - sum(budgeted) / sum(raw)), 1),
+        "trimmed": sum(r["trimmed"] for r in rows),
+        "deterministic_score_changes": sum(r["scores_raw"] != r["scores_budgeted"] for r in rows),
+    }
+    if args.llm:
+        diffs = [abs(r["ats_raw"] - r["ats_budgeted"]) for r in rows]
+        report["ats_mean_abs_diff"] = round(statistics.mean(diffs), 2)
+        report["ats_max_abs_diff"] = round(max(diffs), 2)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Skill extraction benchmark: compiled skill matcher vs. the LLM
+
+Times taxonomy compilation and SkillMatcher.extract on generated resume/JD
+text of increasing size. With --semantic it times SkillVectors.match (one
+matrix multiply of resume skills against JD skills; loads or builds the skill
+embedding matrix first). With --llm (needs GROQ_API_KEY) it also times the
+old approach of asking the LLM for a skills list, on the same resume text.
+
+    cd backend
+    python benchmarks/bench_skills.py --iterations 200
+    python benchmarks/bench_skills.py --semantic
+    python benchmarks/bench_skills.py --llm --llm-calls 3
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skills import SkillMatcher, load_taxonomy
+
+
+RESUME = """Jane Doe
+jane@example.com | +1 555 123 4567
+
+Summary
+Backend engineer with 6 years of experience building Python and Go services on AWS.
+
+Experience
+Senior Software Engineer, Acme Corp (2020 - Present)
+- Built FastAPI microservices deployed on k8s with Helm and GitHub Actions CI/CD
+- Cut p95 latency 40% with Redis caching and PostgreSQL query optimization
+- Led migration from a monolith to event-driven services on Kafka
+Software Engineer, Initech (2018 - 2020)
+- Developed React and TypeScript dashboards backed by Node.js and GraphQL
+- Trained scikit-learn and PyTorch models for churn prediction
+
+Education
+B.S. Computer Science, State University
+
+Skills
+Python, Go, JS, Docker, Kubernetes, Terraform, AWS Lambda, MongoDB, Elasticsearch, Agile, Scrum
+"""
+
+JD = """Senior Backend Engineer
+
+Requirements:
+- 5+ years of experience with Python or Golang
+- Production experience with Docker, Kubernetes and Terraform on AWS or GCP
+- Strong PostgreSQL and Redis skills; REST API design
+
+Nice to have:
+- Kafka, Airflow, machine learning model deployment
+"""
+
+
+def time_it(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "mean_us": round(statistics.mean(samples), 1),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1], 1),
+    }
+
+
+def bench_matcher(iterations):
+    start = time.perf_counter()
+    taxonomy = load_taxonomy()
+    matcher = SkillMatcher(taxonomy)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    results = {
+        "skills": len(matcher),
+        "patterns": len(matcher._patterns),
+        "compile_ms": round(compile_ms, 2),
+        "runs": {}
+    }
+    for name, text in [("jd", JD), ("resume", RESUME), ("resume_x10", RESUME * 10)]:
+        stats = time_it(lambda: matcher.extract(text), iterations)
+        stats["chars"] = len(text)
+        stats["skills_found"] = len(matcher.extract(text))
+        results["runs"][name] = stats
+    results["resume_skills"] = matcher.extract(RESUME)
+    return results
+
+
+def bench_semantic(iterations):
+    from skill_vectors import get_skill_vectors
+
+    vectors = get_skill_vectors()
+    results = {"vocabulary": len(vectors.skills), "runs": {}}
+    for size in (10, 50, 200):
+        resume_skills = vectors.skills[:size]
+        jd_skills = vectors.skills[size:2 * size]
+        stats = time_it(lambda: vectors.match(resume_skills, jd_skills), iterations)
+        results["runs"][f"{size}x{size}"] = stats
+    return results
+
+
+def bench_llm(calls):
+    from llm import get_llm
+
+    llm = get_llm(temperature=0.3)
+    prompt = f"""Extract the skills from this resume as JSON:
+
+{{"skills": ["list", "of", "skills"]}}
+
+Resume:
+{RESUME}
+
+Return ONLY the JSON, nothing else."""
+
+    samples, skills = [], []
+    for _ in range(calls):
+        start = time.perf_counter()
+        data = llm.extract_json(prompt)
+        samples.append((time.perf_counter() - start) * 1e6)
+        skills = data.get("skills", [])
+    return {
+        "mean_us": round(statistics.mean(samples), 1),
+        "min_us": round(min(samples), 1),
+        "skills_found": len(skills),
+        "resume_skills": skills
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--semantic", action="store_true", help="also time embedding-matrix skill matching")
+    parser.add_argument("--llm", action="store_true", help="also time LLM skill extraction (network)")
+    parser.add_argument("--llm-calls", type=int, default=3)
+    args = parser.parse_args()
+
+    report = {"matcher": bench_matcher(args.iterations)}
+    if args.semantic:
+        report["semantic"] = bench_semantic(args.iterations)
+    if args.llm:
+        report["llm"] = bench_llm(args.llm_calls)
+        report["speedup_x"] = round(report["llm"]["mean_us"] / report["matcher"]["runs"]["resume"]["mean_us"])
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
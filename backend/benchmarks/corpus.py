@@ -0,0 +1,156 @@
+"""
+Synthetic resume / JD corpus as PDF and DOCX bytes
+
+Sizes are "small" (one page, a couple of roles), "medium" and "large"
+(multi-page, many bullets), so parsing, chunking and prompt budgeting see
+realistic spreads. PDFs are written directly (Helvetica text, one content
+stream per page) so no PDF library is needed; pypdf extracts them like
+any text PDF.
+
+    python benchmarks/corpus.py --out /tmp/corpus --count 20
+"""
+
+from io import BytesIO
+import argparse
+import random
+import os
+
+
+SKILLS = ["Python", "Go", "Java", "TypeScript", "React", "Node.js", "Docker", "Kubernetes", "Terraform",
+          "AWS", "GCP", "PostgreSQL", "Redis", "Kafka", "Airflow", "PyTorch", "scikit-learn", "FastAPI",
+          "Django", "GraphQL", "CI/CD", "Linux", "Spark", "Snowflake", "MongoDB"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Automated", "Optimized", "Shipped", "Scaled"]
+TEAMS = ["payments", "search", "data platform", "growth", "infrastructure", "mobile"]
+
+SIZES = {
+    # jobs, bullets per job, projects
+    "small": (2, 3, 0),
+    "medium": (4, 6, 2),
+    "large": (7, 10, 5),
+}
+
+
+def resume_lines(rng, size="medium"):
+    jobs, bullets, projects = SIZES[size]
+    name = f"Candidate {rng.randint(100, 999)}"
+    skills = rng.sample(SKILLS, 10)
+    lines = [name, f"c{rng.randint(1, 999)}@example.com | +1 555 {rng.randint(100, 999)} 0101",
+             "", "Summary", f"Engineer with {jobs * 2} years of experience building {skills[0]} and {skills[1]} systems.",
+             "", "Experience"]
+    for j in range(jobs):
+        lines.append(f"Senior Engineer, Company {j} ({2024 - 2 * j - 2} - {2024 - 2 * j if j else 'Present'})")
+        for _ in range(bullets):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(skills)} services handling {rng.randint(2, 90)}k requests "
+                         f"per second for the {rng.choice(TEAMS)} team, cutting costs by {rng.randint(5, 60)}%")
+    if projects:
+        lines += ["", "Projects"]
+        for p in range(projects):
+            lines.append(f"- Project {p}: open-source {rng.choice(skills)} tool with {rng.randint(10, 900)} stars")
+    lines += ["", "Education", "B.S. Computer Science, State University (2014)",
+              "", "Skills", ", ".join(skills)]
+    return lines
+
+
+def jd_lines(rng, size="medium"):
+    required = rng.sample(SKILLS, 6)
+    lines = [f"Senior Backend Engineer #{rng.randint(1, 99)}", "", "Requirements:",
+             f"- {rng.randint(3, 8)}+ years of experience with {required[0]} or {required[1]}",
+             f"- Production experience with {required[2]}, {required[3]} and {required[4]}",
+             "- Bachelor's degree in Computer Science or equivalent", "", "Nice to have:", f"- {required[5]}"]
+    if size != "small":
+        lines += ["", "About us:", "We are a remote-first team building fair hiring tools. " * (3 if size == "large" else 1),
+                  "", "Benefits:", "- Competitive salary and equity", "- Learning stipend"]
+    return lines
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace").decode("latin-1")
+
+
+def make_pdf(lines, lines_per_page=48):
+    """Minimal multi-page text PDF"""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = []  # bodies; object number = index + 1
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_ref = add(None)  # filled once the page objects exist
+    kids = []
+    for page in pages:
+        ops = ["BT", "/F1 10 Tf", "13 TL", "50 770 Td"]
+        for line in page:
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(f"<< /Type /Page /Parent {pages_ref} 0 R /MediaBox [0 0 612 792] "
+                        f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>".encode()))
+    objects[pages_ref - 1] = (f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] "
+                              f"/Count {len(kids)} >>").encode()
+    catalog = add(f"<< /Type /Catalog /Pages {pages_ref} 0 R >>".encode())
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref))
+    return out.getvalue()
+
+
+def make_docx(lines):
+    from docx import Document
+
+    doc = Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render(lines, fmt):
+    return make_pdf(lines) if fmt == "pdf" else make_docx(lines)
+
+
+def generate(count, seed=11, sizes=("small", "medium", "large"), formats=("pdf", "docx")):
+    """[{"filename", "format", "size", "data", "text"}] resumes, cycling through sizes and formats"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        size = sizes[i % len(sizes)]
+        fmt = formats[(i // len(sizes)) % len(formats)]
+        lines = resume_lines(rng, size)
+        corpus.append({"filename": f"resume_{i:03d}_{size}.{fmt}", "format": fmt, "size": size,
+                       "data": render(lines, fmt), "text": "\n".join(lines)})
+    return corpus
+
+
+def generate_jds(count, seed=12, sizes=("small", "medium", "large")):
+    rng = random.Random(seed)
+    return ["\n".join(jd_lines(rng, sizes[i % len(sizes)])) for i in range(count)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--count", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for item in generate(args.count, args.seed):
+        with open(os.path.join(args.out, item["filename"]), "wb") as f:
+            f.write(item["data"])
+    for i, jd in enumerate(generate_jds(3)):
+        with open(os.path.join(args.out, f"jd_{i}.txt"), "w", encoding="utf-8") as f:
+            f.write(jd)
+    print(f"Wrote {args.count} resumes and 3 JDs to {args.out}")
@@ -0,0 +1,228 @@
+"""
+Local stand-ins for Groq, Pinecone and (optionally) the embedding model
+
+install() swaps them in before the app is imported, so the whole pipeline
+runs offline with no API keys:
+
+- FakeChatGroq replaces langchain_groq.ChatGroq: answers with a valid
+  analysis JSON after latency +/- jitter seconds, reports token usage, and
+  can fail a fraction of calls with a 429 to exercise the retry path.
+- fake pinecone module: an in-memory index (upsert/fetch/delete/query/stats) with
+  its own per-call latency.
+- FakeEmbeddingBackend ("fake" EMBEDDING_BACKEND): deterministic hashed
+  vectors for hosts without torch; leave it off to measure the real model.
+"""
+
+from types import SimpleNamespace
+import numpy as np
+import threading
+import hashlib
+import asyncio
+import random
+import types
+import json
+import time
+import sys
+import os
+
+
+ANALYSIS_RESULT = {
+    "ats_score": 72.0,
+    "score_breakdown": {"skills_score": 30.0, "experience_score": 22.0, "education_score": 10.0, "quality_score": 10.0},
+    "extracted_info": {"name": "Jane Doe", "email": "jane@example.com", "skills": ["Python", "Docker"],
+                       "experience_years": 5, "education": ["B.S. Computer Science"]},
+    "matched_skills": ["Python", "Docker"],
+    "missing_skills": ["Kubernetes"],
+    "strengths": ["Relevant backend experience"],
+    "suggestions": ["Quantify achievements"],
+    "overall_feedback": "Solid match for the role."
+}
+
+
+class Latency:
+    """latency +/- jitter seconds (uniform), never negative"""
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=0.05):
+        super().__init__("Rate limit reached (fake)")
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+
+class FakeChatGroq:
+    """Drop-in for the parts of ChatGroq that llm.LLMClientManager uses"""
+
+    latency = Latency()
+    error_rate = 0.0
+    calls = 0
+
+    def __init__(self, **kwargs):
+        self.model_name = kwargs.get("model_name")
+        self.temperature = kwargs.get("temperature")
+
+    def _response(self, messages):
+        FakeChatGroq.calls += 1
+        if self.error_rate and random.random() < self.error_rate:
+            raise FakeRateLimitError()
+        prompt_chars = sum(len(getattr(m, "content", "")) for m in messages)
+        content = json.dumps(ANALYSIS_RESULT)
+        usage = {"input_tokens": prompt_chars // 4, "output_tokens": len(content) // 4,
+                 "total_tokens": (prompt_chars + len(content)) // 4}
+        return SimpleNamespace(content=content, usage_metadata=usage)
+
+    def invoke(self, messages):
+        time.sleep(self.latency.sample())
+        return self._response(messages)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.latency.sample())
+        return self._response(messages)
+
+    async def astream(self, messages):
+        delay = self.latency.sample()
+        response = self._response(messages)
+        # First token after ~40% of the latency, the rest spread over the remainder
+        await asyncio.sleep(delay * 0.4)
+        pieces = [response.content[i:i + 16] for i in range(0, len(response.content), 16)]
+        for piece in pieces:
+            await asyncio.sleep(delay * 0.6 / len(pieces))
+            yield SimpleNamespace(content=piece, usage_metadata=None)
+        yield SimpleNamespace(content="", usage_metadata=response.usage_metadata)
+
+
+class FakeIndex:
+    """In-memory Pinecone index"""
+
+    def __init__(self, dimension, latency):
+        self.dimension = dimension
+        self.latency = latency
+        self._vectors = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors):
+        time.sleep(self.latency.sample())
+        with self._lock:
+            for v in vectors:
+                self._vectors[v["id"]] = (np.asarray(v["values"], dtype=np.float32), dict(v.get("metadata") or {}))
+
+    def fetch(self, ids):
+        time.sleep(self.latency.sample())
+        with self._lock:
+            found = {vid: self._vectors[vid] for vid in ids if vid in self._vectors}
+        return SimpleNamespace(vectors={
+            vid: SimpleNamespace(values=values.tolist(), metadata=metadata) for vid, (values, metadata) in found.items()
+        })
+
+    def delete(self, ids):
+        time.sleep(self.latency.sample())
+        with self._lock:
+            for vid in ids:
+                self._vectors.pop(vid, None)
+
+    def query(self, vector, top_k=3, include_metadata=True, filter=None):
+        time.sleep(self.latency.sample())
+        with self._lock:
+            items = list(self._vectors.items())
+        if filter:
+            from vector_store import _matches_filter
+            items = [(vid, item) for vid, item in items if _matches_filter(item[1], filter)]
+        if not items:
+            return SimpleNamespace(matches=[])
+        matrix = np.stack([values for _, (values, _) in items])
+        query = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        order = np.argsort(-scores)[:top_k]
+        return SimpleNamespace(matches=[
+            SimpleNamespace(id=items[i][0], score=float(scores[i]), metadata=items[i][1][1]) for i in order
+        ])
+
+    def describe_index_stats(self):
+        time.sleep(self.latency.sample())
+        return SimpleNamespace(dimension=self.dimension, total_vector_count=len(self._vectors))
+
+
+def make_fake_pinecone(latency):
+    indexes = {}
+
+    class Pinecone:
+        def __init__(self, api_key=None, **kwargs):
+            pass
+
+        def list_indexes(self):
+            return [SimpleNamespace(name=name) for name in indexes]
+
+        def create_index(self, name, dimension, **kwargs):
+            indexes.setdefault(name, FakeIndex(dimension, latency))
+
+        def Index(self, name):
+            from config import Config
+            return indexes.setdefault(name, FakeIndex(Config.EMBEDDING_DIMENSION, latency))
+
+    module = types.ModuleType("pinecone")
+    module.Pinecone = Pinecone
+    module.ServerlessSpec = lambda **kwargs: SimpleNamespace(**kwargs)
+    return module
+
+
+class FakeEmbeddingBackend:
+    """Deterministic unit vectors from a hash of the text, with a per-text compute cost"""
+
+    name = "fake"
+    model_id = "fake"
+    seconds_per_text = 0.0
+
+    def __init__(self):
+        from config import Config
+        self.dimension = Config.EMBEDDING_DIMENSION
+
+    def encode(self, texts):
+        texts = list(texts)
+        if self.seconds_per_text:
+            time.sleep(self.seconds_per_text * len(texts))
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+            out[i] = vector / np.linalg.norm(vector)
+        return out
+
+    def info(self):
+        return {"backend": self.name, "dimension": self.dimension}
+
+
+def install(llm_latency=0.5, llm_jitter=0.1, llm_error_rate=0.0,
+            pinecone_latency=0.02, pinecone_jitter=0.005, fake_embeddings=False, embed_seconds=0.0, seed=1):
+    """Patch the fakes in; call before importing main/graph"""
+    os.environ.setdefault("GROQ_API_KEY", "fake-groq-key")
+    os.environ.setdefault("PINECONE_API_KEY", "fake-pinecone-key")
+    os.environ.setdefault("SKIP_INDEX_CHECK", "true")
+
+    FakeChatGroq.latency = Latency(llm_latency, llm_jitter, seed)
+    FakeChatGroq.error_rate = llm_error_rate
+    try:
+        import langchain_groq
+    except ImportError:
+        langchain_groq = types.ModuleType("langchain_groq")
+        sys.modules["langchain_groq"] = langchain_groq
+    langchain_groq.ChatGroq = FakeChatGroq
+
+    sys.modules["pinecone"] = make_fake_pinecone(Latency(pinecone_latency, pinecone_jitter, seed))
+
+    if fake_embeddings:
+        import embedding_backends
+        from config import Config
+        FakeEmbeddingBackend.seconds_per_text = embed_seconds
+        embedding_backends.BACKENDS["fake"] = FakeEmbeddingBackend
+        Config.EMBEDDING_BACKEND = "fake"
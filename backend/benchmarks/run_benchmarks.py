@@ -0,0 +1,348 @@
+"""
+Offline benchmark suite for the analysis pipeline
+
+Runs without Groq or Pinecone keys: benchmarks/fakes.py stands in for both
+(configurable latency and jitter), and benchmarks/corpus.py generates PDF
+and DOCX resumes and JDs of varying size. Suites:
+
+- load:  drive POST /api/analyze in-process (or --url a running server) at
+         --concurrency; throughput, p50/p95/p99 latency and per-stage time
+         taken from the /api/metrics histograms
+- graph: the same through graph.analyze_resume, without HTTP and parsing
+- micro: parse.extract_text per format/size, SimpleRAG.chunk_text and
+         SimpleEmbeddings.embed_batch per batch size
+
+Results are printed as JSON (and written to --out) with the git commit and
+settings, so runs can be compared over time. --check-overlap fails the run
+if concurrent requests are serialized somewhere (the old concurrency check).
+
+    cd backend
+    python benchmarks/run_benchmarks.py load --requests 40 --concurrency 8
+    python benchmarks/run_benchmarks.py all --fake-embeddings --out bench.json
+    python benchmarks/run_benchmarks.py load --llm-latency 1 --llm-jitter 0 --check-overlap
+"""
+
+import os
+import sys
+import json
+import time
+import math
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples_s):
+    return {
+        "count": len(samples_s),
+        "mean_ms": round(statistics.mean(samples_s) * 1000, 2),
+        "p50_ms": round(percentile(samples_s, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples_s, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples_s, 99) * 1000, 2),
+        "max_ms": round(max(samples_s) * 1000, 2),
+    }
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+# ---------------------------------------------------------------------------
+# Per-stage time from the metrics histograms
+# ---------------------------------------------------------------------------
+
+def _stage_histograms():
+    import metrics
+    return {
+        "graph_node": metrics.NODE_SECONDS,
+        "parse": metrics.PARSE_SECONDS,
+        "embedding": metrics.EMBED_SECONDS,
+        "vector_store": metrics.VECTOR_SECONDS,
+        "llm": metrics.LLM_SECONDS,
+    }
+
+
+def stage_snapshot():
+    return {name: h.snapshot() for name, h in _stage_histograms().items()}
+
+
+def stage_report(before, after, requests):
+    """Time spent per stage (and label set) between two snapshots"""
+    report = {}
+    for name, histogram in _stage_histograms().items():
+        entries = {}
+        for key, (total, count) in after[name].items():
+            prev_total, prev_count = before[name].get(key, (0.0, 0))
+            if count == prev_count:
+                continue
+            label = ",".join(f"{k}={v}" for k, v in zip(histogram.labels, key))
+            entries[label] = {
+                "calls": count - prev_count,
+                "total_s": round(total - prev_total, 4),
+                "mean_ms": round((total - prev_total) / (count - prev_count) * 1000, 3),
+                "per_request_ms": round((total - prev_total) / max(1, requests) * 1000, 3),
+            }
+        if entries:
+            report[name] = entries
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Suites
+# ---------------------------------------------------------------------------
+
+async def bench_load(args, corpus, jds):
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=None)
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, errors = [], []
+
+    async def one(item, jd, record=True):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/analyze",
+                files={"resume": (item["filename"], item["data"])},
+                data={"jd_text": jd, "mode": args.mode}
+            )
+            elapsed = time.perf_counter() - start
+        if not record:
+            response.raise_for_status()
+        elif response.status_code == 200:
+            latencies.append(elapsed)
+        else:
+            errors.append(response.status_code)
+
+    async with client:
+        # Warm up outside the timed section: model load, parser processes, index connection
+        await one(corpus[0], jds[0], record=False)
+
+        before = stage_snapshot()
+        start = time.perf_counter()
+        await asyncio.gather(*[one(corpus[1 + i], jds[i % len(jds)]) for i in range(args.requests)])
+        wall = time.perf_counter() - start
+        after = stage_snapshot()
+
+    result = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mode": args.mode,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "errors": len(errors),
+        "error_statuses": sorted(set(errors)),
+        "latency": summarize(latencies) if latencies else None,
+    }
+    if not args.url:
+        result["stages"] = stage_report(before, after, args.requests)
+    return result
+
+
+async def bench_graph(args, corpus, jds):
+    import graph
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(item, jd, record=True):
+        async with semaphore:
+            start = time.perf_counter()
+            await graph.analyze_resume(item["text"], jd, item["filename"])
+            if record:
+                latencies.append(time.perf_counter() - start)
+
+    await one(corpus[0], jds[0], record=False)
+    before = stage_snapshot()
+    start = time.perf_counter()
+    await asyncio.gather(*[one(corpus[1 + i], jds[i % len(jds)]) for i in range(args.requests)])
+    wall = time.perf_counter() - start
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(args.requests / wall, 2),
+        "latency": summarize(latencies),
+        "stages": stage_report(before, stage_snapshot(), args.requests),
+    }
+
+
+def bench_micro(args):
+    from corpus import generate, render, resume_lines
+    from parse import extract_text
+    from rag import get_rag
+    import random
+
+    results = {"parse": {}, "chunk_text": {}, "embed_batch": {}}
+
+    rng = random.Random(args.seed)
+    for size in ("small", "medium", "large"):
+        lines = resume_lines(rng, size)
+        for fmt in ("pdf", "docx"):
+            data = render(lines, fmt)
+            stats = time_calls(lambda: extract_text(data, f"resume.{fmt}"), args.iterations)
+            stats["bytes"] = len(data)
+            results["parse"][f"{fmt}_{size}"] = stats
+
+        text = "\n".join(lines)
+        rag = get_rag()
+        stats = time_calls(lambda: rag.chunk_text(text), args.iterations)
+        stats["words"] = len(text.split())
+        stats["chunks"] = len(rag.chunk_text(text))
+        results["chunk_text"][size] = stats
+
+    # Unique texts every call so the embedding cache never answers
+    embeddings = get_rag().embeddings
+    sample = [item["text"] for item in generate(8, seed=args.seed)]
+    counter = [0]
+
+    def batch(n):
+        counter[0] += 1
+        return [f"{sample[i % len(sample)][:1000]} #{counter[0]}-{i}" for i in range(n)]
+
+    for n in (1, 8, 32, 128):
+        rounds = max(3, args.iterations // max(1, n // 4))
+        samples = []
+        for _ in range(rounds):
+            texts = batch(n)
+            start = time.perf_counter()
+            embeddings.embed_batch(texts)
+            samples.append(time.perf_counter() - start)
+        stats = summarize(samples)
+        stats["texts_per_s"] = round(n / statistics.mean(samples), 1)
+        results["embed_batch"][str(n)] = stats
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=BENCH_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def check_overlap(result, args):
+    """The batch should take about ceil(requests / concurrency) LLM latencies, not requests of them"""
+    waves = math.ceil(args.requests / args.concurrency) * args.llm_latency
+    serial = args.requests * args.llm_latency
+    limit = waves + 0.5 * (serial - waves)
+    ok = result["wall_s"] <= limit
+    return {"passed": ok, "wall_s": result["wall_s"], "limit_s": round(limit, 3), "serial_s": serial}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suite", choices=["load", "graph", "micro", "all"])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["full", "fast"], default="full", help="/api/analyze mode")
+    parser.add_argument("--iterations", type=int, default=50, help="micro-benchmark iterations")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake Groq latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of fake Groq calls answering 429")
+    parser.add_argument("--pinecone-latency", type=float, default=0.02, help="fake Pinecone per-call latency (s)")
+    parser.add_argument("--pinecone-jitter", type=float, default=0.005)
+    parser.add_argument("--vector-backend", choices=["pinecone", "local"], default="pinecone",
+                        help="pinecone = the fake Pinecone, local = the memory-mapped index")
+    parser.add_argument("--fake-embeddings", action="store_true", help="hashed vectors instead of the real model")
+    parser.add_argument("--embed-seconds", type=float, default=0.0, help="fake embedding cost per text (s)")
+    parser.add_argument("--url", help="load suite: benchmark a running server instead (no fakes)")
+    parser.add_argument("--check-overlap", action="store_true", help="load suite: fail if requests serialize")
+    parser.add_argument("--out", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    # Settings must be in place before the app modules read Config
+    os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="resumizer-bench-"))
+    os.environ["VECTOR_BACKEND"] = args.vector_backend
+    os.environ.setdefault("CACHE_ENABLED", "false")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import fakes
+    fakes.install(llm_latency=args.llm_latency, llm_jitter=args.llm_jitter, llm_error_rate=args.llm_error_rate,
+                  pinecone_latency=args.pinecone_latency, pinecone_jitter=args.pinecone_jitter,
+                  fake_embeddings=args.fake_embeddings, embed_seconds=args.embed_seconds, seed=args.seed)
+
+    from logging_setup import configure_logging
+    from corpus import generate, generate_jds
+    from config import Config
+    configure_logging()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+            "config": {
+                "embedding_backend": Config.EMBEDDING_BACKEND,
+                "vector_backend": Config.VECTOR_BACKEND,
+                "parse_workers": Config.PARSE_WORKERS,
+                "model_workers": Config.MODEL_WORKERS,
+                "llm_max_concurrency": Config.LLM_MAX_CONCURRENCY,
+                "prompt_token_budget": Config.PROMPT_TOKEN_BUDGET,
+            },
+        }
+    }
+
+    suites = ["load", "graph", "micro"] if args.suite == "all" else [args.suite]
+    corpus = generate(args.requests + 1, seed=args.seed)
+    jds = generate_jds(3, seed=args.seed)
+    failed = False
+    try:
+        if "load" in suites:
+            report["load"] = asyncio.run(bench_load(args, corpus, jds))
+            if args.check_overlap:
+                report["load"]["overlap"] = check_overlap(report["load"], args)
+                failed = not report["load"]["overlap"]["passed"]
+        if "graph" in suites:
+            # Fresh resumes, so nothing is already stored from the load suite
+            report["graph"] = asyncio.run(bench_graph(args, generate(args.requests + 1, seed=args.seed + 1), jds))
+        if "micro" in suites:
+            report["micro"] = bench_micro(args)
+    finally:
+        from parse import get_parse_pool
+        from rag import close_rag
+        get_parse_pool().shutdown()
+        close_rag()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+from collections import OrderedDict
+from config import Config
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+import re
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different extractions hash the same"""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def make_cache_key(resume_text, jd_text, model, prompt_version):
+    """Content-addressed key for one analysis"""
+    h = hashlib.sha256()
+    for part in (normalize_text(resume_text), normalize_text(jd_text), model, prompt_version):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Two-tier cache for analysis results
+
+    - Memory tier: small LRU of decoded payloads
+    - Disk tier: SQLite table with TTL and size-bounded eviction
+
+    Memory hits refresh the disk tier's accessed_at in batches (at most every
+    TOUCH_FLUSH_SECONDS, and always before evicting), so hot entries are not
+    the first to go.
+    """
+
+    TOUCH_FLUSH_SECONDS = 30.0
+
+    def __init__(self, db_path=None, memory_entries=None, max_entries=None, ttl_seconds=None):
+        self.db_path = db_path or Config.CACHE_DB_PATH
+        self.memory_entries = memory_entries or Config.CACHE_MEMORY_ENTRIES
+        self.max_entries = max_entries or Config.CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or Config.CACHE_TTL_SECONDS
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._touched = {}  # key -> last memory hit not yet written to accessed_at
+        self._touches_flushed = time.monotonic()
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed ON analysis_cache(accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """Return (kind, payload dict) or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[2] < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    if time.monotonic() - self._touches_flushed >= self.TOUCH_FLUSH_SECONDS:
+                        self._flush_touches()
+                        self._conn.commit()
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return entry[0], entry[1]
+                del self._memory[key]
+            self._touched.pop(key, None)
+
+            row = self._conn.execute(
+                "SELECT kind, payload, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[2] >= self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+            kind, payload = row[0], json.loads(row[1])
+            self._remember(key, kind, payload, row[2])
+            self.hits += 1
+            self.disk_hits += 1
+            return kind, payload
+
+    def set(self, key, kind, payload):
+        """Store a JSON-serializable payload"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, kind, payload, now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, kind, payload, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(payload), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _remember(self, key, kind, payload, created_at):
+        self._memory[key] = (kind, payload, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touches(self):
+        if self._touched:
+            self._conn.executemany("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?",
+                                   [(at, key) for key, at in self._touched.items()])
+            self._touched.clear()
+        self._touches_flushed = time.monotonic()
+
+    def _evict(self, now):
+        # Expired rows first, then least recently accessed (memory hits included) beyond the size bound
+        self._flush_touches()
+        self._conn.execute(
+            "DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        count = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE key IN ("
+                "SELECT key FROM analysis_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+
+# Global instance
+_cache = None
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = AnalysisCache()
+    return _cache
@@ -0,0 +1,146 @@
+"""
+Section-aware resume chunking for embeddings
+
+MiniLM reads at most 256 word pieces per text and silently drops the rest,
+so chunks are budgeted in tokens, not words. The resume is split into its
+sections (sections.split_sections) and each section into entries: a job or
+project heading plus its bullets. Whole entries are packed into chunks of up
+to max_tokens; an entry larger than that is split between lines, its
+continuation chunks repeat the heading, and consecutive chunks of a section
+may share up to overlap_tokens of trailing lines. Only a single line longer
+than the budget is ever cut mid-line (at word boundaries).
+"""
+
+from sections import split_sections, is_bullet
+from typing import NamedTuple
+from config import Config
+import threading
+import os
+import re
+
+
+class Chunk(NamedTuple):
+    text: str
+    section: str
+    tokens: int
+
+
+# [CLS] and [SEP] take two of the model's positions
+_SPECIAL_TOKENS = 2
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def _get_tokenizer():
+    """The model's WordPiece tokenizer if export_onnx.py has saved it, else None"""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        with _tokenizer_lock:
+            if not _tokenizer_loaded:
+                path = os.path.join(Config.ONNX_MODEL_DIR, "tokenizer.json")
+                try:
+                    from tokenizers import Tokenizer
+                    _tokenizer = Tokenizer.from_file(path) if os.path.exists(path) else None
+                except ImportError:
+                    _tokenizer = None
+                _tokenizer_loaded = True
+    return _tokenizer
+
+
+def count_tokens(text):
+    """Word pieces in text, without the special tokens; estimated if no tokenizer is available"""
+    tokenizer = _get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    # WordPiece keeps common words whole and splits long or rare ones (numbers, names)
+    return sum(1 + len(t) // 5 for t in _WORD_RE.findall(text))
+
+
+def _split_line(line, max_tokens):
+    """Cut an over-long line into word windows of at most max_tokens"""
+    pieces, words, size = [], [], 0
+    for word in line.split():
+        cost = count_tokens(word)
+        if words and size + cost > max_tokens:
+            pieces.append(" ".join(words))
+            words, size = [], 0
+        words.append(word)
+        size += cost
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+
+def _entries(lines):
+    """Group a section's lines into entries: heading lines followed by their bullets"""
+    entries = []
+    previous_bullet = True
+    for line in lines:
+        bullet = is_bullet(line)
+        if not entries or (previous_bullet and not bullet):
+            entries.append([])
+        entries[-1].append(line)
+        previous_bullet = bullet
+    return entries
+
+
+def _pack_section(section, lines, max_tokens, overlap_tokens):
+    chunks = []
+    current, size = [], 0  # [(line, tokens, is_heading)]
+
+    def flush():
+        if current:
+            chunks.append(Chunk("\n".join(line for line, _, _ in current), section, size))
+
+    for entry in _entries(lines):
+        # A job/project heading is worth repeating; a run of plain lines (skills, summary) has none
+        heading = entry[0] if not is_bullet(entry[0]) and any(is_bullet(l) for l in entry[1:]) else None
+        units = []
+        for position, line in enumerate(entry):
+            cost = count_tokens(line)
+            if cost <= max_tokens:
+                units.append((line, cost, position == 0 and heading is not None))
+            else:
+                units.extend((piece, count_tokens(piece), False) for piece in _split_line(line, max_tokens))
+
+        # Start a fresh chunk rather than split an entry that would fit in one
+        entry_size = sum(unit[1] for unit in units)
+        if current and size + entry_size > max_tokens and entry_size <= max_tokens:
+            flush()
+            current, size = [], 0
+
+        for position, (line, cost, is_heading) in enumerate(units):
+            if current and size + cost > max_tokens:
+                flush()
+                carried = []
+                if position > 0:
+                    # Continuing a split entry: its heading, then trailing lines of the previous chunk
+                    if heading is not None:
+                        carried.append((heading, count_tokens(heading), True))
+                    overlap, budget = [], overlap_tokens
+                    for prev in reversed(current):
+                        if prev[2] or prev[1] > budget:
+                            break
+                        overlap.insert(0, prev)
+                        budget -= prev[1]
+                    carried += overlap
+                    while carried and sum(c[1] for c in carried) + cost > max_tokens:
+                        carried.pop()
+                current, size = carried, sum(c[1] for c in carried)
+            current.append((line, cost, is_heading))
+            size += cost
+    flush()
+    return chunks
+
+
+def chunk_resume(text, max_tokens=None, overlap_tokens=None):
+    """[Chunk(text, section, tokens)] in document order; chunks never span two sections"""
+    max_tokens = (max_tokens or Config.CHUNK_MAX_TOKENS) - _SPECIAL_TOKENS
+    overlap_tokens = Config.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    chunks = []
+    for section, lines in split_sections(text):
+        chunks.extend(_pack_section(section, lines, max_tokens, overlap_tokens))
+    return chunks
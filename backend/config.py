@@ -7,10 +7,141 @@ class Config:
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
     GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
   
+    # Groq client pool (see llm.py)
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_MAX_BACKOFF_SECONDS = float(os.getenv("LLM_MAX_BACKOFF_SECONDS", "20"))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+  
+    # Token budget for resume + JD + RAG context in the analysis prompt (0 = unlimited, see prompt.py)
+    PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+    PROMPT_JD_SHARE = float(os.getenv("PROMPT_JD_SHARE", "0.35"))
+  
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "resume-rag")
 
     HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY", "")
     
-    EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2" 
-    EMBEDDING_DIMENSION = 384  
\ No newline at end of file
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    EMBEDDING_DIMENSION = 384
+
+    # Embedding runtime: "torch" (SentenceTransformer), "onnx" (ONNX Runtime, see export_onnx.py)
+    # or "remote" (the shared embedding server process, see embedding_server.py)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_model"))
+    ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "true").lower() == "true"
+    ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 = ONNX Runtime default
+
+    # Micro-batching of concurrent embed calls into one forward pass (see embedding_batcher.py).
+    # Off by default: it pays only where one small forward pass leaves cores idle; measure
+    # with benchmarks/bench_batching.py on the target host before turning it on
+    EMBEDDING_MICROBATCH = os.getenv("EMBEDDING_MICROBATCH", "false").lower() == "true"
+    EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+    EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+    EMBEDDING_BATCH_TIMEOUT = float(os.getenv("EMBEDDING_BATCH_TIMEOUT", "60"))  # seconds a caller waits for its batch
+
+    # Embedding LRU cache; set EMBEDDING_CACHE_PATH to persist it across restarts
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+
+    # Local data directory for caches and on-disk indexes
+    DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+    # Resume chunking for embeddings (see chunking.py); MiniLM reads at most 256 word pieces
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+    # Shared embedding server: one process owns the model, workers with EMBEDDING_BACKEND=remote connect to it
+    EMBEDDING_SOCKET = os.getenv("EMBEDDING_SOCKET", os.path.join(DATA_DIR, "embedding.sock"))
+    EMBEDDING_SERVER_BACKEND = os.getenv("EMBEDDING_SERVER_BACKEND", "torch")
+    EMBEDDING_SERVER_THREADS = int(os.getenv("EMBEDDING_SERVER_THREADS", "2"))
+    EMBEDDING_CONNECT_TIMEOUT = float(os.getenv("EMBEDDING_CONNECT_TIMEOUT", "120"))  # wait for the server's model load
+    EMBEDDING_REQUEST_TIMEOUT = float(os.getenv("EMBEDDING_REQUEST_TIMEOUT", "60"))
+
+    # Vector store backend: "pinecone" or "local" (memory-mapped NumPy index)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+    LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join(DATA_DIR, "local_index"))
+    LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")  # or float16
+    LOCAL_INDEX_COMPACT_RATIO = float(os.getenv("LOCAL_INDEX_COMPACT_RATIO", "0.3"))
+
+    # Write-behind vector upserts (see upsert_queue.py)
+    UPSERT_WRITE_BEHIND = os.getenv("UPSERT_WRITE_BEHIND", "true").lower() == "true"
+    UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))
+    UPSERT_FLUSH_INTERVAL = float(os.getenv("UPSERT_FLUSH_INTERVAL", "0.5"))
+    UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "5"))
+    UPSERT_SPILL_PATH = os.getenv("UPSERT_SPILL_PATH", os.path.join(DATA_DIR, "upsert_spill.jsonl"))  # each process adds .<pid>
+
+    # Logging (see logging_setup.py) and /api/metrics (see metrics.py)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+    METRICS_PREFIX = os.getenv("METRICS_PREFIX", "resumizer")
+
+    # Load the embedding model, vector index and LLM client in the background at startup (see warmup.py)
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+    # A failed stage is retried with exponential backoff between these bounds
+    WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+    WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "300"))
+
+    # Background dependency probes behind /api/health (see health.py)
+    HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "30"))
+    HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "5"))
+    HEALTH_SLOW_MS = float(os.getenv("HEALTH_SLOW_MS", "2000"))  # slower probes report "degraded"
+    HEALTH_HISTORY = int(os.getenv("HEALTH_HISTORY", "10"))
+    # Every worker probes Groq on its own; 0 turns the probe off (the default with VECTOR_BACKEND=local)
+    HEALTH_GROQ_PROBE_INTERVAL = float(os.getenv(
+        "HEALTH_GROQ_PROBE_INTERVAL", "0" if VECTOR_BACKEND == "local" else str(HEALTH_PROBE_INTERVAL)))
+    # Answer 503 on analysis endpoints while a dependency is down (or degraded)
+    HEALTH_SHED_LOAD = os.getenv("HEALTH_SHED_LOAD", "false").lower() == "true"
+    HEALTH_SHED_DEGRADED = os.getenv("HEALTH_SHED_DEGRADED", "false").lower() == "true"
+
+    # Worker pools for blocking work (see executors.py)
+    IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+    MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", "2"))
+    CPU_WORKERS = int(os.getenv("CPU_WORKERS", "4"))
+
+    # Document parsing (process pool, see parse.py); PARSE_WORKERS=0 parses in-process
+    PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+    PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "15"))
+    PARSE_MAX_BYTES = int(os.getenv("PARSE_MAX_BYTES", str(10 * 1024 * 1024)))
+    PARSE_MAX_PAGES = int(os.getenv("PARSE_MAX_PAGES", "50"))
+    PARSE_MEMORY_LIMIT_MB = int(os.getenv("PARSE_MEMORY_LIMIT_MB", "512"))
+    PARSE_MAX_TASKS_PER_WORKER = int(os.getenv("PARSE_MAX_TASKS_PER_WORKER", "200"))
+
+    # Upload intake (see intake.py): request body caps (413), and files above UPLOAD_SPOOL_BYTES
+    # go to a temp file (UPLOAD_SPOOL_DIR, default the system temp dir) that the parser reads by path
+    UPLOAD_MAX_BODY_BYTES = int(os.getenv("UPLOAD_MAX_BODY_BYTES", str(2 * PARSE_MAX_BYTES + 1024 * 1024)))
+    BATCH_MAX_BODY_BYTES = int(os.getenv("BATCH_MAX_BODY_BYTES", str(100 * 1024 * 1024)))
+    UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+    UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(256 * 1024)))
+    UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "")
+
+    # Analysis result cache (in-memory LRU + SQLite)
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(DATA_DIR, "analysis_cache.sqlite3"))
+    CACHE_MEMORY_ENTRIES = int(os.getenv("CACHE_MEMORY_ENTRIES", "256"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+    CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+    # Skill taxonomy compiled into the skill matcher (see skills.py)
+    SKILL_TAXONOMY_PATH = os.getenv(
+        "SKILL_TAXONOMY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.json")
+    )
+    # Below this many taxonomy hits, items of skill lists ("Stack: Temporal, Dagster") count as skills too
+    SKILL_FALLBACK_MIN = int(os.getenv("SKILL_FALLBACK_MIN", "3"))
+
+    # Semantic skill matching against a precomputed skill embedding matrix (see skill_vectors.py)
+    SKILL_SEMANTIC_MATCH = os.getenv("SKILL_SEMANTIC_MATCH", "true").lower() == "true"
+    SKILL_EMBEDDINGS_PATH = os.getenv("SKILL_EMBEDDINGS_PATH", os.path.join(DATA_DIR, "skill_embeddings"))
+    SKILL_MATCH_THRESHOLD = float(os.getenv("SKILL_MATCH_THRESHOLD", "0.75"))
+    SKILL_MATCH_FLOOR = float(os.getenv("SKILL_MATCH_FLOOR", "0.5"))
+
+    # Job description registry (POST /api/jobs, see jobs.py)
+    JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+    JOBS_MEMORY_ENTRIES = int(os.getenv("JOBS_MEMORY_ENTRIES", "128"))
+    JOBS_MAX_ENTRIES = int(os.getenv("JOBS_MAX_ENTRIES", "1000"))
+
+    # Batch analysis (POST /api/analyze/batch)
+    BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
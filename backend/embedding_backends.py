@@ -0,0 +1,153 @@
+from config import Config
+import numpy as np
+import logging
+import json
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBackend:
+    """
+    Turns texts into unit-length float32 vectors
+
+    Every backend must produce vectors compatible with the existing index:
+    Config.EMBEDDING_DIMENSION wide, mean-pooled and L2-normalized like the
+    sentence-transformers all-MiniLM-L6-v2 pipeline.
+    """
+
+    name = "base"
+    model_id = "base"  # which weights produced the vectors; part of every embedding cache key
+    dimension = Config.EMBEDDING_DIMENSION
+
+    def encode(self, texts):
+        """(len(texts), dimension) float32 array"""
+        raise NotImplementedError
+
+    def info(self):
+        return {"backend": self.name, "dimension": self.dimension}
+
+
+class TorchBackend(EmbeddingBackend):
+    """The reference PyTorch SentenceTransformer"""
+
+    name = "torch"
+
+    def __init__(self, model_name=None):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name or Config.EMBEDDING_MODEL
+        self.model_id = f"torch:{self.model_name}"
+        self.model = SentenceTransformer(self.model_name, device="cpu")
+
+    def encode(self, texts):
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return self.model.encode(list(texts), convert_to_numpy=True, batch_size=Config.EMBEDDING_BATCH_SIZE).astype(np.float32)
+
+    def info(self):
+        return {"backend": self.name, "dimension": self.dimension, "model": self.model_name}
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    MiniLM exported to ONNX (see export_onnx.py), run with ONNX Runtime
+
+    Tokenizes with the model's fast tokenizer, runs the transformer, then
+    applies the same mean pooling and normalization as sentence-transformers.
+    With quantized=True it loads the dynamically int8-quantized weights.
+    Needs only onnxruntime, tokenizers and numpy - no torch import.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_dir=None, quantized=None, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir or Config.ONNX_MODEL_DIR
+        self.quantized = Config.ONNX_QUANTIZED if quantized is None else quantized
+        filename = "model.int8.onnx" if self.quantized else "model.onnx"
+        path = os.path.join(self.model_dir, filename)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found - run `python export_onnx.py` first")
+
+        meta_path = os.path.join(self.model_dir, "embedding_config.json")
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        self.max_length = meta.get("max_seq_length", 256)
+        self.dimension = meta.get("dimension", Config.EMBEDDING_DIMENSION)
+        self.model_id = f"onnx:{meta.get('model', self.model_dir)}:{'int8' if self.quantized else 'fp32'}"
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = threads if threads is not None else Config.ONNX_THREADS
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_length)
+        self.tokenizer.enable_padding(pad_id=meta.get("pad_token_id", 0), pad_token=meta.get("pad_token", "[PAD]"))
+
+    def encode(self, texts):
+        texts = list(texts)
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return out
+
+        # Similar lengths share a batch, so little compute is spent on padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batch_size = Config.EMBEDDING_BATCH_SIZE
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in idx])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            out[idx] = pooled
+        return out
+
+    def info(self):
+        return {"backend": self.name, "dimension": self.dimension, "quantized": self.quantized,
+                "model_dir": self.model_dir, "max_seq_length": self.max_length}
+
+
+def _remote_backend():
+    # Client of the shared embedding server process (see embedding_server.py)
+    from embedding_server import RemoteBackend
+    return RemoteBackend()
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxBackend,
+    "remote": _remote_backend,
+}
+
+
+def create_embedding_backend(name=None):
+    """Backend chosen by Config.EMBEDDING_BACKEND; falls back to torch if the ONNX export is missing"""
+    name = (name or Config.EMBEDDING_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{name}' (expected one of: {', '.join(BACKENDS)})")
+
+    if name == "onnx":
+        try:
+            return OnnxBackend()
+        except (ImportError, FileNotFoundError) as e:
+            logger.warning("ONNX embedding backend unavailable (%s); falling back to torch", e)
+            return TorchBackend()
+    return BACKENDS[name]()
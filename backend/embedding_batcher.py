@@ -0,0 +1,162 @@
+from metrics import EMBED_SECONDS, EMBED_BATCH_TEXTS, EMBED_QUEUE_SECONDS, batch_size_label
+from concurrent.futures import Future
+from collections import deque
+from config import Config
+import numpy as np
+import threading
+import time
+
+
+class _Request:
+    __slots__ = ("texts", "future", "enqueued")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class EmbeddingBatcher:
+    """
+    Dynamic micro-batching in front of an embedding backend
+
+    encode() blocks like backend.encode(), but concurrent callers are merged:
+    the first waiting request opens a window of window_ms, and everything
+    that arrives before it closes (or until max_batch texts are queued) runs
+    as one forward pass. Texts are deduplicated and sorted by length so the
+    backend's padded sub-batches waste little compute, and each caller gets
+    its own rows back. While a batch is running the next one keeps filling,
+    so under load batches dispatch back to back without waiting.
+
+    submit() queues without blocking and returns the Future; async callers
+    await it (asyncio.wrap_future) instead of parking a pool thread on it, so
+    the number of requests that can meet in one batch is not capped by the
+    size of any thread pool.
+    """
+
+    def __init__(self, backend, window_ms=None, max_batch=None, timeout=None):
+        self.backend = backend
+        self.window = (window_ms if window_ms is not None else Config.EMBEDDING_BATCH_WINDOW_MS) / 1000
+        self.max_batch = max_batch or Config.EMBEDDING_MAX_BATCH
+        self.timeout = timeout or Config.EMBEDDING_BATCH_TIMEOUT
+
+        self._queue = deque()
+        self._queued_texts = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.encoded_texts = 0
+        self.largest_batch = 0
+        self.max_wait_ms = 0.0
+        self._total_wait_ms = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, texts):
+        """(len(texts), dimension) float32 array, computed in a shared batch"""
+        return self.submit(texts).result(timeout=self.timeout)
+
+    def submit(self, texts):
+        """Queue texts for the next batch; a concurrent.futures.Future of their (n, dimension) array"""
+        texts = list(texts)
+        request = _Request(texts)
+        if not texts:
+            request.future.set_result(np.zeros((0, self.backend.dimension), dtype=np.float32))
+            return request.future
+
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Embedding batcher is closed")
+            self._queue.append(request)
+            self._queued_texts += len(texts)
+            if len(self._queue) == 1 or self._queued_texts >= self.max_batch:
+                self._cond.notify()
+        return request.future
+
+    def _take_batch(self):
+        # Whole requests only; one larger than max_batch runs on its own
+        batch, size = [], 0
+        while self._queue and (not batch or size + len(self._queue[0].texts) <= self.max_batch):
+            request = self._queue.popleft()
+            batch.append(request)
+            size += len(request.texts)
+        self._queued_texts -= size
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline = self._queue[0].enqueued + self.window
+                while self._queued_texts < self.max_batch and not self._stopping:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        # Any failure reaches every caller: an exception escaping here would end
+        # the batcher thread and leave this batch and all later ones waiting
+        try:
+            self._encode_batch(batch)
+        except BaseException as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+    def _encode_batch(self, batch):
+        start = time.perf_counter()
+        texts = sorted(dict.fromkeys(t for request in batch for t in request.texts), key=len)
+        with EMBED_SECONDS.time(batch_size=batch_size_label(len(texts))):
+            vectors = np.asarray(self.backend.encode(texts), dtype=np.float32)
+
+        rows = {text: i for i, text in enumerate(texts)}
+        for request in batch:
+            wait_ms = (start - request.enqueued) * 1000
+            EMBED_QUEUE_SECONDS.observe(wait_ms / 1000)
+            self._total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.texts += len(request.texts)
+            request.future.set_result(vectors[[rows[t] for t in request.texts]])
+        EMBED_BATCH_TEXTS.observe(len(texts))
+        self.batches += 1
+        self.requests += len(batch)
+        self.encoded_texts += len(texts)
+        self.largest_batch = max(self.largest_batch, len(texts))
+
+    def depth(self):
+        with self._cond:
+            return self._queued_texts
+
+    def close(self, timeout=5.0):
+        """Finish the queued requests, then stop the thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout=timeout)
+
+    def stats(self):
+        return {
+            "window_ms": round(self.window * 1000, 2),
+            "max_batch": self.max_batch,
+            "depth": self.depth(),
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "encoded_texts": self.encoded_texts,
+            "avg_batch": round(self.encoded_texts / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "avg_wait_ms": round(self._total_wait_ms / self.requests, 2) if self.requests else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 2)
+        }
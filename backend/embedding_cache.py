@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from config import Config
+import numpy as np
+import threading
+import tempfile
+import hashlib
+import logging
+import json
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+def text_key(text, namespace=""):
+    h = hashlib.sha1(namespace.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Bounded, thread-safe LRU of embeddings keyed by a hash of the input text
+
+    The namespace (the backend's model_id) is part of every key, so a cache
+    persisted under one model is never served to another. Optionally persisted
+    as a float16 matrix (.npy) plus a JSON list of keys with the matrix digest.
+    """
+
+    def __init__(self, capacity=None, path=None, namespace=""):
+        self.capacity = capacity if capacity is not None else Config.EMBEDDING_CACHE_SIZE
+        self.path = path if path is not None else Config.EMBEDDING_CACHE_PATH
+        self.namespace = namespace
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.path:
+            self.load()
+
+    def get(self, text):
+        key = text_key(text, self.namespace)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def get_many(self, texts):
+        """Return a list aligned with texts, with None for misses"""
+        keys = [text_key(t, self.namespace) for t in texts]
+        results = []
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                results.append(vector)
+        return results
+
+    def put(self, text, vector):
+        self.put_many([text], [vector])
+
+    def put_many(self, texts, vectors):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = text_key(text, self.namespace)
+                self._entries[key] = np.asarray(vector, dtype=np.float32)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def _files(self):
+        return self.path + ".npy", self.path + ".keys.json"
+
+    def load(self):
+        vectors_file, keys_file = self._files()
+        if self.capacity <= 0 or not (os.path.exists(vectors_file) and os.path.exists(keys_file)):
+            return
+        try:
+            matrix = np.load(vectors_file)
+            with open(keys_file, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            keys = saved["keys"]
+        except Exception as e:
+            logger.warning("Could not load embedding cache: %s", e)
+            return
+        # The two files are replaced one after the other; a crash in between pairs keys with the wrong rows
+        if len(keys) != len(matrix) or saved.get("sha1") != hashlib.sha1(matrix.tobytes()).hexdigest():
+            logger.warning("Embedding cache files do not match, starting empty")
+            return
+
+        with self._lock:
+            # Oldest first on disk, so the LRU order survives a restart
+            for key, row in zip(keys[-self.capacity:], matrix[-self.capacity:]):
+                self._entries[key] = row.astype(np.float32)
+        logger.info("Loaded %d cached embeddings", len(self._entries))
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._entries:
+                return
+            keys = list(self._entries.keys())
+            matrix = np.stack(list(self._entries.values())).astype(np.float16)
+
+        vectors_file, keys_file = self._files()
+        os.makedirs(os.path.dirname(vectors_file) or ".", exist_ok=True)
+        # Unique temp files in the target directory, so concurrent savers never share one
+        self._replace(vectors_file, lambda f: np.save(f, matrix))
+        digest = hashlib.sha1(matrix.tobytes()).hexdigest()
+        self._replace(keys_file, lambda f: f.write(json.dumps({"sha1": digest, "keys": keys}).encode("utf-8")))
+
+    @staticmethod
+    def _replace(target, write):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or ".", prefix=os.path.basename(target) + ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "capacity": self.capacity
+            }
@@ -0,0 +1,302 @@
+"""
+Shared embedding server: one process owns the model, API workers borrow it
+
+Running several uvicorn workers would otherwise load one copy of torch and
+the model per worker. Instead embedding_server.py loads a single backend
+(EMBEDDING_SERVER_BACKEND) and listens on a Unix socket; workers started with
+EMBEDDING_BACKEND=remote use RemoteBackend below.
+
+Protocol, per connection: length-prefixed JSON requests carry the texts; the
+vectors are not sent back over the socket but written as float32 rows into a
+shared-memory buffer the client owns, and the reply only says how many rows.
+Each client connection has its own buffer (grown on demand), so a result
+costs one memcpy instead of serialization.
+
+    python embedding_server.py [--backend onnx] [--socket /path/to.sock]
+"""
+
+from multiprocessing import shared_memory, resource_tracker
+from embedding_backends import EmbeddingBackend, create_embedding_backend
+from embedding_batcher import EmbeddingBatcher
+from config import Config
+import numpy as np
+import socketserver
+import threading
+import argparse
+import logging
+import socket
+import struct
+import atexit
+import queue
+import json
+import time
+import os
+
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!I")
+
+
+def _send(sock, message):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("embedding server connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv(sock):
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+def _attach(name):
+    """Open the client's buffer without adopting it: on Python < 3.13 the resource
+    tracker would otherwise unlink every client buffer when the server exits"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        shm = None
+        try:
+            while True:
+                try:
+                    request = _recv(self.request)
+                except (ConnectionError, OSError):
+                    return
+                try:
+                    if request.get("op") == "info":
+                        _send(self.request, {"ok": True, **self.server.info()})
+                        continue
+
+                    if shm is None or shm.name != request["shm"].lstrip("/"):
+                        if shm is not None:
+                            shm.close()
+                        shm = _attach(request["shm"])
+                    vectors = self.server.encode(request["texts"])
+                    if vectors.nbytes > shm.size:
+                        raise ValueError(f"{vectors.nbytes} bytes of vectors do not fit a {shm.size} byte buffer")
+                    view = np.ndarray(vectors.shape, dtype=np.float32, buffer=shm.buf)
+                    view[:] = vectors
+                    del view  # the buffer cannot be closed while a view exists
+                    _send(self.request, {"ok": True, "rows": vectors.shape[0], "dim": vectors.shape[1]})
+                except Exception as e:
+                    logger.exception("Embedding request failed: %s", e)
+                    _send(self.request, {"ok": False, "error": str(e)})
+        finally:
+            if shm is not None:
+                shm.close()
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    One thread per client connection. Requests from all workers are merged by
+    an EmbeddingBatcher; without one, at most `threads` forward passes run at once.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, backend, threads=None, batcher=None):
+        self.backend = backend
+        self.batcher = batcher
+        self._slots = threading.BoundedSemaphore(threads or Config.EMBEDDING_SERVER_THREADS)
+        super().__init__(path, _Handler)
+
+    def info(self):
+        info = {**self.backend.info(), "model_id": self.backend.model_id}
+        if self.batcher is not None:
+            info["batching"] = self.batcher.stats()
+        return info
+
+    def encode(self, texts):
+        if self.batcher is not None:
+            vectors = self.batcher.encode(texts)
+        else:
+            with self._slots:
+                vectors = self.backend.encode(texts)
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def _claim_socket(path):
+    """Remove a stale socket file, refusing if a live server still answers on it"""
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"An embedding server is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def serve(path=None, backend=None, threads=None):
+    path = path or Config.EMBEDDING_SOCKET
+    name = backend or Config.EMBEDDING_SERVER_BACKEND
+    if name == "remote":
+        raise ValueError("The embedding server needs a local backend (torch or onnx), not 'remote'")
+
+    start = time.perf_counter()
+    model = create_embedding_backend(name)
+    logger.info("Embedding server loaded %s backend in %.1fs", model.name, time.perf_counter() - start)
+
+    _claim_socket(path)
+    batcher = EmbeddingBatcher(model) if Config.EMBEDDING_MICROBATCH else None
+    server = EmbeddingServer(path, model, threads, batcher)
+    logger.info("Embedding server listening on %s", path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+class _Connection:
+    """One socket plus the shared-memory buffer the server writes results into"""
+
+    def __init__(self, path, timeout):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.shm = None
+
+    def request(self, message):
+        _send(self.sock, message)
+        reply = _recv(self.sock)
+        if not reply.get("ok"):
+            raise RuntimeError(f"Embedding server error: {reply.get('error')}")
+        return reply
+
+    def encode(self, texts, dimension):
+        needed = len(texts) * dimension * 4
+        if self.shm is None or self.shm.size < needed:
+            self._release_buffer()
+            # Next power of two, so a growing workload reallocates only a few times
+            self.shm = shared_memory.SharedMemory(create=True, size=1 << max(needed - 1, 4095).bit_length())
+
+        reply = self.request({"op": "encode", "shm": self.shm.name, "texts": texts})
+        view = np.ndarray((reply["rows"], reply["dim"]), dtype=np.float32, buffer=self.shm.buf)
+        vectors = view.copy()  # the buffer is reused by the next request
+        del view
+        return vectors
+
+    def _release_buffer(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def close(self):
+        self.sock.close()
+        self._release_buffer()
+
+
+class RemoteBackend(EmbeddingBackend):
+    """EMBEDDING_BACKEND=remote: encode through the shared embedding server"""
+
+    name = "remote"
+
+    def __init__(self, socket_path=None, connect_timeout=None, request_timeout=None):
+        self.socket_path = socket_path or Config.EMBEDDING_SOCKET
+        self.request_timeout = request_timeout or Config.EMBEDDING_REQUEST_TIMEOUT
+        self._idle = queue.LifoQueue()
+        self._closed = False
+
+        # The server may still be loading its model when the workers start
+        deadline = time.monotonic() + (connect_timeout if connect_timeout is not None else Config.EMBEDDING_CONNECT_TIMEOUT)
+        while True:
+            try:
+                conn = _Connection(self.socket_path, self.request_timeout)
+                break
+            except OSError as e:
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"Embedding server not reachable at {self.socket_path}: {e}") from e
+                time.sleep(0.5)
+        self.server_info = conn.request({"op": "info"})
+        self.dimension = self.server_info.get("dimension", Config.EMBEDDING_DIMENSION)
+        self.model_id = self.server_info.get("model_id", f"remote:{self.socket_path}")
+        self._idle.put(conn)
+        atexit.register(self.close)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _Connection(self.socket_path, self.request_timeout)
+
+    def encode(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        conn = self._acquire()
+        try:
+            vectors = conn.encode(texts, self.dimension)
+        except socket.timeout:
+            conn.close()  # a late reply would desync the stream
+            raise
+        except (ConnectionError, OSError):
+            # Stale connection (e.g. the server restarted): one retry on a fresh one
+            conn.close()
+            conn = _Connection(self.socket_path, self.request_timeout)
+            try:
+                vectors = conn.encode(texts, self.dimension)
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            self._idle.put(conn)
+            raise
+        self._idle.put(conn)
+        return vectors
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def info(self):
+        return {"backend": self.name, "dimension": self.dimension, "socket": self.socket_path,
+                "server": {k: v for k, v in self.server_info.items() if k != "ok"}}
+
+
+if __name__ == "__main__":
+    from logging_setup import configure_logging
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default=None, help="torch or onnx (default: EMBEDDING_SERVER_BACKEND)")
+    parser.add_argument("--socket", default=None, help="Unix socket path (default: EMBEDDING_SOCKET)")
+    parser.add_argument("--threads", type=int, default=None, help="concurrent forward passes")
+    args = parser.parse_args()
+
+    configure_logging()
+    serve(args.socket, args.backend, args.threads)
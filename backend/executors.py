@@ -0,0 +1,39 @@
+"""
+Dedicated pools for blocking work so async endpoints never stall the event loop
+
+- io: vector store (Pinecone) and other blocking network calls
+- model: embedding model forward passes
+- cpu: document parsing and other CPU-bound helpers
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from config import Config
+import asyncio
+
+
+_io_executor = ThreadPoolExecutor(max_workers=Config.IO_WORKERS, thread_name_prefix="io")
+_model_executor = ThreadPoolExecutor(max_workers=Config.MODEL_WORKERS, thread_name_prefix="model")
+_cpu_executor = ThreadPoolExecutor(max_workers=Config.CPU_WORKERS, thread_name_prefix="cpu")
+
+
+async def _run(executor, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+
+async def run_io(fn, *args, **kwargs):
+    return await _run(_io_executor, fn, *args, **kwargs)
+
+
+async def run_model(fn, *args, **kwargs):
+    return await _run(_model_executor, fn, *args, **kwargs)
+
+
+async def run_cpu(fn, *args, **kwargs):
+    return await _run(_cpu_executor, fn, *args, **kwargs)
+
+
+def shutdown():
+    for executor in (_io_executor, _model_executor, _cpu_executor):
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,84 @@
+"""
+Export the cached MiniLM model to ONNX for EMBEDDING_BACKEND=onnx
+
+Writes model.onnx (fp32), model.int8.onnx (dynamically quantized int8
+weights), tokenizer.json and embedding_config.json to ONNX_MODEL_DIR. Needs
+torch and sentence-transformers (build time only); the onnx backend itself
+runs on onnxruntime + tokenizers.
+
+    python export_onnx.py
+    python export_onnx.py --out /models/onnx --opset 17
+"""
+
+from config import Config
+import argparse
+import inspect
+import json
+import os
+
+
+def export_onnx(out_dir=None, opset=14):
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    out_dir = out_dir or Config.ONNX_MODEL_DIR
+    os.makedirs(out_dir, exist_ok=True)
+
+    st_model = SentenceTransformer(Config.EMBEDDING_MODEL, device="cpu")
+    transformer = st_model[0]
+    transformer.auto_model.eval()
+
+    class TokenEmbeddings(torch.nn.Module):
+        # last_hidden_state only; pooling and normalization happen in OnnxBackend
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask,
+                              token_type_ids=token_type_ids)[0]
+
+    dummy = transformer.tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    dynamic = {0: "batch", 1: "sequence"}
+    # TorchScript exporter: torch >= 2.9 defaults to the dynamo one, which needs onnxscript
+    legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer.auto_model),
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic,
+                          "token_type_ids": dynamic, "last_hidden_state": dynamic},
+            opset_version=opset,
+            **legacy
+        )
+    print(f"✅ Exported {fp32_path}")
+
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"✅ Quantized {int8_path}")
+
+    transformer.tokenizer.save_pretrained(out_dir)
+    tokenizer = transformer.tokenizer
+    with open(os.path.join(out_dir, "embedding_config.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": Config.EMBEDDING_MODEL,
+            "dimension": st_model.get_sentence_embedding_dimension(),
+            "max_seq_length": st_model.max_seq_length,
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+            "opset": opset
+        }, f, indent=2)
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=None, help="output directory (default: ONNX_MODEL_DIR)")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+    export_onnx(args.out, args.opset)
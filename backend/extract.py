@@ -1,5 +1,14 @@
 from llm import get_llm
 from models import ExtractedInfo, JDRequirements
+from sections import section_map, is_bullet
+from skills import extract_skills
+from datetime import datetime
+import logging
+import re
+
+
+logger = logging.getLogger(__name__)
+
 
 def extract_resume_info(resume_text):
     """
@@ -7,11 +16,12 @@ def extract_resume_info(resume_text):
     
     Uses LLM to parse resume and return JSON with:
     - Name, email, phone
-    - Skills list
     - Experience entries
     - Education
+    Skills come from the skill matcher (skills.py), not the LLM.
     """
     llm = get_llm(temperature=0.3)  # Low temp = more consistent
+    skills = extract_skills(resume_text, fallback=True)
     
     # Simple prompt
     prompt = f"""Extract information from this resume as JSON:
@@ -20,7 +30,6 @@ def extract_resume_info(resume_text):
     "name": "full name or null",
     "email": "email or null",
     "phone": "phone or null",
-    "skills": ["list", "of", "skills"],
     "experience": ["job title at company", ...],
     "education": ["degree from school", ...],
     "summary": "brief summary"
@@ -33,29 +42,36 @@ Return ONLY the JSON, nothing else."""
     
     try:
         data = llm.extract_json(prompt)
+        data["skills"] = skills
         return ExtractedInfo(**data)
     except Exception as e:
-        print(f"   Error: {e}")
+        logger.warning("LLM resume extraction failed, using fallback: %s", e)
         # Return basic fallback
         return ExtractedInfo(
-            skills=[],
+            skills=skills,
             summary="Could not parse resume"
         )
 
 
-def extract_jd_requirements(jd_text):
+def extract_jd_requirements(jd_text, use_llm=False):
     """
     Extract requirements from job description
+    
+    Skills always come from the skill matcher. With use_llm=True the LLM
+    fills in the experience and education requirements and responsibilities.
     """
+    requirements = extract_jd_requirements_fast(jd_text)
+    if not use_llm:
+        return requirements
+    
     llm = get_llm(temperature=0.3)
     
     prompt = f"""Extract requirements from this job description as JSON:
 
 {{
-    "required_skills": ["skill1", "skill2"],
-    "preferred_skills": ["skill1", "skill2"],
     "experience_required": "X years",
-    "education_required": "degree"
+    "education_required": "degree",
+    "responsibilities": ["responsibility 1", "responsibility 2"]
 }}
 
 Job Description:
@@ -65,10 +81,14 @@ Return ONLY the JSON."""
     
     try:
         data = llm.extract_json(prompt)
-        return JDRequirements(**data)
+        return requirements.model_copy(update={
+            "experience_required": data.get("experience_required") or requirements.experience_required,
+            "education_required": data.get("education_required") or requirements.education_required,
+            "responsibilities": data.get("responsibilities") or []
+        })
     except Exception as e:
-        print(f"   Error: {e}")
-        return JDRequirements(required_skills=[])
+        logger.warning("LLM JD extraction failed, keeping deterministic requirements: %s", e)
+        return requirements
 
 
 def assess_resume_quality(resume_text):
@@ -100,3 +120,176 @@ Return JSON:
         )
     except:
         return (70.0, ["Resume parsed"], ["Add more details"])
+
+
+# ---------------------------------------------------------------------------
+# Deterministic extraction (no LLM) used by the fast scoring mode
+# ---------------------------------------------------------------------------
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_RE = re.compile(r"(?:\+?\d{1,3}[\s.-]?)?(?:\(?\d{3}\)?[\s.-]?)\d{3}[\s.-]?\d{4}")
+YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years|yrs)", re.IGNORECASE)
+DATE_RANGE_RE = re.compile(
+    r"((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now|date)",
+    re.IGNORECASE
+)
+DEGREE_RE = re.compile(
+    r"\b(ph\.?d|doctorate|master'?s?|m\.?s\.?c?|mba|m\.?tech|m\.?e\.|bachelor'?s?|b\.?s\.?c?|b\.?a\.?|"
+    r"b\.?tech|b\.?e\.|associate'?s?|diploma)\b",
+    re.IGNORECASE
+)
+PREFERRED_RE = re.compile(r"prefer|nice to have|nice-to-have|bonus|plus|desirable|optional", re.IGNORECASE)
+
+
+def estimate_years_of_experience(text):
+    """Largest explicit "N years" mention, or the span covered by date ranges"""
+    explicit = [int(m.group(1)) for m in YEARS_RE.finditer(text)]
+    
+    current_year = datetime.now().year
+    starts, ends = [], []
+    for m in DATE_RANGE_RE.finditer(text):
+        start = int(m.group(1))
+        end = current_year if not m.group(2)[0].isdigit() else int(m.group(2))
+        if start <= end <= current_year:
+            starts.append(start)
+            ends.append(end)
+    span = max(ends) - min(starts) if starts else 0
+    
+    years = max(explicit + [span]) if explicit or span else None
+    return min(years, 50) if years is not None else None
+
+
+def extract_resume_info_fast(resume_text):
+    """Regex and dictionary based resume parsing, no LLM call"""
+    sections = section_map(resume_text)
+    
+    header_lines = [l.strip() for l in sections.get("header", "").splitlines() if l.strip()]
+    name = None
+    if header_lines and not EMAIL_RE.search(header_lines[0]) and len(header_lines[0].split()) <= 5:
+        name = header_lines[0]
+    
+    email = EMAIL_RE.search(resume_text)
+    phone = PHONE_RE.search(resume_text)
+    
+    experience_text = sections.get("experience", "")
+    experience = [
+        l.strip() for l in experience_text.splitlines()
+        if l.strip() and not is_bullet(l) and len(l.strip()) <= 120
+    ][:10]
+    
+    education_text = sections.get("education", "")
+    education = [l.strip() for l in education_text.splitlines() if DEGREE_RE.search(l)]
+    if not education:
+        education = [l.strip() for l in resume_text.splitlines() if DEGREE_RE.search(l)][:3]
+    
+    return ExtractedInfo(
+        name=name,
+        email=email.group(0) if email else None,
+        phone=phone.group(0).strip() if phone else None,
+        skills=extract_skills(resume_text, fallback=True),
+        experience=experience,
+        education=education,
+        summary=(sections.get("summary") or "")[:300] or None,
+        years_of_experience=estimate_years_of_experience(experience_text or resume_text)
+    )
+
+
+def extract_jd_requirements_fast(jd_text):
+    """Split JD skills into required/preferred by the wording of each line, no LLM call"""
+    required_lines, preferred_lines = [], []
+    in_preferred = False
+    for line in jd_text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        is_heading = len(stripped) <= 60 and stripped.endswith(":")
+        if is_heading:
+            in_preferred = bool(PREFERRED_RE.search(stripped))
+        if in_preferred or PREFERRED_RE.search(stripped):
+            preferred_lines.append(stripped)
+        else:
+            required_lines.append(stripped)
+    
+    required = extract_skills("\n".join(required_lines), fallback=True)
+    preferred = [s for s in extract_skills("\n".join(preferred_lines), fallback=True) if s not in required]
+    
+    years = YEARS_RE.search(jd_text)
+    degree = next((l.strip() for l in jd_text.splitlines() if DEGREE_RE.search(l)), None)
+    
+    return JDRequirements(
+        required_skills=required,
+        preferred_skills=preferred,
+        experience_required=f"{years.group(1)} years" if years else None,
+        education_required=degree,
+        responsibilities=[]
+    )
+
+
+ACTION_VERBS = {
+    "led", "built", "designed", "developed", "implemented", "created", "launched", "improved",
+    "reduced", "increased", "optimized", "managed", "delivered", "architected", "automated",
+    "migrated", "mentored", "owned", "shipped", "scaled", "drove", "established", "streamlined"
+}
+QUANTIFIED_RE = re.compile(r"\d+(?:\.\d+)?\s*(?:%|x\b|k\b|m\b|\+)|[$€£₹]\s*\d|\b\d{2,}\b", re.IGNORECASE)
+
+
+def assess_resume_quality_fast(resume_text):
+    """
+    Deterministic quality heuristic
+    
+    Returns: (score 0-100, strengths, suggestions)
+    """
+    sections = section_map(resume_text)
+    lines = [l for l in resume_text.splitlines() if l.strip()]
+    bullets = [l for l in lines if is_bullet(l)]
+    words = resume_text.split()
+    
+    strengths, suggestions = [], []
+    score = 0.0
+    
+    # Contact details (10)
+    contact = (5 if EMAIL_RE.search(resume_text) else 0) + (5 if PHONE_RE.search(resume_text) else 0)
+    score += contact
+    if contact < 10:
+        suggestions.append("Include both an email address and a phone number")
+    
+    # Standard sections (20)
+    present = [name for name in ("summary", "experience", "education", "skills", "projects") if name in sections]
+    score += 4 * len(present)
+    if len(present) >= 4:
+        strengths.append("Clear structure with standard resume sections")
+    missing = [name for name in ("experience", "education", "skills") if name not in sections]
+    if missing:
+        suggestions.append(f"Add clearly labelled sections for: {', '.join(missing)}")
+    
+    # Bullet points (15)
+    score += min(15, len(bullets) * 1.5)
+    if len(bullets) < 5:
+        suggestions.append("Use bullet points to describe responsibilities and achievements")
+    
+    # Quantified achievements (25)
+    quantified = [l for l in (bullets or lines) if QUANTIFIED_RE.search(l)]
+    score += min(25, len(quantified) * 5)
+    if len(quantified) >= 3:
+        strengths.append("Achievements are quantified with concrete numbers")
+    else:
+        suggestions.append("Quantify more achievements (percentages, revenue, users, time saved)")
+    
+    # Action verbs (15)
+    verbs = {w.lower().strip(".,;:") for w in words} & ACTION_VERBS
+    score += min(15, len(verbs) * 2.5)
+    if len(verbs) >= 4:
+        strengths.append("Strong action verbs describe the impact of the work")
+    else:
+        suggestions.append("Start bullet points with strong action verbs (built, led, improved)")
+    
+    # Length (15): roughly one to two pages of text
+    if 300 <= len(words) <= 900:
+        score += 15
+    elif 150 <= len(words) <= 1300:
+        score += 8
+        suggestions.append("Aim for one to two pages of content")
+    else:
+        suggestions.append("Resume length is far from the usual one to two pages")
+    
+    return round(min(score, 100.0), 2), strengths, suggestions
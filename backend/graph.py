@@ -1,76 +1,116 @@
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, Optional
+from typing import TypedDict, Optional, List
 from datetime import datetime
-import hashlib
+import asyncio
+import logging
 import json
 
-from models import ExtractedInfo, JDRequirements, ScoreBreakdown, ATSScoreResponse, ResumeQualityResponse
-from rag import get_rag
-from llm import get_llm
+from models import ExtractedInfo, JDRequirements, ScoreBreakdown, ATSScoreResponse, ResumeQualityResponse, JobDescription
+from rag import get_rag, make_resume_id
+from chunking import Chunk
+from llm import get_llm, LLMRateLimitError
+from cache import get_cache, make_cache_key
+from config import Config
+from executors import run_model, run_io, run_cpu
+from extract import extract_resume_info_fast, extract_jd_requirements_fast, assess_resume_quality_fast
+from scoring import calculate_ats_score
+from prompt import prepare_prompt_inputs, count_tokens, record_prompt
+from metrics import NODE_SECONDS, ERRORS
+
+
+logger = logging.getLogger(__name__)
+
+
+# Bump whenever the analysis prompts change so cached results are not reused
+PROMPT_VERSION = "v3"
 
 
 class ResumeAnalysisState(TypedDict):
     """State for resume analysis workflow"""
     resume_text: str
     jd_text: Optional[str]
+    jd_embedding: Optional[List[float]]
     filename: str
     resume_id: str
+    chunks: List[Chunk]
+    chunk_embeddings: List[List[float]]
+    rag_context: str
+    prompt_tokens: Optional[dict]
     error: Optional[str]
     result: Optional[dict]
 
 
-def store_resume_node(state: ResumeAnalysisState) -> ResumeAnalysisState:
+@NODE_SECONDS.time(node="store_resume")
+async def store_resume_node(state: ResumeAnalysisState) -> ResumeAnalysisState:
     """
-    Node 1: Store resume in Pinecone for RAG
+    Node 1: Store resume in the vector index for RAG
     """
-    print("🧠 Storing resume in vector database...")
+    logger.debug("Storing resume in vector database")
     try:
-        rag = get_rag()
-        
-        # Generate unique ID
-        resume_id = hashlib.md5(
-            f"{state['resume_text'][:100]}{datetime.now().isoformat()}".encode()
-        ).hexdigest()[:16]
+        # Content-hash ID: identical resumes map to the same vectors
+        resume_id = make_resume_id(state["resume_text"])
         
         state["resume_id"] = resume_id
         
-        # Store in Pinecone
-        rag.store_resume(state["resume_text"], resume_id)
-        print(f"   ✅ Stored with ID: {resume_id}")
+        # Store in the vector index (skipped if this resume is already indexed).
+        # Loading the model blocks, so the first get_rag() runs on the model pool.
+        rag = await run_model(get_rag)
+        chunks, embeddings = await rag.astore_resume(state["resume_text"], resume_id)
+        state["chunks"] = chunks
+        state["chunk_embeddings"] = embeddings
+        logger.info("Stored resume %s", resume_id, extra={"resume_id": resume_id, "chunks": len(chunks)})
         
     except Exception as e:
-        print(f"   ❌ Error: {e}")
+        logger.exception("Storing resume failed: %s", e)
+        ERRORS.inc(stage="store_resume")
         state["error"] = f"Storage failed: {str(e)}"
     
     return state
 
 
-def llm_analysis_node(state: ResumeAnalysisState) -> ResumeAnalysisState:
+def format_rag_context(results):
+    """Ranked chunks as prompt lines: "- [section] first 200 characters" """
+    return "\n".join(f"- [{r['section']}] {' '.join(r['text'].split())[:200]}" for r in results)
+
+
+@NODE_SECONDS.time(node="retrieve_context")
+async def retrieve_context_node(state: ResumeAnalysisState) -> ResumeAnalysisState:
     """
-    Node 2: Let LLM do ALL the analysis with comprehensive context
+    Node 2: Pick the resume sections most relevant to the JD
     
-    This is the main node - LLM handles:
-    - Resume parsing
-    - Quality assessment
-    - ATS scoring (if JD provided)
-    - Suggestions
+    Ranks this resume's own chunk embeddings (computed in store_resume_node)
+    against the JD embedding in-process, so no vector store query is needed
+    and chunks from other resumes can never leak into the prompt. A registered
+    JD (jd_id) brings its precomputed embedding.
     """
-    print("🤖 LLM analyzing resume with full context...")
+    if not state["jd_text"] or not state.get("chunks"):
+        return state
     
+    logger.debug("Ranking resume sections against the JD")
     try:
-        llm = get_llm(temperature=0.3)
-        
-        # Get RAG context if JD provided
-        rag_context = ""
-        if state["jd_text"]:
-            rag = get_rag()
-            results = rag.search(state["jd_text"][:500], top_k=3)
-            rag_context = "\n".join([f"- {r['text'][:200]}" for r in results])
-        
-        # Build comprehensive prompt based on whether JD is provided
-        if state["jd_text"]:
-            # WITH JD - Full ATS Analysis
-            system_prompt = """You are an ATS (Applicant Tracking System) analyzer. 
+        rag = await run_model(get_rag)
+        query_embedding = state.get("jd_embedding")
+        if query_embedding is None:
+            query_embedding = await rag.embeddings.aembed(state["jd_text"][:500])
+        results = await run_cpu(
+            rag.rank_chunks, None, state["chunks"], state["chunk_embeddings"], top_k=3,
+            query_embedding=query_embedding
+        )
+        state["rag_context"] = format_rag_context(results)
+    except Exception as e:
+        # Retrieval only enriches the prompt; analysis can continue without it
+        logger.warning("Retrieval failed: %s", e)
+        ERRORS.inc(stage="retrieve_context")
+    
+    return state
+
+
+def build_analysis_prompts(resume_text: str, jd_text: Optional[str], rag_context: str = ""):
+    """Return (system_prompt, user_prompt) for the analysis LLM call"""
+    # Build comprehensive prompt based on whether JD is provided
+    if jd_text:
+        # WITH JD - Full ATS Analysis
+        system_prompt = """You are an ATS (Applicant Tracking System) analyzer. 
 Analyze the resume against the job description and provide a comprehensive JSON response.
 
 Calculate ATS score (0-100) based on:
@@ -82,11 +122,11 @@ Calculate ATS score (0-100) based on:
 IMPORTANT: Ensure scores do NOT exceed their maximum values!
 Be strict but fair in scoring."""
 
-            user_prompt = f"""**RESUME:**
-{state['resume_text']}
+        user_prompt = f"""**RESUME:**
+{resume_text}
 
 **JOB DESCRIPTION:**
-{state['jd_text']}
+{jd_text}
 
 **RELEVANT RESUME SECTIONS (from vector search):**
 {rag_context}
@@ -116,10 +156,10 @@ Analyze and return JSON:
     "suggestions": ["Add Docker experience", "Quantify more achievements"],
     "overall_feedback": "Candidate shows solid experience..."
 }}"""
-        
-        else:
-            # WITHOUT JD - Quality Assessment Only
-            system_prompt = """You are a professional resume reviewer.
+    
+    else:
+        # WITHOUT JD - Quality Assessment Only
+        system_prompt = """You are a professional resume reviewer.
 Analyze the resume quality and provide constructive feedback.
 
 Quality score (0-100) based on:
@@ -128,8 +168,8 @@ Quality score (0-100) based on:
 - Skill presentation
 - Professional summary"""
 
-            user_prompt = f"""**RESUME:**
-{state['resume_text']}
+        user_prompt = f"""**RESUME:**
+{resume_text}
 
 Analyze and return JSON:
 {{
@@ -148,16 +188,65 @@ Analyze and return JSON:
     "suggestions": ["Add more quantified achievements"],
     "feedback": "This is a well-crafted resume..."
 }}"""
+    
+    return system_prompt, user_prompt
+
+
+def prepare_analysis_prompts(resume_text: str, jd_text: Optional[str], rag_context: str = ""):
+    """
+    Cleaned, token-budgeted (system_prompt, user_prompt, token report)
+    
+    See prompt.prepare_prompt_inputs; the report's prompt_tokens is the
+    estimated size of the whole request, instructions included.
+    """
+    inputs = prepare_prompt_inputs(resume_text, jd_text, rag_context)
+    system_prompt, user_prompt = build_analysis_prompts(inputs.resume_text, inputs.jd_text, inputs.rag_context)
+    
+    report = dict(inputs.report)
+    report["prompt_tokens"] = count_tokens(system_prompt) + count_tokens(user_prompt)
+    record_prompt(report)
+    logger.info("Prompt ~%d tokens (resume/JD/context %d -> %d)",
+                report["prompt_tokens"], report["original_tokens"], report["input_tokens"],
+                extra={"prompt_tokens": report["prompt_tokens"], "trimmed": report["trimmed"]})
+    return system_prompt, user_prompt, report
+
+
+@NODE_SECONDS.time(node="llm_analysis")
+async def llm_analysis_node(state: ResumeAnalysisState) -> ResumeAnalysisState:
+    """
+    Node 3: Let LLM do ALL the analysis with comprehensive context
+    
+    This is the main node - LLM handles:
+    - Resume parsing
+    - Quality assessment
+    - ATS scoring (if JD provided)
+    - Suggestions
+    """
+    logger.debug("LLM analyzing resume with full context")
+    
+    try:
+        llm = get_llm(temperature=0.3)
+        
+        # RAG context ranked by retrieve_context_node (empty without a JD)
+        rag_context = state.get("rag_context", "")
+        
+        system_prompt, user_prompt, state["prompt_tokens"] = await run_cpu(
+            prepare_analysis_prompts, state["resume_text"], state["jd_text"], rag_context
+        )
         
         # Get LLM response
-        response = llm.extract_json(user_prompt, system_prompt)
+        response = await llm.aextract_json(user_prompt, system_prompt)
         
         # Store result
         state["result"] = response
-        print(f"   ✅ Analysis complete!")
+        logger.debug("Analysis complete")
         
+    except LLMRateLimitError:
+        ERRORS.inc(stage="llm_analysis")
+        raise  # Surfaces as HTTP 429 instead of a generic analysis failure
     except Exception as e:
-        print(f"   ❌ Error: {e}")
+        logger.exception("LLM analysis failed: %s", e)
+        ERRORS.inc(stage="llm_analysis")
         state["error"] = f"Analysis failed: {str(e)}"
     
     return state
@@ -171,16 +260,29 @@ def check_for_errors(state: ResumeAnalysisState) -> str:
 
 
 # Build the simple graph
-def create_resume_analysis_graph():
+def create_resume_analysis_graph(include_llm=True):
+    """
+    store_resume -> retrieve_context -> llm_analysis
+    
+    include_llm=False stops after retrieval so the streaming endpoint can run
+    the LLM step itself with token streaming.
+    """
     workflow = StateGraph(ResumeAnalysisState)
     
     # Add nodes
     workflow.add_node("store_resume", store_resume_node)
-    workflow.add_node("llm_analysis", llm_analysis_node)
+    workflow.add_node("retrieve_context", retrieve_context_node)
     
     # Build flow
     workflow.set_entry_point("store_resume")
-    workflow.add_edge("store_resume", "llm_analysis")
+    workflow.add_edge("store_resume", "retrieve_context")
+    
+    if not include_llm:
+        workflow.add_edge("retrieve_context", END)
+        return workflow.compile()
+    
+    workflow.add_node("llm_analysis", llm_analysis_node)
+    workflow.add_edge("retrieve_context", "llm_analysis")
     workflow.add_conditional_edges(
         "llm_analysis",
         check_for_errors,
@@ -194,35 +296,368 @@ def create_resume_analysis_graph():
 
 
 # Main entry point
-async def analyze_resume(resume_text: str, jd_text: Optional[str], filename: str):
+async def analyze_resume(resume_text: str, jd_text: Optional[str], filename: str,
+                         job: Optional[JobDescription] = None):
     """
     Analyze resume using simplified LLM-centric workflow
+    
+    Pass a registered `job` instead of jd_text to reuse its pre-processed
+    text and embedding.
     """
-    print("\n" + "="*60)
-    print("🚀 Resume Analysis (LLM-Powered)")
-    print("="*60 + "\n")
+    if job is not None:
+        jd_text = job.text
+    logger.info("Resume analysis (LLM-powered): %s", filename)
+    
+    cache_key, cached = await run_io(lookup_cached_analysis, resume_text, jd_text)
+    if cached is not None:
+        logger.info("Cache hit - returning stored analysis")
+        return cached
     
     # Create graph
     graph = create_resume_analysis_graph()
     
     # Run analysis
-    initial_state = ResumeAnalysisState(
+    initial_state = _initial_state(resume_text, jd_text, filename, job)
+    
+    final_state = await graph.ainvoke(initial_state)
+    
+    # Check for errors
+    if final_state.get("error"):
+        raise Exception(final_state["error"])
+    
+    result = final_state["result"]
+    response = build_response(result, jd_text)
+    await run_io(store_cached_analysis, cache_key, jd_text, response)
+    
+    return response
+
+
+def _initial_state(resume_text: str, jd_text: Optional[str], filename: str,
+                   job: Optional[JobDescription] = None) -> ResumeAnalysisState:
+    return ResumeAnalysisState(
         resume_text=resume_text,
         jd_text=jd_text,
+        jd_embedding=job.embedding if job is not None else None,
         filename=filename,
         resume_id="",
+        chunks=[],
+        chunk_embeddings=[],
+        rag_context="",
+        prompt_tokens=None,
         error=None,
         result=None
     )
+
+
+# Progress events emitted by analyze_resume_stream as each node completes
+STREAM_STAGES = {
+    "store_resume": "stored",
+    "retrieve_context": "retrieved",
+}
+
+
+async def analyze_resume_stream(resume_text: str, jd_text: Optional[str], filename: str,
+                                job: Optional[JobDescription] = None):
+    """
+    Streaming variant of analyze_resume
+    
+    Yields (event, data) pairs:
+    - ("stage", {"stage": "stored" | "retrieved" | "analyzing"}) as the pipeline advances
+    - ("field", {"name": ..., "value": ...}) for each top-level LLM field as soon as it parses
+    - ("result", response_dict) with the validated final response
+    """
+    if job is not None:
+        jd_text = job.text
+    cache_key, cached = await run_io(lookup_cached_analysis, resume_text, jd_text)
+    if cached is not None:
+        logger.info("Cache hit - returning stored analysis")
+        yield "result", {"cached": True, **cached.model_dump(mode="json")}
+        return
+    
+    graph = create_resume_analysis_graph(include_llm=False)
+    state = _initial_state(resume_text, jd_text, filename, job)
+    
+    async for update in graph.astream(state, stream_mode="updates"):
+        for node, node_state in update.items():
+            state = node_state
+            if state.get("error"):
+                raise Exception(state["error"])
+            yield "stage", {"stage": STREAM_STAGES.get(node, node)}
+    
+    yield "stage", {"stage": "analyzing"}
+    
+    llm = get_llm(temperature=0.3)
+    result = None
+    # Same series as llm_analysis_node, so streamed and plain analyses show up together
+    with NODE_SECONDS.time(node="llm_analysis"):
+        system_prompt, user_prompt, _ = await run_cpu(
+            prepare_analysis_prompts, resume_text, jd_text, state.get("rag_context", "")
+        )
+        async for kind, key, value in llm.astream_json(user_prompt, system_prompt):
+            if kind == "field":
+                yield "field", {"name": key, "value": value}
+            else:
+                result = key
+    
+    response = build_response(result, jd_text)
+    await run_io(store_cached_analysis, cache_key, jd_text, response)
+    yield "result", {"cached": False, **response.model_dump(mode="json")}
+
+
+# Bump whenever the fast scoring heuristics change
+FAST_SCORING_VERSION = "fast-v2"
+
+
+async def analyze_resume_fast(resume_text: str, jd_text: Optional[str], filename: str, feedback: bool = False,
+                              job: Optional[JobDescription] = None):
+    """
+    Deterministic scoring without the LLM (mode=fast)
+    
+    Skills, education and quality come from scoring.py and the regex/dictionary
+    extractors in extract.py; experience relevance comes from the similarity of
+    the resume's own chunks to the JD. Identical input always gives identical
+    scores. feedback=True adds one LLM call that only writes the feedback text.
+    A registered `job` supplies the JD text, requirements and embedding.
+    """
+    if job is not None:
+        jd_text = job.text
+    version = FAST_SCORING_VERSION + ("+feedback" if feedback else "")
+    cache_key = None
+    if Config.CACHE_ENABLED:
+        cache_key = make_cache_key(resume_text, jd_text or "", Config.GROQ_MODEL if feedback else "", version)
+        cached = await run_io(get_cache().get, cache_key)
+        if cached is not None:
+            kind, payload = cached
+            if kind == "ats":
+                return ATSScoreResponse.model_validate(payload)
+            return ResumeQualityResponse.model_validate(payload)
+    
+    resume_info = extract_resume_info_fast(resume_text)
+    quality_score, strengths, suggestions = assess_resume_quality_fast(resume_text)
+    
+    if not jd_text:
+        response = ResumeQualityResponse(
+            quality_score=quality_score,
+            extracted_info=resume_info,
+            strengths=strengths,
+            suggestions=suggestions,
+            feedback=f"Deterministic quality score: {quality_score:.0f}/100."
+        )
+        if feedback:
+            response = await _add_llm_feedback(response, resume_text, None)
+        await run_io(store_cached_analysis, cache_key, jd_text, response)
+        return response
+    
+    jd_requirements = job.requirements if job is not None else extract_jd_requirements_fast(jd_text)
+    
+    # Similarity of this resume's chunks to the JD (in-process, no Groq)
+    resume_id = make_resume_id(resume_text)
+    
+    rag = await run_model(get_rag)
+    chunks, embeddings = await rag.astore_resume(resume_text, resume_id)
+    query_embedding = job.embedding if job is not None else await rag.embeddings.aembed(jd_text[:500])
+    results = await run_cpu(rag.rank_chunks, None, chunks, embeddings, top_k=3, query_embedding=query_embedding)
+    
+    # Semantic skill matching may load the skill matrix or embed unknown skills
+    breakdown, matched, missing = await run_model(
+        calculate_ats_score, resume_info, jd_requirements, resume_id, jd_text, quality_score, results=results
+    )
     
-    final_state = await graph.ainvoke(initial_state)
+    if missing:
+        suggestions = [f"Add evidence of: {', '.join(missing[:5])}"] + suggestions
+    if matched:
+        strengths = [f"Matches {len(matched)} of {len(jd_requirements.required_skills)} required skills"] + strengths
     
-    # Check for errors
-    if final_state.get("error"):
-        raise Exception(final_state["error"])
+    response = ATSScoreResponse(
+        ats_score=breakdown.total_score,
+        score_breakdown=breakdown,
+        matched_skills=matched,
+        missing_skills=missing,
+        strengths=strengths,
+        suggestions=suggestions,
+        overall_feedback=(
+            f"Deterministic ATS score {breakdown.total_score:.0f}/100: "
+            f"skills {breakdown.skills_score}/40, experience {breakdown.experience_score}/30, "
+            f"education {breakdown.education_score}/15, quality {breakdown.quality_score}/15."
+        )
+    )
+    if feedback:
+        response = await _add_llm_feedback(response, resume_text, jd_text)
+    await run_io(store_cached_analysis, cache_key, jd_text, response)
+    return response
+
+
+async def _add_llm_feedback(response, resume_text: str, jd_text: Optional[str]):
+    """Optional LLM pass that rewrites strengths/suggestions/feedback; scores stay deterministic"""
+    llm = get_llm(temperature=0.3)
+    feedback_key = "overall_feedback" if jd_text else "feedback"
+    scores = response.model_dump(mode="json", include={"ats_score", "score_breakdown", "quality_score",
+                                                       "matched_skills", "missing_skills"})
     
-    result = final_state["result"]
+    prompt = f"""These scores were computed for the resume below and are final:
+{json.dumps(scores)}
+
+**RESUME:**
+{resume_text[:3000]}
+""" + (f"""
+**JOB DESCRIPTION:**
+{jd_text[:2000]}
+""" if jd_text else "") + f"""
+Write feedback consistent with the scores. Return JSON:
+{{
+    "strengths": ["..."],
+    "suggestions": ["..."],
+    "{feedback_key}": "..."
+}}"""
+    
+    try:
+        result = await llm.aextract_json(prompt, "You are a professional resume reviewer.")
+    except Exception as e:
+        logger.warning("Feedback pass failed, keeping deterministic feedback: %s", e)
+        ERRORS.inc(stage="llm_feedback")
+        return response
+    
+    return response.model_copy(update={
+        "strengths": result.get("strengths", response.strengths),
+        "suggestions": result.get("suggestions", response.suggestions),
+        feedback_key: result.get(feedback_key, getattr(response, feedback_key)),
+    })
+
+
+def lookup_cached_analysis(resume_text: str, jd_text: Optional[str]):
+    """Return (cache_key, cached response or None); cache_key is None when caching is off"""
+    if not Config.CACHE_ENABLED:
+        return None, None
+    
+    # The token budget changes what the LLM sees, so it is part of the prompt version
+    prompt_version = f"{PROMPT_VERSION}-b{Config.PROMPT_TOKEN_BUDGET}"
+    cache_key = make_cache_key(resume_text, jd_text or "", Config.GROQ_MODEL, prompt_version)
+    cached = get_cache().get(cache_key)
+    if cached is None:
+        return cache_key, None
+    
+    kind, payload = cached
+    if kind == "ats":
+        return cache_key, ATSScoreResponse.model_validate(payload)
+    return cache_key, ResumeQualityResponse.model_validate(payload)
+
+
+def store_cached_analysis(cache_key: Optional[str], jd_text: Optional[str], response):
+    if cache_key is None:
+        return
+    kind = "ats" if jd_text else "quality"
+    get_cache().set(cache_key, kind, response.model_dump(mode="json"))
+
+
+def _response_score(response) -> float:
+    if isinstance(response, ATSScoreResponse):
+        return response.ats_score
+    return response.quality_score
+
+
+async def analyze_resume_batch(resumes: List[dict], jd_text: Optional[str], concurrency: int,
+                               job: Optional[JobDescription] = None):
+    """
+    Analyze many resumes against one JD, yielding NDJSON-ready events
     
+    resumes: [{"filename": ..., "resume_text": ..., "index": optional}, ...]
+    
+    The JD query is embedded once, all new resume chunks are embedded in one
+    batch and upserted in bulk, and the per-resume LLM calls run with at most
+    `concurrency` in flight. Yields {"type": "result" | "error", ...} as each
+    resume finishes, then a final {"type": "summary", ...} ranking. A
+    registered `job` supplies the JD text and its precomputed embedding.
+    """
+    if job is not None:
+        jd_text = job.text
+    logger.info("Batch resume analysis: %d resumes", len(resumes))
+    
+    scores = []
+    failed = 0
+    pending = []
+    
+    # Cached analyses are streamed back immediately (SQLite lookups in one trip to the I/O pool)
+    lookups = await run_io(lambda: [lookup_cached_analysis(item["resume_text"], jd_text) for item in resumes])
+    for position, (item, (cache_key, cached)) in enumerate(zip(resumes, lookups)):
+        index = item.get("index", position)
+        if cached is not None:
+            scores.append((index, item["filename"], _response_score(cached)))
+            yield {"type": "result", "index": index, "filename": item["filename"],
+                   "cached": True, "result": cached.model_dump(mode="json")}
+        else:
+            pending.append((index, item, cache_key))
+    
+    if pending:
+        rag = await run_model(get_rag)
+        
+        # One JD embedding and one bulk embed + upsert for every new resume
+        jd_embedding = job.embedding if job is not None else None
+        if jd_text and jd_embedding is None:
+            jd_embedding = await rag.embeddings.aembed(jd_text[:500])
+        stored = await rag.astore_resumes(
+            [(item["resume_text"], make_resume_id(item["resume_text"])) for _, item, _ in pending]
+        )
+        
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        llm = get_llm(temperature=0.3)
+        
+        def build_prompts(resume_text, chunks, embeddings):
+            # Ranking and prompt budgeting (tokenizer passes) are CPU work: off the event loop
+            rag_context = ""
+            if jd_embedding is not None and chunks:
+                results = rag.rank_chunks(None, chunks, embeddings, top_k=3, query_embedding=jd_embedding)
+                rag_context = format_rag_context(results)
+            return prepare_analysis_prompts(resume_text, jd_text, rag_context)
+        
+        async def analyze_one(index, item, cache_key, chunks, embeddings):
+            system_prompt, user_prompt, _ = await run_cpu(build_prompts, item["resume_text"], chunks, embeddings)
+            try:
+                async with semaphore:
+                    result = await llm.aextract_json(user_prompt, system_prompt)
+                response = build_response(result, jd_text)
+            except Exception as e:
+                return index, item, None, e
+            
+            await run_io(store_cached_analysis, cache_key, jd_text, response)
+            return index, item, response, None
+        
+        tasks = [
+            asyncio.create_task(analyze_one(index, item, cache_key, chunks, embeddings))
+            for (index, item, cache_key), (chunks, embeddings) in zip(pending, stored)
+        ]
+        
+        try:
+            for future in asyncio.as_completed(tasks):
+                index, item, response, error = await future
+                if error is not None:
+                    failed += 1
+                    logger.warning("Batch analysis of %s failed: %s", item["filename"], error)
+                    ERRORS.inc(stage="llm_analysis")
+                    yield {"type": "error", "index": index, "filename": item["filename"],
+                           "error": f"Analysis failed: {str(error)}"}
+                    continue
+                scores.append((index, item["filename"], _response_score(response)))
+                yield {"type": "result", "index": index, "filename": item["filename"],
+                       "cached": False, "result": response.model_dump(mode="json")}
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    ranking = sorted(scores, key=lambda s: s[2], reverse=True)
+    yield {
+        "type": "summary",
+        "total": len(resumes),
+        "succeeded": len(scores),
+        "failed": failed,
+        "ranking": [
+            {"rank": rank, "index": index, "filename": filename, "score": score}
+            for rank, (index, filename, score) in enumerate(ranking, start=1)
+        ]
+    }
+
+
+def build_response(result: dict, jd_text: Optional[str]):
+    """Turn the raw LLM JSON into the API response model"""
     # Format response based on whether JD was provided
     if jd_text:
         # Calculate total_score from components
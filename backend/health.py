@@ -0,0 +1,256 @@
+"""
+Background dependency probes behind /api/health
+
+The vector index and the embedding model are probed every
+HEALTH_PROBE_INTERVAL seconds off the request path, Groq every
+HEALTH_GROQ_PROBE_INTERVAL seconds (0 leaves it unprobed). Results (status, last
+round-trip, recent latencies, last error) are kept in memory, so
+/api/health is a dictionary read no matter how often the load balancer
+polls. With HEALTH_SHED_LOAD the analysis endpoints answer 503 while a
+dependency they need is down (or just degraded, with HEALTH_SHED_DEGRADED);
+a Groq outage only sheds the LLM-backed routes and modes.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from config import Config
+import statistics
+import asyncio
+import logging
+import math
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+GROQ_MODELS_URL = "https://api.groq.com/openai/v1/models"
+
+# Probe status, worst last
+OK, STARTING, DEGRADED, DOWN = "ok", "starting", "degraded", "down"
+_SEVERITY = {OK: 0, STARTING: 0, DEGRADED: 1, DOWN: 2}
+
+# What a request needs: everything, or only what runs in-process (mode=fast, JD registration)
+ALL_DEPENDENCIES = ("groq", "vector_index", "embedding_model")
+LOCAL_DEPENDENCIES = ("vector_index", "embedding_model")
+
+# The embedding probe's own thread: queued behind live requests on the small
+# model pool, it would time out under load and report the model as down
+_probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health")
+
+
+class NotLoaded(Exception):
+    """The dependency has not been loaded yet (warmup still running)"""
+
+
+async def probe_groq(timeout):
+    if not Config.GROQ_API_KEY:
+        raise RuntimeError("GROQ_API_KEY missing")
+    from llm import get_llm_manager
+
+    # Lists models: authenticated round trip that costs no tokens
+    response = await get_llm_manager().http_async_client.get(
+        GROQ_MODELS_URL, headers={"Authorization": f"Bearer {Config.GROQ_API_KEY}"}, timeout=timeout
+    )
+    response.raise_for_status()
+
+
+async def probe_vector_index(timeout):
+    import rag
+    from executors import run_io
+
+    if rag._rag is None:
+        raise NotLoaded()
+    await asyncio.wait_for(run_io(rag._rag.store.stats), timeout)
+
+
+async def probe_embedding_model(timeout):
+    import rag
+
+    if rag._embeddings is None:
+        raise NotLoaded()
+    # Straight to the backend (a cache hit would prove nothing), outside the model pool
+    loop = asyncio.get_running_loop()
+    await asyncio.wait_for(
+        loop.run_in_executor(_probe_executor, rag._embeddings.backend.encode, ["health probe"]), timeout
+    )
+
+
+class ProbeResult:
+
+    def __init__(self, name, history):
+        self.name = name
+        self.status = STARTING
+        self.checked_at = None
+        self.latency_ms = None
+        self.latencies = deque(maxlen=history)
+        self.failures = 0
+        self.error = None
+
+    def record(self, latency_ms, error=None, loaded=True):
+        self.checked_at = time.time()
+        if not loaded:
+            self.status, self.error = STARTING, None
+            return
+
+        self.latency_ms = round(latency_ms, 1)
+        if error is None:
+            self.latencies.append(self.latency_ms)
+            self.failures = 0
+            self.error = None
+            self.status = DEGRADED if self.latency_ms > Config.HEALTH_SLOW_MS else OK
+        else:
+            # One failure is a blip, two in a row is an outage
+            self.failures += 1
+            self.error = error
+            self.status = DOWN if self.failures >= 2 else DEGRADED
+
+    def to_dict(self):
+        return {
+            "status": self.status,
+            "checked_at": self.checked_at,
+            "latency_ms": self.latency_ms,
+            "p50_ms": round(statistics.median(self.latencies), 1) if self.latencies else None,
+            "recent_ms": list(self.latencies),
+            "consecutive_failures": self.failures,
+            "error": self.error
+        }
+
+
+class HealthMonitor:
+    """Probes dependencies on an interval and serves the cached results"""
+
+    PROBES = {
+        "groq": probe_groq,
+        "vector_index": probe_vector_index,
+        "embedding_model": probe_embedding_model,
+    }
+
+    def __init__(self, interval=None, timeout=None, history=None, groq_interval=None):
+        self.interval = interval or Config.HEALTH_PROBE_INTERVAL
+        self.timeout = timeout or Config.HEALTH_PROBE_TIMEOUT
+        groq_interval = Config.HEALTH_GROQ_PROBE_INTERVAL if groq_interval is None else groq_interval
+        # Seconds between probes of each dependency; unprobed ones are left out
+        self.intervals = {name: self.interval for name in self.PROBES}
+        self.intervals["groq"] = groq_interval
+        self.intervals = {name: every for name, every in self.intervals.items() if every > 0}
+        self.results = {name: ProbeResult(name, history or Config.HEALTH_HISTORY) for name in self.intervals}
+        self._probed_at = {}
+        self.rounds = 0
+        self._task = None
+        self._snapshot = self._build_snapshot()
+
+    async def _probe(self, name):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.PROBES[name](self.timeout), self.timeout)
+            error, loaded = None, True
+        except NotLoaded:
+            error, loaded = None, False
+        except asyncio.TimeoutError:
+            error, loaded = f"timed out after {self.timeout}s", True
+        except Exception as e:
+            error, loaded = f"{type(e).__name__}: {e}", True
+        self.results[name].record((time.perf_counter() - start) * 1000, error, loaded)
+
+    async def probe_all(self):
+        now = time.monotonic()
+        # Half a round of slack, so loop jitter does not push a probe to the round after
+        due = [name for name, every in self.intervals.items()
+               if now - self._probed_at.get(name, -math.inf) >= every - 0.5 * self.interval]
+        for name in due:
+            self._probed_at[name] = now
+        await asyncio.gather(*[self._probe(name) for name in due])
+        self.rounds += 1
+        previous = self._snapshot["status"]
+        self._snapshot = self._build_snapshot()
+        if self._snapshot["status"] != previous:
+            # Log transitions only, not every round
+            level = logging.INFO if self._snapshot["status"] == "healthy" else logging.WARNING
+            logger.log(level, "Health %s: %s", self._snapshot["status"],
+                       ", ".join(f"{r.name}={r.status}" for r in self.results.values()),
+                       extra={"dependencies": {r.name: r.status for r in self.results.values()}})
+        return self._snapshot
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.exception("Health probe round failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _build_snapshot(self):
+        worst = max((_SEVERITY[r.status] for r in self.results.values()), default=0)
+        return {
+            "status": ["healthy", "degraded", "unhealthy"][worst],
+            "checked_rounds": self.rounds,
+            "probe_interval_s": self.interval,
+            "probe_intervals_s": self.intervals,
+            "dependencies": {name: r.to_dict() for name, r in self.results.items()}
+        }
+
+    def snapshot(self):
+        """Latest probe results; never does I/O"""
+        return self._snapshot
+
+    def should_shed(self, dependencies=ALL_DEPENDENCIES):
+        """Name of the dependency (out of dependencies) that should make requests fail fast, or None"""
+        if not Config.HEALTH_SHED_LOAD:
+            return None
+        shed_on = (DOWN, DEGRADED) if Config.HEALTH_SHED_DEGRADED else (DOWN,)
+        for name in dependencies:
+            result = self.results.get(name)
+            if result is not None and result.status in shed_on:
+                return name
+        return None
+
+    def shed_response(self, dependency):
+        from fastapi.responses import JSONResponse
+        return JSONResponse(
+            status_code=503,
+            content={"detail": f"Service degraded: {dependency} is unavailable, try again later"},
+            headers={"Retry-After": str(max(1, math.ceil(self.intervals.get(dependency, self.interval))))}
+        )
+
+
+class LoadSheddingMiddleware:
+    """
+    ASGI middleware answering 503 + Retry-After on POSTs to the keys of paths
+    while HealthMonitor.should_shed() names one of that path's dependencies;
+    a no-op otherwise. Choices made in the form body (mode=full) are checked
+    by the endpoint itself.
+    """
+
+    def __init__(self, app, paths=None):
+        self.app = app
+        self.paths = dict(paths or {})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in self.paths:
+            monitor = get_health_monitor()
+            dependency = monitor.should_shed(self.paths[scope["path"]])
+            if dependency is not None:
+                await monitor.shed_response(dependency)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+_monitor = HealthMonitor()
+
+def get_health_monitor():
+    return _monitor
@@ -0,0 +1,212 @@
+"""
+Upload intake: capped request bodies, content sniffing and spooled files
+
+- UploadLimitMiddleware answers 413 as soon as a request body is known to
+  exceed its cap (from Content-Length, or counted while it streams in), so
+  an oversized upload is never fully buffered or parsed.
+- receive_upload() copies an UploadFile out of Starlette's spool in fixed
+  chunks under the per-file cap (PARSE_MAX_BYTES) and identifies the format
+  from its magic bytes, not its filename. Small files stay in memory; larger
+  ones are written to a named temp file and reach the parser process as a
+  path, so no full-size bytes copy is made or sent through the pipe.
+"""
+
+from parse import extract_text_async, ParseError, DocumentTooLargeError
+from executors import run_io
+from metrics import ERRORS
+from config import Config
+from io import BytesIO
+import tempfile
+import zipfile
+import json
+import os
+
+
+_PDF_MAGIC = b"%PDF-"
+_ZIP_MAGIC = b"PK\x03\x04"
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # legacy .doc
+
+
+def sniff_kind(head):
+    """"pdf", "zip" (confirmed as DOCX after spooling), "doc" or None, from the first bytes"""
+    # The PDF spec allows junk before the header within the first 1 KB
+    if _PDF_MAGIC in head[:1024]:
+        return "pdf"
+    if head.startswith(_ZIP_MAGIC):
+        return "zip"
+    if head.startswith(_OLE_MAGIC):
+        return "doc"
+    return None
+
+
+def _confirm_docx(source):
+    try:
+        with zipfile.ZipFile(source) as archive:
+            return "word/document.xml" in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+class Upload:
+    """A received file: sniffed kind and size, held as bytes (small) or a temp file path"""
+
+    def __init__(self, filename, kind, size, data=None, path=None):
+        self.filename = filename
+        self.kind = kind
+        self.size = size
+        self.data = data
+        self.path = path
+
+    @property
+    def source(self):
+        return self.path if self.path is not None else self.data
+
+    async def extract_text(self):
+        return await extract_text_async(self.source, self.filename, self.kind)
+
+    def close(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+def _spool(src, filename, max_bytes):
+    src.seek(0)
+    head = src.read(Config.UPLOAD_CHUNK_BYTES)
+    kind = sniff_kind(head)
+    if kind == "doc":
+        raise ParseError("Legacy .doc files are not supported. Save the file as PDF or DOCX.")
+    if kind is None:
+        raise ParseError("Unsupported file format. Use PDF or DOCX.")
+
+    buffer, out, size = bytearray(head), None, len(head)
+    try:
+        chunk = head
+        while chunk:
+            if size > max_bytes:
+                raise DocumentTooLargeError(f"File is larger than {max_bytes} bytes")
+            if out is None and size > Config.UPLOAD_SPOOL_BYTES:
+                out = tempfile.NamedTemporaryFile(prefix="resumizer-upload-", suffix=f".{kind}",
+                                                  dir=Config.UPLOAD_SPOOL_DIR or None, delete=False)
+                out.write(buffer)
+                buffer = None
+            chunk = src.read(Config.UPLOAD_CHUNK_BYTES)
+            size += len(chunk)
+            if out is not None:
+                out.write(chunk)
+            else:
+                buffer += chunk
+        if out is not None:
+            out.close()
+    except BaseException:
+        if out is not None:
+            out.close()
+            os.unlink(out.name)
+        raise
+
+    upload = Upload(filename, kind, size, data=bytes(buffer) if out is None else None,
+                    path=out.name if out is not None else None)
+    if kind == "zip":
+        if not _confirm_docx(upload.path or BytesIO(upload.data)):
+            upload.close()
+            raise ParseError("Unsupported file format. Use PDF or DOCX.")
+        upload.kind = "docx"
+    return upload
+
+
+async def receive_upload(file, max_bytes=None):
+    """
+    Intake an UploadFile: raises DocumentTooLargeError (413) over max_bytes and
+    ParseError (400) for anything that is not a PDF or DOCX. close() the result.
+    """
+    max_bytes = max_bytes or Config.PARSE_MAX_BYTES
+    if file.size is not None and file.size > max_bytes:
+        raise DocumentTooLargeError(f"File is {file.size} bytes (max {max_bytes})")
+    return await run_io(_spool, file.file, file.filename or "", max_bytes)
+
+
+async def read_text(file):
+    """Receive an UploadFile and extract its text; the spooled copy is removed afterwards"""
+    upload = await receive_upload(file)
+    try:
+        return await upload.extract_text()
+    finally:
+        upload.close()
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadLimitMiddleware:
+    """
+    Pure ASGI request body cap, per path prefix (the longest matching prefix wins)
+
+    Content-Length over the cap is refused before any body is read. Otherwise
+    the body is counted as it streams; past the cap, reading stops and the
+    app's own error response (its form parser fails) is replaced with a 413.
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = sorted(limits.items(), key=lambda item: -len(item[0]))
+
+    def _limit(self, path):
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        limit = self._limit(scope["path"]) if scope["type"] == "http" and scope["method"] in ("POST", "PUT") else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                return await self._reject(send, limit)
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded and not started:
+                return  # drop the app's parse-error response; the 413 goes out below
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        if exceeded and not started:
+            await self._reject(send, limit)
+
+    async def _reject(self, send, limit):
+        ERRORS.inc(stage="intake")
+        body = json.dumps({"detail": f"Request body too large (max {limit} bytes)"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from models import JobDescription, JDRequirements
+from extract import extract_jd_requirements
+from prompt import clean_text
+from config import Config
+from datetime import datetime
+import numpy as np
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+
+def make_jd_id(jd_text):
+    """Content-hash ID, so registering the same JD twice returns the same jd_id"""
+    return hashlib.sha256(clean_text(jd_text).encode("utf-8")).hexdigest()[:24]
+
+
+class JobRegistry:
+    """
+    Pre-processed job descriptions referenced by jd_id
+
+    Registration does all per-JD work once: cleaning, requirement extraction
+    and the query embedding used to rank resume chunks. Entries live in a
+    small in-memory LRU in front of a SQLite table; the table is bounded by
+    JOBS_MAX_ENTRIES, evicting the least recently used. Memory hits refresh
+    accessed_at in batches (at most every TOUCH_FLUSH_SECONDS, and always
+    before evicting), so hot JDs are not the first to go.
+    """
+
+    TOUCH_FLUSH_SECONDS = 30.0
+
+    def __init__(self, db_path=None, memory_entries=None, max_entries=None):
+        self.db_path = db_path or Config.JOBS_DB_PATH
+        self.memory_entries = memory_entries or Config.JOBS_MEMORY_ENTRIES
+        self.max_entries = max_entries or Config.JOBS_MAX_ENTRIES
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._touched = {}  # jd_id -> last memory hit not yet written to accessed_at
+        self._touches_flushed = time.monotonic()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                jd_id TEXT PRIMARY KEY,
+                title TEXT,
+                text TEXT NOT NULL,
+                requirements TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_accessed ON jobs(accessed_at)")
+        self._conn.commit()
+
+    def register(self, jd_text, title=None, embed=None):
+        """
+        Pre-process and store a JD; returns (JobDescription, created)
+
+        embed(text) -> vector defaults to the shared embedding model. Blocking:
+        call from a worker thread.
+        """
+        jd_id = make_jd_id(jd_text)
+        existing = self.get(jd_id)
+        if existing is not None:
+            return existing, False
+
+        if embed is None:
+            from rag import get_embeddings
+            embed = get_embeddings().embed
+
+        text = clean_text(jd_text)
+        job = JobDescription(
+            jd_id=jd_id,
+            title=title,
+            text=text,
+            requirements=extract_jd_requirements(text),
+            # Same query the analysis path would embed on every request
+            embedding=[float(x) for x in embed(text[:500])]
+        )
+
+        now = time.time()
+        with self._lock:
+            self._remember(job)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (jd_id, title, text, requirements, embedding, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (jd_id, title, text, job.requirements.model_dump_json(),
+                 np.asarray(job.embedding, dtype=np.float32).tobytes(), job.created_at.timestamp(), now)
+            )
+            self._evict()
+            self._conn.commit()
+        return job, True
+
+    def get(self, jd_id):
+        """JobDescription or None"""
+        with self._lock:
+            job = self._memory.get(jd_id)
+            if job is not None:
+                self._memory.move_to_end(jd_id)
+                self._touched[jd_id] = time.time()
+                if time.monotonic() - self._touches_flushed >= self.TOUCH_FLUSH_SECONDS:
+                    self._flush_touches()
+                    self._conn.commit()
+                return job
+
+            row = self._conn.execute(
+                "SELECT title, text, requirements, embedding, created_at FROM jobs WHERE jd_id = ?", (jd_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched.pop(jd_id, None)
+            self._conn.execute("UPDATE jobs SET accessed_at = ? WHERE jd_id = ?", (time.time(), jd_id))
+            self._conn.commit()
+
+            job = JobDescription(
+                jd_id=jd_id,
+                title=row[0],
+                text=row[1],
+                requirements=JDRequirements.model_validate(json.loads(row[2])),
+                embedding=np.frombuffer(row[3], dtype=np.float32).tolist(),
+                created_at=datetime.fromtimestamp(row[4])
+            )
+            self._remember(job)
+            return job
+
+    def _remember(self, job):
+        self._memory[job.jd_id] = job
+        self._memory.move_to_end(job.jd_id)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touches(self):
+        if self._touched:
+            self._conn.executemany("UPDATE jobs SET accessed_at = ? WHERE jd_id = ?",
+                                   [(at, jd_id) for jd_id, at in self._touched.items()])
+            self._touched.clear()
+        self._touches_flushed = time.monotonic()
+
+    def _evict(self):
+        # Order by real recency, memory hits included
+        self._flush_touches()
+        count = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        if count > self.max_entries:
+            evicted = [r[0] for r in self._conn.execute(
+                "SELECT jd_id FROM jobs ORDER BY accessed_at ASC LIMIT ?", (count - self.max_entries,)
+            )]
+            self._conn.executemany("DELETE FROM jobs WHERE jd_id = ?", [(jd_id,) for jd_id in evicted])
+            for jd_id in evicted:
+                self._memory.pop(jd_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "disk_entries": self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0],
+                "max_entries": self.max_entries
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_job_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = JobRegistry()
+    return _registry
@@ -1,36 +1,56 @@
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
+from collections import deque
+from metrics import LLM_SECONDS, LLM_TOKENS
 from config import Config
+import threading
+import asyncio
+import random
+import httpx
 import json
+import time
+
+
+class LLMRateLimitError(RuntimeError):
+    """Groq kept answering 429 after all retries (maps to HTTP 429)"""
+    status_code = 429
+    
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 
 class SimpleLLM:
     
-    def __init__(self, temperature=0.7):
-        self.llm = ChatGroq(
-            api_key=Config.GROQ_API_KEY,
-            model_name=Config.GROQ_MODEL,
-            temperature=temperature,
-        )
+    def __init__(self, temperature=0.7, max_tokens=None, manager=None):
+        self.manager = manager or get_llm_manager()
+        self.temperature = temperature
+        self.llm = self.manager.client(temperature=temperature, max_tokens=max_tokens)
     
     def chat(self, user_message, system_message=None):
+        response = self.manager.invoke(self.llm, self._messages(user_message, system_message))
+        return response.content
+    
+    async def achat(self, user_message, system_message=None):
+        """Async chat via ChatGroq.ainvoke (does not block the event loop)"""
+        response = await self.manager.ainvoke(self.llm, self._messages(user_message, system_message))
+        return response.content
+    
+    def _messages(self, user_message, system_message=None):
+        from langchain_core.messages import HumanMessage, SystemMessage
+        
         messages = []
         
         if system_message:
             messages.append(SystemMessage(content=system_message))
         
         messages.append(HumanMessage(content=user_message))
-        
-        response = self.llm.invoke(messages)
-        return response.content
+        return messages
     
-    def extract_json(self, user_message, system_message=None):
+    def _json_system_message(self, system_message):
         if not system_message:
-            system_message = "You are a helpful assistant. Respond with valid JSON only."
-        else:
-            system_message += "\n\nIMPORTANT: Respond with valid JSON only, no extra text."
-        
-        response = self.chat(user_message, system_message)
-        
+            return "You are a helpful assistant. Respond with valid JSON only."
+        return system_message + "\n\nIMPORTANT: Respond with valid JSON only, no extra text."
+    
+    def _parse_json(self, response):
         response = response.strip()
         if response.startswith("```json"):
             response = response[7:]
@@ -41,12 +61,363 @@ class SimpleLLM:
         response = response.strip()
         
         return json.loads(response)
+    
+    def extract_json(self, user_message, system_message=None):
+        response = self.chat(user_message, self._json_system_message(system_message))
+        return self._parse_json(response)
+    
+    async def aextract_json(self, user_message, system_message=None):
+        response = await self.achat(user_message, self._json_system_message(system_message))
+        return self._parse_json(response)
+    
+    async def astream_json(self, user_message, system_message=None):
+        """
+        Stream a JSON answer
+        
+        Yields ("field", key, value) for each top-level field as soon as it is
+        complete, then ("done", parsed_dict, None) once the full response is in.
+        """
+        messages = self._messages(user_message, self._json_system_message(system_message))
+        fields = PartialJSONFields()
+        chunks = []
+        
+        async for chunk in self.manager.astream(self.llm, messages):
+            if not chunk.content:
+                continue
+            chunks.append(chunk.content)
+            for key, value in fields.feed(chunk.content):
+                yield "field", key, value
+        
+        yield "done", self._parse_json("".join(chunks)), None
+
+
+class PartialJSONFields:
+    """Incrementally pull completed top-level (key, value) pairs out of a streamed JSON object"""
+    
+    def __init__(self):
+        self.buffer = ""
+        self.pos = None
+        self.finished = False
+        self._decoder = json.JSONDecoder()
+    
+    def _skip(self, i, chars=" \t\r\n,"):
+        while i < len(self.buffer) and self.buffer[i] in chars:
+            i += 1
+        return i
+    
+    def feed(self, text):
+        self.buffer += text
+        fields = []
+        
+        if self.pos is None:
+            start = self.buffer.find("{")
+            if start < 0:
+                return fields
+            self.pos = start + 1
+        
+        while not self.finished:
+            i = self._skip(self.pos)
+            if i >= len(self.buffer):
+                break
+            if self.buffer[i] == "}":
+                self.finished = True
+                break
+            
+            try:
+                key, i = self._decoder.raw_decode(self.buffer, i)
+                i = self._skip(i, " \t\r\n")
+                if i >= len(self.buffer) or self.buffer[i] != ":":
+                    break
+                i = self._skip(i + 1, " \t\r\n")
+                value, end = self._decoder.raw_decode(self.buffer, i)
+            except (json.JSONDecodeError, IndexError):
+                break
+            
+            # A number or literal may still be growing ("7" -> "75.5"); wait for a delimiter
+            if end >= len(self.buffer) or self.buffer[end] not in " \t\r\n,}":
+                break
+            
+            fields.append((key, value))
+            self.pos = end
+        
+        return fields
+
+
+def _retry_after(error):
+    """Seconds from a Retry-After header on a Groq API error, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_retryable(error):
+    status = getattr(error, "status_code", None)
+    if status in (408, 409, 429) or (status is not None and status >= 500):
+        return True
+    # Connection resets and timeouts from the Groq SDK or httpx
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError") or isinstance(error, httpx.TransportError)
+
+
+class CallLimiter:
+    """
+    Cap on in-flight LLM calls shared by threads and the event loop
+    
+    A plain counter under a lock: threads wait on a condition, coroutines
+    wait on a future that release() wakes from whichever thread frees a slot.
+    """
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._waiters = deque()
+    
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+    
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            try:
+                await future
+            finally:
+                with self._cond:
+                    if (loop, future) in self._waiters:
+                        self._waiters.remove((loop, future))
+    
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+            waiters = list(self._waiters)
+            self._waiters.clear()
+        # Wake every waiting coroutine; they re-check the count (cancelled ones just drop out)
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+
+
+class LLMClientManager:
+    """
+    One ChatGroq client per (model, temperature, max_tokens), created once
+    under a lock and all sharing the same pooled httpx clients
+    
+    Every call goes through a process-wide limiter (LLM_MAX_CONCURRENCY) and
+    is retried on 429/5xx/connection errors with jittered exponential backoff,
+    honoring Retry-After. Latency, token usage and retries are recorded per
+    client for /api/llm/stats.
+    """
+    
+    def __init__(self):
+        limits = httpx.Limits(
+            max_connections=Config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.LLM_MAX_CONNECTIONS
+        )
+        timeout = httpx.Timeout(Config.LLM_TIMEOUT_SECONDS, connect=10.0)
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self.limiter = CallLimiter(Config.LLM_MAX_CONCURRENCY)
+        self.max_retries = Config.LLM_MAX_RETRIES
+        self._clients = {}
+        self._llms = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+    
+    def client(self, model=None, temperature=0.7, max_tokens=None):
+        key = (model or Config.GROQ_MODEL, float(temperature), max_tokens)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    # Deferred so importing llm (e.g. for LLMRateLimitError) stays cheap
+                    from langchain_groq import ChatGroq
+                    client = ChatGroq(
+                        api_key=Config.GROQ_API_KEY,
+                        model_name=key[0],
+                        temperature=key[1],
+                        max_tokens=max_tokens,
+                        max_retries=0,  # retries are handled here, around the limiter
+                        http_client=self.http_client,
+                        http_async_client=self.http_async_client,
+                    )
+                    self._clients[key] = client
+                    self._stats[id(client)] = {
+                        "model": key[0], "temperature": key[1], "max_tokens": max_tokens,
+                        "calls": 0, "errors": 0, "retries": 0, "rate_limited": 0,
+                        "input_tokens": 0, "output_tokens": 0,
+                        "total_latency_ms": 0.0, "max_latency_ms": 0.0
+                    }
+        return client
+    
+    def llm(self, temperature=0.7, max_tokens=None):
+        """Shared SimpleLLM wrapper for these parameters"""
+        key = (float(temperature), max_tokens)
+        llm = self._llms.get(key)
+        if llm is None:
+            # Cheap to build (the ChatGroq client itself is created under the lock); first one wins
+            llm = SimpleLLM(temperature=temperature, max_tokens=max_tokens, manager=self)
+            with self._lock:
+                llm = self._llms.setdefault(key, llm)
+        return llm
+    
+    def _backoff(self, attempt, error):
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, Config.LLM_MAX_BACKOFF_SECONDS)
+        return min(Config.LLM_MAX_BACKOFF_SECONDS, 0.5 * (2 ** attempt)) * (0.5 + random.random())
+    
+    def _record(self, client, started, usage=None, error=None):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        usage = usage or {}
+        with self._lock:
+            stats = self._stats[id(client)]
+            stats["calls"] += 1
+            stats["total_latency_ms"] += elapsed_ms
+            stats["max_latency_ms"] = max(stats["max_latency_ms"], elapsed_ms)
+            stats["input_tokens"] += usage.get("input_tokens", 0)
+            stats["output_tokens"] += usage.get("output_tokens", 0)
+            if error is not None:
+                stats["errors"] += 1
+                if getattr(error, "status_code", None) == 429:
+                    stats["rate_limited"] += 1
+            model = stats["model"]
+        
+        if error is None:
+            outcome = "ok"
+        else:
+            outcome = "rate_limited" if getattr(error, "status_code", None) == 429 else "error"
+        LLM_SECONDS.observe(elapsed_ms / 1000, model=model, outcome=outcome)
+        if usage:
+            LLM_TOKENS.inc(usage.get("input_tokens", 0), model=model, type="input")
+            LLM_TOKENS.inc(usage.get("output_tokens", 0), model=model, type="output")
+    
+    def _count_retry(self, client):
+        with self._lock:
+            self._stats[id(client)]["retries"] += 1
+    
+    def _give_up(self, error):
+        if getattr(error, "status_code", None) == 429:
+            raise LLMRateLimitError(f"LLM rate limit exceeded: {error}", _retry_after(error)) from error
+        raise error
+    
+    def invoke(self, client, messages):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = client.invoke(messages)
+            except Exception as e:
+                self._record(client, started, error=e)
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    self._give_up(e)
+                error = e
+            else:
+                self._record(client, started, usage=response.usage_metadata)
+                return response
+            finally:
+                self.limiter.release()
+            
+            # Sleep outside the limiter so waiting calls can use the slot
+            self._count_retry(client)
+            time.sleep(self._backoff(attempt, error))
+    
+    async def ainvoke(self, client, messages):
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire_async()
+            started = time.perf_counter()
+            try:
+                response = await client.ainvoke(messages)
+            except Exception as e:
+                self._record(client, started, error=e)
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    self._give_up(e)
+                error = e
+            else:
+                self._record(client, started, usage=response.usage_metadata)
+                return response
+            finally:
+                self.limiter.release()
+            
+            self._count_retry(client)
+            await asyncio.sleep(self._backoff(attempt, error))
+    
+    async def astream(self, client, messages):
+        """Stream chunks; a failed attempt is only retried if nothing was yielded yet"""
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire_async()
+            started = time.perf_counter()
+            yielded = False
+            usage = None
+            try:
+                async for chunk in client.astream(messages):
+                    if getattr(chunk, "usage_metadata", None):
+                        usage = chunk.usage_metadata
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                self._record(client, started, error=e)
+                if yielded or not _is_retryable(e) or attempt == self.max_retries:
+                    self._give_up(e)
+                error = e
+            else:
+                self._record(client, started, usage=usage)
+                return
+            finally:
+                self.limiter.release()
+            
+            self._count_retry(client)
+            await asyncio.sleep(self._backoff(attempt, error))
+    
+    def stats(self):
+        with self._lock:
+            clients = []
+            for stats in self._stats.values():
+                entry = dict(stats)
+                entry["avg_latency_ms"] = round(stats["total_latency_ms"] / stats["calls"], 2) if stats["calls"] else 0.0
+                entry["total_latency_ms"] = round(stats["total_latency_ms"], 2)
+                entry["max_latency_ms"] = round(stats["max_latency_ms"], 2)
+                clients.append(entry)
+        return {
+            "in_flight": self.limiter.in_flight,
+            "max_concurrency": self.limiter.limit,
+            "clients": clients
+        }
+    
+    async def aclose(self):
+        self.http_client.close()
+        await self.http_async_client.aclose()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_llm_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = LLMClientManager()
+    return _manager
+
 
+def get_llm(temperature=0.7, max_tokens=None):
+    """Shared SimpleLLM for these sampling parameters"""
+    return get_llm_manager().llm(temperature=temperature, max_tokens=max_tokens)
 
-_llm = None
 
-def get_llm(temperature=0.7):
-    global _llm
-    if _llm is None:
-        _llm = SimpleLLM(temperature=temperature)
-    return _llm
+async def close_llm():
+    if _manager is not None:
+        await _manager.aclose()
@@ -0,0 +1,45 @@
+"""
+Logging configuration: LOG_LEVEL controls verbosity, LOG_FORMAT=json emits
+one JSON object per line (with any `extra={...}` fields) for log shippers
+"""
+
+from config import Config
+from datetime import datetime, timezone
+import logging
+import json
+import sys
+
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RESERVED})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None, fmt=None):
+    """Install one stderr handler on the root logger (idempotent)"""
+    root = logging.getLogger()
+    root.setLevel((level or Config.LOG_LEVEL).upper())
+    if getattr(root, "_resumizer_configured", False):
+        return
+
+    handler = logging.StreamHandler(sys.stderr)
+    if (fmt or Config.LOG_FORMAT) == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+    root.addHandler(handler)
+    root._resumizer_configured = True
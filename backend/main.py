@@ -1,36 +1,75 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from config import Config
-from pinecone import Pinecone
-from parse import extract_text
-from graph import analyze_resume
+from logging_setup import configure_logging
+from metrics import REGISTRY, MetricsMiddleware
+from parse import get_parse_pool, ParseError
+from intake import UploadLimitMiddleware, receive_upload, read_text
 from models import ATSScoreResponse, ResumeQualityResponse
-from typing import Optional
-import traceback
+from executors import run_io
+from llm import LLMRateLimitError
+from warmup import get_warmup
+from health import get_health_monitor, LoadSheddingMiddleware, ALL_DEPENDENCIES, LOCAL_DEPENDENCIES
+from typing import Optional, List
+import importlib
+import logging
+import asyncio
 import uvicorn
+import json
 import os
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, PlainTextResponse
+from starlette.background import BackgroundTask
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Check critical env vars
-    print("🚀 Starting Resume RAG Analyzer...")
+    logger.info("Starting Resume RAG Analyzer")
     if not Config.GROQ_API_KEY:
-        print("⚠️ WARNING: GROQ_API_KEY is missing! Analysis will fail.")
+        logger.warning("GROQ_API_KEY is missing! Analysis will fail.")
     else:
-        print("✅ GROQ_API_KEY found.")
+        logger.info("GROQ_API_KEY found.")
         
     if not Config.PINECONE_API_KEY:
-        print("⚠️ WARNING: PINECONE_API_KEY is missing! RAG will fail.")
+        logger.warning("PINECONE_API_KEY is missing! RAG will fail.")
     else:
-        print("✅ PINECONE_API_KEY found.")
+        logger.info("PINECONE_API_KEY found.")
+    
+    # Start the parser processes in the background so the first upload finds them warm
+    if Config.PARSE_WORKERS > 0:
+        asyncio.create_task(get_parse_pool().warm())
+    
+    # Heavy imports and model loads happen here, after the server is already accepting connections
+    if Config.WARMUP_ON_STARTUP:
+        get_warmup().start()
+    get_health_monitor().start()
         
     yield
-    # Shutdown logic (if any)
+    
+    await get_warmup().stop()
+    await get_health_monitor().stop()
+    
+    # Shutdown: drain queued upserts and persist the embedding cache if configured
+    from rag import close_rag, save_embedding_cache
+    close_rag()
+    save_embedding_cache()
+    
+    get_parse_pool().shutdown()
+    
+    from llm import close_llm
+    await close_llm()
+    
+    import executors
+    executors.shutdown()
 
 app = FastAPI(
     title="Resume RAG Analyzer",
@@ -39,6 +78,28 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Upload bodies are capped while they stream in (413), before multipart parsing completes
+app.add_middleware(UploadLimitMiddleware, limits={
+    "/api/analyze": Config.UPLOAD_MAX_BODY_BYTES,
+    "/api/analyze/batch": Config.BATCH_MAX_BODY_BYTES,
+    "/api/extract": Config.UPLOAD_MAX_BODY_BYTES,
+    "/api/jobs": Config.UPLOAD_MAX_BODY_BYTES,
+})
+
+# Analysis routes fail fast with 503 while a dependency they use is down (HEALTH_SHED_LOAD);
+# /api/analyze checks Groq itself, since mode=fast does not call it
+app.add_middleware(LoadSheddingMiddleware, paths={
+    "/api/analyze": LOCAL_DEPENDENCIES,
+    "/api/analyze/stream": ALL_DEPENDENCIES,
+    "/api/analyze/batch": ALL_DEPENDENCIES,
+    "/api/extract": ("groq",),
+    "/api/jobs": ("embedding_model",),
+})
+
+# Per-route latency and in-flight requests for /api/metrics (outside shedding, so shed requests count too)
+app.add_middleware(MetricsMiddleware)
+
+# Registered last so it is outermost: 413s and 503s from the middleware above still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -57,59 +118,80 @@ def api_root():
         "docs": "/docs",
         "endpoints": {
             "analyze": "POST /api/analyze - Upload resume + optional JD for ATS score",
-            "health": "GET /api/health - Service health check"
+            "batch": "POST /api/analyze/batch - Many resumes against one JD (NDJSON stream)",
+            "stream": "POST /api/analyze/stream - Analysis with progress and partial results (SSE)",
+            "jobs": "POST /api/jobs - Register a JD once, then pass its jd_id to analyze/stream/batch",
+            "health": "GET /api/health - Service health check (liveness)",
+            "ready": "GET /api/ready - 200 once the model, index and LLM client are loaded, else 503",
+            "cache": "GET /api/cache/stats - Analysis and embedding cache hit/miss counters",
+            "llm": "GET /api/llm/stats - Groq call latency, token usage, retries, in-flight calls and prompt sizes",
+            "metrics": "GET /api/metrics - Prometheus metrics (per-stage latency histograms, tokens, errors, cache hits)"
         }
     }
 
 
 @app.get("/api/health")
-def health_check():
+async def health_check():
     """
-    Health check endpoint with service status
+    Liveness and dependency status, served from the background probe cache
     """
-    try:
-        pc = Pinecone(api_key=Config.PINECONE_API_KEY)
-        pinecone_status = "connected"
-    except Exception as e:
-        pinecone_status = f"error: {str(e)}"
-    
-    groq_status = "configured" if Config.GROQ_API_KEY else "missing"
-    
+    health = get_health_monitor().snapshot()
     return {
-        "status": "healthy",
-        "services": {
-            "pinecone": pinecone_status,
-            "groq": groq_status,
-            "embedding_model": Config.EMBEDDING_MODEL
-        },
+        "status": health["status"],
+        "services": health["dependencies"],
+        "checked_rounds": health["checked_rounds"],
+        "probe_interval_s": health["probe_interval_s"],
         "config": {
             "model": Config.GROQ_MODEL,
             "index": Config.PINECONE_INDEX_NAME,
+            "vector_backend": Config.VECTOR_BACKEND,
+            "embedding_model": Config.EMBEDDING_MODEL,
             "embedding_dim": Config.EMBEDDING_DIMENSION
         }
     }
 
 
+@app.get("/api/ready")
+def readiness_check():
+    """
+    Readiness probe: 503 until warmup has loaded the embedding model, vector
+    index connection and LLM client (or while shedding load, see health.py),
+    with an import/warmup time breakdown
+    """
+    warmup = get_warmup()
+    # A Groq outage alone keeps the worker in rotation for mode=fast
+    shedding = get_health_monitor().should_shed(LOCAL_DEPENDENCIES)
+    ready = warmup.ready and shedding is None
+    body = {
+        "ready": ready,
+        "shedding": shedding,
+        "main_import_s": MAIN_IMPORT_S,
+        **warmup.status()
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
 @app.post("/api/analyze")
 async def analyze_resume_endpoint(
     resume: UploadFile = File(..., description="Resume file (PDF, DOC, or DOCX)"),
     jd: Optional[UploadFile] = File(None, description="Optional Job Description file"),
-    jd_text: Optional[str] = Form(None, description="Or provide JD as text")
+    jd_text: Optional[str] = Form(None, description="Or provide JD as text"),
+    jd_id: Optional[str] = Form(None, description="Or reference a JD registered with POST /api/jobs"),
+    mode: str = Form("full", description="full = LLM analysis, fast = deterministic in-process scoring"),
+    feedback: bool = Form(False, description="mode=fast only: add LLM-written feedback text")
 ):
     try:
         if not resume.filename:
             raise HTTPException(status_code=400, detail="Resume filename is required")
         
-        allowed_extensions = ['.pdf', '.doc', '.docx']
-        resume_ext = resume.filename.lower()[resume.filename.rfind('.'):]
-        if resume_ext not in allowed_extensions:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported resume format. Allowed: {', '.join(allowed_extensions)}"
-            )
+        if mode not in ("full", "fast"):
+            raise HTTPException(status_code=400, detail="mode must be 'full' or 'fast'")
+        
+        if mode == "full" and get_health_monitor().should_shed(("groq",)):
+            return get_health_monitor().shed_response("groq")
         
-        resume_bytes = await resume.read()
-        resume_text = extract_text(resume_bytes, resume.filename)
+        # The format is sniffed from the content, not the extension (see intake.py)
+        resume_text = await read_text(resume)
         
         if not resume_text or len(resume_text.strip()) < 50:
             raise HTTPException(
@@ -117,43 +199,272 @@ async def analyze_resume_endpoint(
                 detail="Resume text extraction failed or resume is too short"
             )
         
-        print(f"📄 Resume extracted: {len(resume_text)} characters")
+        logger.info("Resume extracted: %d characters", len(resume_text))
         
         jd_content = None
-        if jd:
-            jd_bytes = await jd.read()
-            jd_content = extract_text(jd_bytes, jd.filename)
-            print(f"📋 JD extracted: {len(jd_content)} characters")
+        job = await _get_job(jd_id) if jd_id else None
+        if job:
+            logger.info("Registered JD %s: %d characters", job.jd_id, len(job.text))
+        elif jd:
+            jd_content = await read_text(jd)
+            logger.info("JD extracted: %d characters", len(jd_content))
         elif jd_text:
             jd_content = jd_text
-            print(f"📋 JD provided as text: {len(jd_content)} characters")
+            logger.info("JD provided as text: %d characters", len(jd_content))
         
-        result = await analyze_resume(
-            resume_text=resume_text,
-            jd_text=jd_content,
-            filename=resume.filename
-        )
+        graph = await _graph()
+        if mode == "fast":
+            result = await graph.analyze_resume_fast(
+                resume_text=resume_text,
+                jd_text=jd_content,
+                filename=resume.filename,
+                feedback=feedback,
+                job=job
+            )
+        else:
+            result = await graph.analyze_resume(
+                resume_text=resume_text,
+                jd_text=jd_content,
+                filename=resume.filename,
+                job=job
+            )
         
         return result
         
     except HTTPException:
         raise
+    except ParseError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except LLMRateLimitError as e:
+        raise _rate_limited(e)
     except Exception as e:
-        print(f" Error in analysis: {e}")
-        print(traceback.format_exc())
+        logger.exception("Error in analysis: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Analysis failed: {str(e)}"
         )
 
 
+async def _graph():
+    """
+    The analysis graph module, imported off the event loop
+
+    It pulls in langgraph and langchain; warmup normally imports it first,
+    otherwise the first request waits here without blocking other requests.
+    """
+    return await run_io(importlib.import_module, "graph")
+
+
+async def _get_job(jd_id):
+    from jobs import get_job_registry
+    job = await run_io(get_job_registry().get, jd_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown jd_id: {jd_id}")
+    return job
+
+
+def _rate_limited(error):
+    headers = {"Retry-After": str(int(error.retry_after + 0.999))} if error.retry_after is not None else None
+    return HTTPException(status_code=429, detail=str(error), headers=headers)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/analyze/stream")
+async def analyze_resume_stream_endpoint(
+    resume: UploadFile = File(..., description="Resume file (PDF, DOC, or DOCX)"),
+    jd: Optional[UploadFile] = File(None, description="Optional Job Description file"),
+    jd_text: Optional[str] = Form(None, description="Or provide JD as text"),
+    jd_id: Optional[str] = Form(None, description="Or reference a JD registered with POST /api/jobs")
+):
+    """
+    Server-sent events version of /api/analyze
+    
+    Events: stage (received, parsed, stored, retrieved, analyzing), field
+    (each top-level LLM field as soon as it parses), result, error.
+    """
+    if not resume.filename:
+        raise HTTPException(status_code=400, detail="Resume filename is required")
+    
+    job = await _get_job(jd_id) if jd_id else None
+    # Spool the uploads now: they are parsed inside the stream, after this handler returns
+    resume_upload = jd_upload = None
+    try:
+        resume_upload = await receive_upload(resume)
+        jd_upload = await receive_upload(jd) if jd and not job else None
+    except ParseError as e:
+        if resume_upload is not None:
+            resume_upload.close()
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    async def stream():
+        yield _sse("stage", {"stage": "received"})
+        try:
+            resume_text = await resume_upload.extract_text()
+            if not resume_text or len(resume_text.strip()) < 50:
+                raise ParseError("Resume text extraction failed or resume is too short")
+            
+            jd_content = jd_text
+            if jd_upload is not None:
+                jd_content = await jd_upload.extract_text()
+            yield _sse("stage", {"stage": "parsed"})
+            
+            graph = await _graph()
+            async for event, data in graph.analyze_resume_stream(resume_text, jd_content, resume.filename, job=job):
+                yield _sse(event, data)
+        except (ParseError, LLMRateLimitError) as e:
+            yield _sse("error", {"status_code": e.status_code, "detail": str(e)})
+        except Exception as e:
+            logger.exception("Error in streaming analysis: %s", e)
+            yield _sse("error", {"status_code": 500, "detail": f"Analysis failed: {str(e)}"})
+        finally:
+            discard_uploads()
+    
+    def discard_uploads():
+        # Also covers a client that disconnects before the stream starts
+        resume_upload.close()
+        if jd_upload is not None:
+            jd_upload.close()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(discard_uploads)
+    )
+
+
+@app.post("/api/analyze/batch")
+async def analyze_batch_endpoint(
+    resumes: List[UploadFile] = File(..., description="Resume files (PDF or DOCX)"),
+    jd: Optional[UploadFile] = File(None, description="Optional Job Description file"),
+    jd_text: Optional[str] = Form(None, description="Or provide JD as text"),
+    jd_id: Optional[str] = Form(None, description="Or reference a JD registered with POST /api/jobs"),
+    concurrency: Optional[int] = Form(None, description="Max parallel LLM calls")
+):
+    """
+    Screen many resumes against one JD
+    
+    Streams one JSON object per line (application/x-ndjson) as each resume
+    finishes, followed by a final ranked summary.
+    """
+    if len(resumes) > Config.BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many resumes. Maximum per batch: {Config.BATCH_MAX_FILES}"
+        )
+    
+    # The JD is parsed once for the whole batch (or not at all when registered)
+    jd_content = None
+    job = await _get_job(jd_id) if jd_id else None
+    try:
+        if jd and not job:
+            jd_content = await read_text(jd)
+        elif jd_text and not job:
+            jd_content = jd_text
+    except ParseError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"JD extraction failed: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"JD extraction failed: {str(e)}")
+    
+    async def parse_one(index, resume):
+        resume_text = await read_text(resume)
+        if not resume_text or len(resume_text.strip()) < 50:
+            raise ValueError("Resume text extraction failed or resume is too short")
+        return {"index": index, "filename": resume.filename, "resume_text": resume_text}
+    
+    # Parse all uploads concurrently on the CPU pool
+    outcomes = await asyncio.gather(
+        *[parse_one(index, resume) for index, resume in enumerate(resumes)],
+        return_exceptions=True
+    )
+    parsed = []
+    rejected = []
+    for index, (resume, outcome) in enumerate(zip(resumes, outcomes)):
+        if isinstance(outcome, Exception):
+            rejected.append({"type": "error", "index": index, "filename": resume.filename, "error": str(outcome)})
+        else:
+            parsed.append(outcome)
+    
+    logger.info("Batch: %d resumes parsed, %d rejected", len(parsed), len(rejected))
+    limit = min(concurrency or Config.BATCH_CONCURRENCY, Config.BATCH_CONCURRENCY)
+    
+    async def stream():
+        for event in rejected:
+            yield json.dumps(event) + "\n"
+        
+        try:
+            graph = await _graph()
+            async for event in graph.analyze_resume_batch(parsed, jd_content, limit, job=job):
+                if event["type"] == "summary":
+                    event["total"] += len(rejected)
+                    event["failed"] += len(rejected)
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            logger.exception("Error in batch analysis: %s", e)
+            yield json.dumps({"type": "error", "error": f"Batch analysis failed: {str(e)}"}) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/jobs")
+async def register_job_endpoint(
+    jd: Optional[UploadFile] = File(None, description="Job Description file"),
+    jd_text: Optional[str] = Form(None, description="Or provide JD as text"),
+    title: Optional[str] = Form(None, description="Optional display title")
+):
+    """
+    Register a job description for reuse across a hiring cycle
+    
+    Extracts requirements and embeds the JD once; pass the returned jd_id to
+    /api/analyze, /api/analyze/stream or /api/analyze/batch instead of the text.
+    """
+    try:
+        if jd:
+            jd_content = await read_text(jd)
+        elif jd_text:
+            jd_content = jd_text
+        else:
+            raise HTTPException(status_code=400, detail="Provide a JD file or jd_text")
+        
+        if len(jd_content.strip()) < 20:
+            raise HTTPException(status_code=400, detail="Job description is too short")
+        
+        from jobs import get_job_registry
+        from executors import run_model
+        job, created = await run_model(get_job_registry().register, jd_content, title)
+        logger.info("JD %s: %s", "registered" if created else "already registered", job.jd_id)
+        
+        return {
+            "jd_id": job.jd_id,
+            "created": created,
+            "title": job.title,
+            "requirements": job.requirements,
+            "text_length": len(job.text)
+        }
+    except HTTPException:
+        raise
+    except ParseError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"JD extraction failed: {str(e)}")
+    except Exception as e:
+        logger.exception("Error registering JD: %s", e)
+        raise HTTPException(status_code=500, detail=f"JD registration failed: {str(e)}")
+
+
+@app.get("/api/jobs/{jd_id}")
+async def get_job_endpoint(jd_id: str):
+    """Registered JD with its extracted requirements"""
+    return await _get_job(jd_id)
+
+
 @app.post("/api/extract")
 async def extract_resume_info_endpoint(
     resume: UploadFile = File(..., description="Resume file to extract information from")
 ):
     try:
-        resume_bytes = await resume.read()
-        resume_text = extract_text(resume_bytes, resume.filename)
+        resume_text = await read_text(resume)
         
         if not resume_text or len(resume_text.strip()) < 50:
             raise HTTPException(
@@ -162,7 +473,7 @@ async def extract_resume_info_endpoint(
             )
         
         from extract import extract_resume_info
-        info = extract_resume_info(resume_text)
+        info = await run_io(extract_resume_info, resume_text)
         
         return {
             "filename": resume.filename,
@@ -171,8 +482,14 @@ async def extract_resume_info_endpoint(
             "preview": resume_text[:500] + "..." if len(resume_text) > 500 else resume_text
         }
         
+    except HTTPException:
+        raise
+    except ParseError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except LLMRateLimitError as e:
+        raise _rate_limited(e)
     except Exception as e:
-        print(f"❌ Error in extraction: {e}")
+        logger.exception("Error in extraction: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Extraction failed: {str(e)}"
@@ -182,16 +499,40 @@ async def extract_resume_info_endpoint(
 @app.get("/api/stats")
 def get_pinecone_stats():
     try:
-        from rag import get_pinecone_rag
-        rag = get_pinecone_rag()
+        from rag import get_rag
+        rag = get_rag()
         stats = rag.get_stats()
         return {
             "index_name": Config.PINECONE_INDEX_NAME,
+            "backend": Config.VECTOR_BACKEND,
             "stats": stats
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """Analysis result and embedding cache hit/miss counters, and embedding micro-batch stats"""
+    from cache import get_cache
+    from rag import _embeddings
+    return {
+        "analysis": get_cache().stats(),
+        "embeddings": _embeddings.cache.stats() if _embeddings is not None else None,
+        "embedding_batches": _embeddings.batcher.stats() if _embeddings is not None and _embeddings.batcher else None
+    }
+
+@app.get("/api/llm/stats")
+def get_llm_stats():
+    """Per-client Groq call counts, latency, token usage and retries"""
+    from llm import get_llm_manager
+    from prompt import prompt_stats
+    return {**get_llm_manager().stats(), "prompts": prompt_stats()}
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of the pipeline metrics (see metrics.py)"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # -------------------------------------------
 # SERVE FRONTEND (Production Mode)
 # -------------------------------------------
@@ -218,6 +559,8 @@ if os.path.exists(frontend_dist):
         # Otherwise return index.html for React Router to handle
         return FileResponse(os.path.join(frontend_dist, "index.html"))
 
+MAIN_IMPORT_S = round(time.perf_counter() - _IMPORT_START, 3)
+
 if __name__ == "__main__":
     
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
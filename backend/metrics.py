@@ -0,0 +1,319 @@
+"""
+In-process metrics served at /api/metrics in the Prometheus text format
+
+A small dependency-free registry: counters, gauges and histograms with
+labels, each updated under its own lock (a dict lookup and a few additions
+per observation). Values that other components already count (cache
+hit/miss counters, LLM in-flight calls) are read at scrape time through
+collectors instead of being counted twice.
+
+    with NODE_SECONDS.time(node="store_resume"):
+        ...
+    LLM_TOKENS.inc(120, model=model, type="input")
+"""
+
+from starlette.routing import Match
+from bisect import bisect_left
+from config import Config
+import functools
+import threading
+import inspect
+import time
+import math
+
+
+# Latency buckets in seconds: 1 ms .. 60 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts (last slot = +Inf), sum, count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self):
+        """{label values: (sum, count)}, e.g. to diff the time spent per stage across a run"""
+        with self._lock:
+            return {key: (total, count) for key, (_, total, count) in self._values.items()}
+
+    def time(self, **labels):
+        """Context manager / decorator observing the elapsed seconds"""
+        return _Timer(self, labels)
+
+    def render(self):
+        with self._lock:
+            items = [(k, list(counts), total, count) for k, (counts, total, count) in self._values.items()]
+        lines = self.header()
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class _Timer:
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+    def __call__(self, fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with _Timer(self.histogram, self.labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Timer(self.histogram, self.labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn):
+        """fn() -> iterable of (name, kind, documentation, {labels}, value), called at scrape time"""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+
+        seen = set()
+        for collect in collectors:
+            try:
+                samples = list(collect())
+            except Exception:
+                continue  # a broken collector must not break the scrape
+            for name, kind, documentation, labels, value in samples:
+                if name not in seen:
+                    seen.add(name)
+                    lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+PREFIX = Config.METRICS_PREFIX
+
+
+def counter(name, documentation, labels=()):
+    return REGISTRY.register(Counter(f"{PREFIX}_{name}", documentation, labels))
+
+
+def gauge(name, documentation, labels=()):
+    return REGISTRY.register(Gauge(f"{PREFIX}_{name}", documentation, labels))
+
+
+def histogram(name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(f"{PREFIX}_{name}", documentation, labels, buckets))
+
+
+# ---------------------------------------------------------------------------
+# Pipeline metrics
+# ---------------------------------------------------------------------------
+
+HTTP_SECONDS = histogram("http_request_duration_seconds", "HTTP request latency (streams: until the last byte)",
+                         ["method", "route", "status"])
+HTTP_IN_FLIGHT = gauge("http_requests_in_flight", "HTTP requests being served", ["route"])
+
+NODE_SECONDS = histogram("graph_node_duration_seconds", "LangGraph node latency", ["node"])
+PARSE_SECONDS = histogram("parse_duration_seconds", "Document parsing latency", ["format", "outcome"])
+EMBED_SECONDS = histogram("embedding_batch_duration_seconds", "Embedding model forward pass latency", ["batch_size"])
+EMBED_BATCH_TEXTS = histogram("embedding_batch_texts", "Texts per micro-batched forward pass",
+                              buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+EMBED_QUEUE_SECONDS = histogram("embedding_queue_wait_seconds", "Time an embed call waited for its micro-batch",
+                                buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 1.0))
+VECTOR_SECONDS = histogram("vector_store_duration_seconds", "Vector store call latency", ["backend", "op"])
+LLM_SECONDS = histogram("llm_request_duration_seconds", "Groq call latency (per attempt)", ["model", "outcome"])
+LLM_TOKENS = counter("llm_tokens_total", "Groq tokens used", ["model", "type"])
+UPSERT_FLUSH_SECONDS = histogram("upsert_flush_duration_seconds", "Write-behind upsert batch latency (per attempt)",
+                                 ["outcome"])
+UPSERT_SPILLED = counter("upsert_spilled_vectors_total", "Vectors the write-behind queue spilled to disk")
+ERRORS = counter("errors_total", "Errors by pipeline stage", ["stage"])
+
+
+def batch_size_label(n):
+    """Bucket batch sizes into a handful of label values"""
+    for bound in (1, 8, 32, 128):
+        if n <= bound:
+            return str(bound) if bound == 1 else f"le{bound}"
+    return "gt128"
+
+
+def _cache_samples():
+    from cache import get_cache
+    import rag
+
+    doc = "Cache lookups by result"
+    cache = get_cache()
+    yield f"{PREFIX}_cache_requests_total", "counter", doc, {"cache": "analysis", "result": "hit"}, cache.hits
+    yield f"{PREFIX}_cache_requests_total", "counter", doc, {"cache": "analysis", "result": "miss"}, cache.misses
+    if rag._embeddings is not None:
+        cache = rag._embeddings.cache
+        yield f"{PREFIX}_cache_requests_total", "counter", doc, {"cache": "embeddings", "result": "hit"}, cache.hits
+        yield f"{PREFIX}_cache_requests_total", "counter", doc, {"cache": "embeddings", "result": "miss"}, cache.misses
+
+
+def _llm_samples():
+    import llm
+
+    if llm._manager is not None:
+        yield f"{PREFIX}_llm_requests_in_flight", "gauge", "Groq calls holding a concurrency slot", {}, llm._manager.limiter.in_flight
+
+
+def _upsert_samples():
+    import rag
+
+    if rag._rag is not None and rag._rag.upsert_queue is not None:
+        yield f"{PREFIX}_upsert_queue_depth", "gauge", "Vectors waiting in the write-behind queue", {}, rag._rag.upsert_queue.depth()
+
+
+REGISTRY.add_collector(_cache_samples)
+REGISTRY.add_collector(_llm_samples)
+REGISTRY.add_collector(_upsert_samples)
+
+
+def route_template(scope):
+    """Path template of the route that will serve scope (e.g. /api/jobs/{jd_id}), or "unmatched" """
+    app = scope.get("app")
+    partial = None
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None) or "unmatched"
+        if match == Match.PARTIAL and partial is None:
+            partial = route  # e.g. wrong method: Starlette answers 405 from this route
+    return getattr(partial, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP latency and in-flight requests per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        # Matched up front (routing only happens further in), so raw paths never become label values
+        route = route_template(scope)
+        HTTP_IN_FLIGHT.inc(route=route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(route=route)
+            HTTP_SECONDS.observe(time.perf_counter() - start, method=scope["method"], route=route, status=status["code"])
@@ -37,6 +37,17 @@ class JDRequirements(BaseModel):
     responsibilities: List[str] = Field(default_factory=list)
 
 
+class JobDescription(BaseModel):
+    """Registered job description (POST /api/jobs), referenced by jd_id"""
+    jd_id: str
+    title: Optional[str] = None
+    text: str
+    requirements: JDRequirements
+    created_at: datetime = Field(default_factory=datetime.now)
+    # Query embedding used to rank resume chunks; not returned by the API
+    embedding: List[float] = Field(default_factory=list, exclude=True)
+
+
 class ScoreBreakdown(BaseModel):
     """Detailed scoring breakdown"""
     skills_score: float = Field(..., ge=0, le=40, description="Skills match score (max 40)")
@@ -1,23 +1,267 @@
 from pypdf import PdfReader
 from docx import Document
 from io import BytesIO
+from metrics import PARSE_SECONDS, ERRORS
+from config import Config
+import multiprocessing
+import asyncio
+import logging
+import time
+import os
 
-def parse_pdf(file_bytes: bytes) -> str:
-    text = ""
-    reader = PdfReader(BytesIO(file_bytes))
+
+logger = logging.getLogger(__name__)
+
+
+class ParseError(ValueError):
+    """Document could not be parsed (maps to an HTTP error code)"""
+    status_code = 400
+
+
+class DocumentTooLargeError(ParseError):
+    status_code = 413
+
+
+class ParseTimeoutError(ParseError):
+    status_code = 422
+
+
+_ERROR_TYPES = {cls.__name__: cls for cls in (ParseError, DocumentTooLargeError, ParseTimeoutError)}
+
+
+def _open(source):
+    """Parsers take a path (spooled upload) or bytes"""
+    return BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def source_size(source) -> int:
+    return len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+
+
+def parse_pdf(source) -> str:
+    reader = PdfReader(_open(source))
+    if len(reader.pages) > Config.PARSE_MAX_PAGES:
+        raise DocumentTooLargeError(
+            f"PDF has {len(reader.pages)} pages (max {Config.PARSE_MAX_PAGES})"
+        )
+    pages = []
     for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+        pages.append(page.extract_text() or "")
+    return "\n".join(pages) + "\n"
 
-def parse_docx(file_bytes: bytes) -> str:
-    doc = Document(BytesIO(file_bytes))
+def parse_docx(source) -> str:
+    doc = Document(_open(source))
     return "\n".join([para.text for para in doc.paragraphs])
 
-def extract_text(file_bytes: bytes, filename: str) -> str:
-    name = filename.lower()
-    if name.endswith(".pdf"):
-        return parse_pdf(file_bytes)
-    elif name.endswith(".docx"):
-        return parse_docx(file_bytes)
+def extract_text(source, filename: str, kind: str = None) -> str:
+    """
+    Text of a PDF or DOCX given as bytes or a file path
+
+    kind ("pdf" / "docx", sniffed from the content by intake.py) wins over
+    the filename extension.
+    """
+    size = source_size(source)
+    if size > Config.PARSE_MAX_BYTES:
+        raise DocumentTooLargeError(
+            f"File is {size} bytes (max {Config.PARSE_MAX_BYTES})"
+        )
+    kind = kind or os.path.splitext(filename.lower())[1].lstrip(".")
+    if kind == "pdf":
+        return parse_pdf(source)
+    elif kind == "docx":
+        return parse_docx(source)
     else:
-        raise ValueError("Unsupported file format. Use PDF or DOCX.")
+        raise ParseError("Unsupported file format. Use PDF or DOCX.")
+
+
+def _worker_main(conn, memory_limit_mb):
+    """Parser worker loop: receive (bytes or path, filename, kind), send back ("ok", text) or ("error", type, message)"""
+    if memory_limit_mb:
+        try:
+            import resource
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass  # Not supported on this platform
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+
+        source, filename, kind = job
+        try:
+            conn.send(("ok", extract_text(source, filename, kind)))
+        except ParseError as e:
+            conn.send(("error", type(e).__name__, str(e)))
+        except MemoryError:
+            conn.send(("error", "DocumentTooLargeError", "Document exceeded the parser memory limit"))
+        except Exception as e:
+            conn.send(("error", "ParseError", f"Could not parse document: {e}"))
+
+
+class _Worker:
+
+    def __init__(self, ctx, memory_limit_mb):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def kill(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+
+
+class ParsePool:
+    """
+    Warm pool of parser processes
+
+    Each worker handles one document at a time. A worker that exceeds the
+    wall-clock timeout or dies (e.g. hits the memory limit) is killed and
+    replaced; workers are also recycled after max_tasks documents.
+    """
+
+    def __init__(self, workers=None, timeout=None, memory_limit_mb=None, max_tasks=None):
+        self.size = workers if workers is not None else Config.PARSE_WORKERS
+        self.timeout = timeout or Config.PARSE_TIMEOUT_SECONDS
+        self.memory_limit_mb = memory_limit_mb if memory_limit_mb is not None else Config.PARSE_MEMORY_LIMIT_MB
+        self.max_tasks = max_tasks or Config.PARSE_MAX_TASKS_PER_WORKER
+        # spawn: never fork a parent that already holds torch/thread state
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle = None
+        self._start_lock = asyncio.Lock()
+        self._workers = []
+        self._recycling = set()
+
+    def start(self):
+        """Spawn the workers (blocking; call from a thread at startup)"""
+        while len(self._workers) < self.size:
+            self._workers.append(_Worker(self._ctx, self.memory_limit_mb))
+
+    async def warm(self):
+        """Start the workers without blocking the event loop"""
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            await asyncio.get_running_loop().run_in_executor(None, self.start)
+            idle = asyncio.Queue()
+            for worker in self._workers:
+                idle.put_nowait(worker)
+            self._idle = idle
+
+    async def parse(self, source, filename: str, kind: str = None) -> str:
+        loop = asyncio.get_running_loop()
+        if self._idle is None:
+            await self.warm()
+
+        worker = await self._idle.get()
+        poll = None
+        received = False
+        try:
+            # A spooled upload crosses the pipe as its path, not its bytes
+            worker.conn.send((source, filename, kind))
+            poll = loop.run_in_executor(None, worker.conn.poll, self.timeout)
+            # Shielded: if this task is cancelled the poll thread runs on, and _recycle waits for it
+            ready = await asyncio.shield(poll)
+            if not ready:
+                raise ParseTimeoutError(f"Parsing took longer than {self.timeout}s")
+            try:
+                message = worker.conn.recv()
+            except EOFError:
+                raise ParseError("Parser worker crashed while reading the document")
+            received = True
+        except (BrokenPipeError, OSError) as e:
+            raise ParseError(f"Parser worker unavailable: {e}")
+        finally:
+            # Any exit before recv() (timeout, crash, cancellation) may leave this
+            # document's reply in the pipe for the next caller: never reuse the worker
+            worker.tasks += 1
+            if not received or worker.tasks >= self.max_tasks:
+                self._recycle(worker, poll)
+            else:
+                self._idle.put_nowait(worker)
+
+        if message[0] == "ok":
+            return message[1]
+        raise _ERROR_TYPES.get(message[1], ParseError)(message[2])
+
+    def _recycle(self, worker, poll=None):
+        """Replace worker off the caller's path; the fresh one joins the idle queue when ready"""
+        async def recycle():
+            loop = asyncio.get_running_loop()
+            try:
+                if poll is not None and not poll.done():
+                    # Its exit wakes the poll thread; closing the pipe first could let
+                    # that thread poll a reused fd (another worker's pipe) instead
+                    worker.process.kill()
+                    await asyncio.wait([poll])
+                fresh = await loop.run_in_executor(None, self._replace, worker)
+            except Exception as e:
+                logger.error("Could not restart parser worker: %s", e)
+                fresh = worker  # keep the pool size; the next parse fails on the pipe and retries this
+            if self._idle is not None:
+                self._idle.put_nowait(fresh)
+
+        task = asyncio.get_running_loop().create_task(recycle())
+        self._recycling.add(task)
+        task.add_done_callback(self._recycling.discard)
+
+    def _replace(self, worker):
+        worker.kill()
+        fresh = _Worker(self._ctx, self.memory_limit_mb)
+        self._workers = [fresh if w is worker else w for w in self._workers]
+        return fresh
+
+    def shutdown(self):
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.kill()
+        self._workers = []
+        self._idle = None
+
+
+_pool = None
+
+def get_parse_pool():
+    global _pool
+    if _pool is None:
+        _pool = ParsePool()
+    return _pool
+
+
+async def extract_text_async(source, filename: str, kind: str = None) -> str:
+    """extract_text in the parser process pool (or the CPU thread pool if PARSE_WORKERS=0)"""
+    # Reject oversized documents before handing them to a worker
+    size = source_size(source)
+    if size > Config.PARSE_MAX_BYTES:
+        raise DocumentTooLargeError(
+            f"File is {size} bytes (max {Config.PARSE_MAX_BYTES})"
+        )
+    ext = kind or os.path.splitext(filename.lower())[1].lstrip(".") or "none"
+    outcome = "ok"
+    start = time.perf_counter()
+    try:
+        if Config.PARSE_WORKERS <= 0:
+            from executors import run_cpu
+            return await run_cpu(extract_text, source, filename, kind)
+        return await get_parse_pool().parse(source, filename, kind)
+    except Exception as e:
+        outcome = type(e).__name__
+        ERRORS.inc(stage="parse")
+        raise
+    finally:
+        PARSE_SECONDS.observe(time.perf_counter() - start,
+                              format=ext if ext in ("pdf", "docx", "doc") else "other", outcome=outcome)
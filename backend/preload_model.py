@@ -5,3 +5,9 @@ print("Downloading embedding model...")
 # This will download and cache the model in the default torch cache directory
 model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
 print("Model downloaded successfully!")
+
+# Precompute the skill embedding matrix so startup only loads a small .npy file
+from logging_setup import configure_logging
+from skill_vectors import build_skill_vectors
+configure_logging()
+build_skill_vectors()
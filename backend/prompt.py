@@ -0,0 +1,296 @@
+from typing import NamedTuple, Optional
+from sections import split_sections, is_bullet
+from skills import load_taxonomy
+from config import Config
+import unicodedata
+import threading
+import re
+
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text):
+    """Approximate LLM token count: one per word or symbol, long words count extra"""
+    return sum(1 + len(t) // 6 for t in _TOKEN_RE.findall(text or ""))
+
+
+# ---------------------------------------------------------------------------
+# Cleaning
+# ---------------------------------------------------------------------------
+
+_ZERO_WIDTH_RE = re.compile("[\u00ad\u200b-\u200f\u2060\ufeff]")
+_CID_RE = re.compile(r"\(cid:\d+\)")  # unmapped glyphs from pypdf
+_HYPHEN_BREAK_RE = re.compile(r"([\w-]*[a-z])-\n([a-z]\w*)")
+# Compounds that keep their hyphen when split across lines ("full-\nstack" is "full-stack", not
+# "fullstack"): hyphenated taxonomy terms, longer compounds ("end-to-\nend") and anything
+# starting or ending with these words
+_HYPHEN_PREFIXES = {"self", "cross", "well", "high", "low", "full", "part", "hands", "open", "real", "end",
+                    "long", "short", "fast", "front", "back", "multi", "on", "in", "e"}
+_HYPHEN_SUFFIXES = {"driven", "oriented", "based", "facing", "level", "time", "term", "scale", "friendly",
+                    "aware", "focused", "paced", "owned", "led", "related", "specific", "wide"}
+_hyphenated_terms = None
+_PAGE_NUMBER_RE = re.compile(
+    r"^(?:page\s*\d+(?:\s*(?:of|/)\s*\d+)?|-?\s*\d{1,3}\s*-?|\d{1,3}\s*/\s*\d{1,3})$", re.IGNORECASE
+)
+# Lines that repeat on every page are headers/footers if they look like contact details or page furniture
+_FURNITURE_RE = re.compile(
+    r"@|https?://|www\.|linkedin|github\.com|page\s*\d|confidential|curriculum vitae|\bresume\b|\bcv\b",
+    re.IGNORECASE
+)
+
+
+def _known_hyphenated():
+    global _hyphenated_terms
+    if _hyphenated_terms is None:
+        terms = set()
+        try:
+            for entry in load_taxonomy():
+                for name in [entry["skill"]] + entry.get("aliases", []) + entry.get("exact_aliases", []):
+                    if "-" in name:
+                        terms.add(name.lower())
+        except (OSError, ValueError):
+            pass
+        _hyphenated_terms = terms
+    return _hyphenated_terms
+
+
+def _join_hyphen_break(match):
+    left, right = match.group(1), match.group(2)
+    first, second = left.lower().rsplit("-", 1)[-1], right.lower()
+    if "-" in left or first in _HYPHEN_PREFIXES or second in _HYPHEN_SUFFIXES \
+            or f"{left}-{right}".lower() in _known_hyphenated():
+        return f"{left}-{right}"
+    return left + right
+
+
+def _drop_repeated_lines(lines):
+    counts = {}
+    for line in lines:
+        if line:
+            counts[line.lower()] = counts.get(line.lower(), 0) + 1
+
+    first_line = next((l.lower() for l in lines if l), None)
+    seen = set()
+    kept = []
+    for line in lines:
+        key = line.lower()
+        repeated = line and counts[key] > 1 and len(line) <= 100 and not is_bullet(line)
+        if repeated and (key == first_line or _FURNITURE_RE.search(line)):
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return kept
+
+
+def clean_text(text):
+    """
+    Normalize whitespace and strip PDF extraction artifacts
+
+    NFKC folds ligatures and odd spaces, soft hyphens and zero-width
+    characters are removed, words hyphenated across a line break are joined
+    (known compounds keep their hyphen), page numbers are dropped and headers/footers repeated on every page are
+    kept only once.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _ZERO_WIDTH_RE.sub("", text)
+    text = _CID_RE.sub(" ", text)
+    text = _HYPHEN_BREAK_RE.sub(_join_hyphen_break, text)
+
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"[ \t\f\v]+", " ", line).strip()
+        if line and _PAGE_NUMBER_RE.match(line):
+            continue
+        lines.append(line)
+
+    text = "\n".join(_drop_repeated_lines(lines))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _squash(text):
+    return re.sub(r"[^a-z0-9]+", "", text.lower())
+
+
+def dedupe_context(rag_context, included_text):
+    """Drop RAG snippets already present in the prompt (and repeats of each other)"""
+    haystack = _squash(included_text or "")
+    kept, seen = [], set()
+    for line in (rag_context or "").splitlines():
+        key = _squash(line.lstrip("-• "))
+        if not key or key in seen or key in haystack:
+            continue
+        seen.add(key)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+# ---------------------------------------------------------------------------
+# Budgeting
+# ---------------------------------------------------------------------------
+
+# Resume sections in the order they are kept when the prompt is over budget: short,
+# high-signal sections first so the long experience section is the one that gets trimmed
+SECTION_PRIORITY = ["header", "skills", "education", "summary", "experience", "certifications",
+                    "projects", "achievements", "publications"]
+
+_JD_LOW_PRIORITY_RE = re.compile(
+    r"benefit|perk|about (?:us|the company|the team)|who we are|equal opportunit|eeo|salary|compensation|how to apply",
+    re.IGNORECASE
+)
+
+
+def _take_lines(lines, budget):
+    kept = []
+    for line in lines:
+        cost = count_tokens(line)
+        if cost > budget:
+            break
+        kept.append(line)
+        budget -= cost
+    return kept, budget
+
+
+def _truncate(text, budget):
+    """The longest prefix of text made of whole tokens that fits budget"""
+    end = 0
+    for match in _TOKEN_RE.finditer(text):
+        budget -= 1 + len(match.group()) // 6
+        if budget < 0:
+            break
+        end = match.end()
+    return text[:end]
+
+
+def fit_resume(text, budget):
+    """Keep whole resume sections by priority, trimming the last one line by line, in document order"""
+    if count_tokens(text) <= budget:
+        return text
+
+    total = budget
+    sections = split_sections(text)
+    rank = {name: i for i, name in enumerate(SECTION_PRIORITY)}
+    order = sorted(range(len(sections)), key=lambda i: (rank.get(sections[i][0], len(rank)), i))
+
+    chosen = {}
+    for i in order:
+        name, lines = sections[i]
+        if name != "header":
+            lines = [name.upper()] + lines
+        kept, budget = _take_lines(lines, budget)
+        if len(kept) > (0 if name == "header" else 1):
+            chosen[i] = kept
+        if budget <= 0:
+            break
+
+    if not chosen and sections:
+        # Not one section fits (e.g. a huge first line): a cut-off first section beats an empty resume
+        name, lines = sections[0]
+        if name != "header":
+            lines = [name.upper()] + lines
+        return _truncate("\n".join(lines), total)
+    return "\n".join("\n".join(chosen[i]) for i in sorted(chosen))
+
+
+def fit_jd(text, budget):
+    """Keep the JD in order, dropping benefits/about-us style blocks first when over budget"""
+    if count_tokens(text) <= budget:
+        return text
+
+    # Split into blocks at heading lines ("Requirements:", "Benefits:")
+    blocks = [[]]
+    for line in text.splitlines():
+        if len(line) <= 60 and line.endswith(":") and blocks[-1]:
+            blocks.append([])
+        blocks[-1].append(line)
+
+    low = [i for i, block in enumerate(blocks) if block and _JD_LOW_PRIORITY_RE.search(block[0])]
+    order = [i for i in range(len(blocks)) if i not in low] + low
+
+    chosen = {}
+    for i in order:
+        kept, budget = _take_lines(blocks[i], budget)
+        if kept:
+            chosen[i] = kept
+        if budget <= 0:
+            break
+    return "\n".join("\n".join(chosen[i]) for i in sorted(chosen))
+
+
+class PromptInputs(NamedTuple):
+    resume_text: str
+    jd_text: Optional[str]
+    rag_context: str
+    report: dict
+
+
+def prepare_prompt_inputs(resume_text, jd_text=None, rag_context="", budget=None):
+    """
+    Clean and budget the variable parts of the analysis prompt
+
+    The budget (PROMPT_TOKEN_BUDGET, 0 = unlimited) covers resume, JD and RAG
+    context; the fixed instructions and JSON template come on top. The JD gets
+    at most PROMPT_JD_SHARE of it, the resume the rest, and when the resume
+    has to be trimmed up to a fifth of its share is kept for RAG snippets,
+    which are the resume passages most relevant to the JD.
+    """
+    budget = Config.PROMPT_TOKEN_BUDGET if budget is None else budget
+    original_tokens = count_tokens(resume_text) + count_tokens(jd_text) + count_tokens(rag_context)
+
+    resume = clean_text(resume_text)
+    jd = clean_text(jd_text) if jd_text else jd_text
+    trimmed = False
+
+    if budget > 0:
+        if jd:
+            fitted = fit_jd(jd, int(budget * Config.PROMPT_JD_SHARE))
+            trimmed = fitted != jd
+            jd = fitted
+        resume_budget = budget - count_tokens(jd)
+        if count_tokens(resume) > resume_budget:
+            reserve = min(count_tokens(rag_context), resume_budget // 5)
+            resume = fit_resume(resume, resume_budget - reserve)
+            trimmed = True
+
+    context = dedupe_context(rag_context, resume)
+    if budget > 0 and context:
+        remaining = budget - count_tokens(resume) - count_tokens(jd)
+        context = "\n".join(_take_lines(context.splitlines(), remaining)[0])
+
+    resume_tokens, jd_tokens, context_tokens = count_tokens(resume), count_tokens(jd), count_tokens(context)
+    report = {
+        "budget": budget,
+        "original_tokens": original_tokens,
+        "input_tokens": resume_tokens + jd_tokens + context_tokens,
+        "resume_tokens": resume_tokens,
+        "jd_tokens": jd_tokens,
+        "context_tokens": context_tokens,
+        "trimmed": trimmed
+    }
+    return PromptInputs(resume, jd, context, report)
+
+
+# ---------------------------------------------------------------------------
+# Per-request accounting
+# ---------------------------------------------------------------------------
+
+_stats_lock = threading.Lock()
+_stats = {"prompts": 0, "trimmed": 0, "original_tokens": 0, "prompt_tokens": 0, "max_prompt_tokens": 0}
+
+
+def record_prompt(report):
+    with _stats_lock:
+        _stats["prompts"] += 1
+        _stats["trimmed"] += int(report.get("trimmed", False))
+        _stats["original_tokens"] += report["original_tokens"]
+        _stats["prompt_tokens"] += report["prompt_tokens"]
+        _stats["max_prompt_tokens"] = max(_stats["max_prompt_tokens"], report["prompt_tokens"])
+
+
+def prompt_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    prompts = stats["prompts"]
+    stats["avg_prompt_tokens"] = round(stats["prompt_tokens"] / prompts, 1) if prompts else 0.0
+    stats["avg_original_tokens"] = round(stats["original_tokens"] / prompts, 1) if prompts else 0.0
+    return stats
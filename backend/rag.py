@@ -1,127 +1,380 @@
-
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone, ServerlessSpec
+from embedding_backends import create_embedding_backend
+from embedding_batcher import EmbeddingBatcher
+from chunking import chunk_resume
+from vector_store import create_vector_store
+from embedding_cache import EmbeddingCache
+from upsert_queue import UpsertQueue
+from metrics import EMBED_SECONDS, batch_size_label
+from executors import run_model, run_io
 from config import Config
-import time
-import os
+import numpy as np
+import threading
+import asyncio
+import hashlib
+import logging
+import re
+
+
+logger = logging.getLogger(__name__)
 
 
 class SimpleEmbeddings:
     
-    def __init__(self):
-        print("⚡ Loading embedding model (cached from Docker build)...")
-        self.model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-        print("✅ Model ready!")
+    def __init__(self, backend=None):
+        logger.info("Loading embedding model (%s backend)", backend or Config.EMBEDDING_BACKEND)
+        # torch SentenceTransformer or ONNX Runtime, see embedding_backends.py
+        self.backend = create_embedding_backend(backend)
+        # Concurrent calls share forward passes; a remote backend is batched by the embedding server
+        use_batcher = Config.EMBEDDING_MICROBATCH and self.backend.name != "remote"
+        self.batcher = EmbeddingBatcher(self.backend) if use_batcher else None
+        self.cache = EmbeddingCache(namespace=self.backend.model_id)
+        logger.info("Embedding model ready (%s)", self.backend.name)
     
     def embed(self, text):
         """Create embedding for text"""
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        cached = self.cache.get(text)
+        if cached is not None:
+            return cached.tolist()
+        
+        embedding = self._encode([text])[0]
+        self.cache.put(text, embedding)
         return embedding.tolist()
     
     def embed_batch(self, texts):
-        """Create embeddings for multiple texts"""
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        """Create embeddings for multiple texts (only cache misses are encoded)"""
+        results = self.cache.get_many(texts)
+        
+        missing = list(dict.fromkeys(t for t, r in zip(texts, results) if r is None))
+        if missing:
+            encoded = self._encode(missing)
+            self.cache.put_many(missing, encoded)
+            by_text = dict(zip(missing, encoded))
+            results = [r if r is not None else by_text[t] for t, r in zip(texts, results)]
+        
+        return [r.tolist() for r in results]
+    
+    async def aembed(self, text):
+        """embed() for the event loop"""
+        return (await self.aembed_batch([text]))[0]
+    
+    async def aembed_batch(self, texts):
+        """
+        embed_batch() for the event loop: with micro-batching the caller awaits
+        its batch's future instead of holding a model pool thread while it fills
+        """
+        results = self.cache.get_many(texts)
+        
+        missing = list(dict.fromkeys(t for t, r in zip(texts, results) if r is None))
+        if missing:
+            if self.batcher is not None:
+                future = asyncio.wrap_future(self.batcher.submit(missing))
+                encoded = await asyncio.wait_for(future, self.batcher.timeout)
+            else:
+                encoded = await run_model(self._encode, missing)
+            self.cache.put_many(missing, encoded)
+            by_text = dict(zip(missing, encoded))
+            results = [r if r is not None else by_text[t] for t, r in zip(texts, results)]
+        
+        return [r.tolist() for r in results]
+    
+    def _encode(self, texts):
+        if self.batcher is not None:
+            return self.batcher.encode(texts)  # times the merged forward passes itself
+        with EMBED_SECONDS.time(batch_size=batch_size_label(len(texts))):
+            return self.backend.encode(texts)
+    
+    def cached_batch(self, texts):
+        """Embeddings for texts if every one is cached, else None"""
+        results = self.cache.get_many(texts)
+        if any(r is None for r in results):
+            return None
+        return [r.tolist() for r in results]
+
+
+def make_resume_id(resume_text):
+    """Deterministic resume ID derived from the full (whitespace-normalized) text"""
+    normalized = re.sub(r"\s+", " ", resume_text).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
 
 
 class SimpleRAG:
     
     def __init__(self):
-        self.pc = Pinecone(api_key=Config.PINECONE_API_KEY)
-        self.index_name = Config.PINECONE_INDEX_NAME
-        self.embeddings = SimpleEmbeddings()
+        # Share the process-wide model (and its cache) instead of loading a second copy
+        self.embeddings = get_embeddings()
+        # Pinecone or local memory-mapped index, chosen by Config.VECTOR_BACKEND
+        self.store = create_vector_store()
         
-        # Skip index creation check in production to speed up cold starts
-        # Set SKIP_INDEX_CHECK=true in Render environment variables
-        skip_check = os.getenv("SKIP_INDEX_CHECK", "false").lower() == "true"
+        # Write-behind: upserts are batched off the request path
+        self.upsert_queue = UpsertQueue(self.store) if Config.UPSERT_WRITE_BEHIND else None
         
-        if not skip_check:
-            self._create_index_if_needed()
-        else:
-            print(f"⚡ Skipping index check (production mode)")
-            
-        self.index = self.pc.Index(self.index_name)
-        print(f"✅ Connected to Pinecone: {self.index_name}")
-    
-    def _create_index_if_needed(self):
-        existing = [idx.name for idx in self.pc.list_indexes()]
-        
-        if self.index_name not in existing:
-            print(f"Creating index: {self.index_name}")
-            self.pc.create_index(
-                name=self.index_name,
-                dimension=384,  # all-MiniLM-L6-v2 = 384 dimensions
-                metric="cosine",
-                spec=ServerlessSpec(cloud="aws", region="us-east-1")
-            )
-            time.sleep(3)
+        # Resume IDs already stored by this process (content-hash IDs)
+        self._known_ids = set()
+        self._known_lock = threading.Lock()
     
     def chunk_text(self, text):
-        words = text.split()
-        chunks = []
-        chunk_size = 200
+        """Section-aware, token-budgeted chunks: [Chunk(text, section, tokens)]"""
+        return chunk_resume(text)
+    
+    def has_resume(self, resume_id):
+        """Check whether a resume is already stored (local set, then vector store fetch)"""
+        with self._known_lock:
+            if resume_id in self._known_ids:
+                return True
         
-        for i in range(0, len(words), chunk_size):
-            chunk = " ".join(words[i:i + chunk_size])
-            if chunk.strip():
-                chunks.append(chunk)
+        try:
+            found = bool(self.store.fetch([f"{resume_id}_chunk_0"]))
+        except Exception as e:
+            logger.warning("Fetch check failed: %s", e)
+            found = False
         
-        return chunks
+        if found:
+            with self._known_lock:
+                self._known_ids.add(resume_id)
+        return found
     
     def store_resume(self, resume_text, resume_id):
-        chunks = self.chunk_text(resume_text)
-        print(f"   Split into {len(chunks)} chunks")
+        """
+        Chunk, embed and upsert a resume
         
-        embeddings = self.embeddings.embed_batch(chunks)
+        Returns (chunks, embeddings) so callers can rank this resume's chunks
+        in-process. Known resumes skip embedding and upsert.
+        """
+        return self.store_resumes([(resume_text, resume_id)])[0]
+    
+    def _known_embeddings(self, resume_id, chunks):
+        """Embeddings of an already-stored resume (cache first, then store fetch), or None"""
+        if not self.has_resume(resume_id):
+            return None
+        
+        texts = [chunk.text for chunk in chunks]
+        embeddings = self.embeddings.cached_batch(texts)
+        if embeddings is not None:
+            return embeddings
         
+        ids = [f"{resume_id}_chunk_{idx}" for idx in range(len(chunks))]
+        fetched = self.upsert_queue.pending(ids) if self.upsert_queue else {}
+        missing = [vid for vid in ids if vid not in fetched]
+        try:
+            if missing:
+                fetched.update(self.store.fetch(missing))
+        except Exception as e:
+            logger.warning("Fetch failed: %s", e)
+            return None
+        if len(fetched) != len(ids):
+            return None
+        # Vectors stored under an older chunking of the same resume do not match these chunks
+        if any(fetched[vid]["metadata"].get("text") != text for vid, text in zip(ids, texts)):
+            return None
+        return [fetched[vid]["values"] for vid in ids]
+    
+    def store_resumes(self, items):
+        """
+        Bulk version of store_resume for [(resume_text, resume_id), ...]
+        
+        All new chunks go through a single embed_batch call and a single
+        (internally batched) upsert. Returns [(chunks, embeddings), ...]
+        with chunks as chunking.Chunk tuples.
+        """
+        results, pending = self._plan(items)
+        if pending:
+            texts = [chunk.text for _, _, chunks, _ in pending for chunk in chunks]
+            self._write(results, pending, self.embeddings.embed_batch(texts))
+        return results
+    
+    async def astore_resumes(self, items):
+        """
+        store_resumes() for the event loop: the vector store checks and writes
+        run on the I/O pool and the embedding awaits the micro-batcher, so no
+        model pool thread is held while network calls or batching wait
+        """
+        results, pending = await run_io(self._plan, items)
+        if pending:
+            texts = [chunk.text for _, _, chunks, _ in pending for chunk in chunks]
+            embeddings = await self.embeddings.aembed_batch(texts)
+            await run_io(self._write, results, pending, embeddings)
+        return results
+    
+    async def astore_resume(self, resume_text, resume_id):
+        return (await self.astore_resumes([(resume_text, resume_id)]))[0]
+    
+    def _plan(self, items):
+        """Chunk every resume; ([(chunks, embeddings) or None], [(pos, resume_id, chunks, stale IDs) to embed])"""
+        results = [None] * len(items)
+        pending = []
+        
+        for pos, (resume_text, resume_id) in enumerate(items):
+            chunks = self.chunk_text(resume_text)
+            embeddings = self._known_embeddings(resume_id, chunks)
+            if embeddings is not None:
+                results[pos] = (chunks, embeddings)
+            else:
+                # Known but re-chunked (e.g. new CHUNK_MAX_TOKENS): chunks past the new count must go
+                stale = self._stale_chunk_ids(resume_id, len(chunks)) if self.has_resume(resume_id) else []
+                pending.append((pos, resume_id, chunks, stale))
+        
+        skipped = len(items) - len(pending)
+        if skipped:
+            logger.info("%d resume(s) already stored, skipping embedding and upsert", skipped)
+        if pending:
+            logger.debug("Split into %d chunks", sum(len(chunks) for _, _, chunks, _ in pending))
+        return results, pending
+    
+    def _stale_chunk_ids(self, resume_id, count):
+        """IDs of this resume's stored chunks from an older chunking that produced more than count"""
+        first_id = f"{resume_id}_chunk_0"
+        try:
+            first = self.upsert_queue.pending([first_id]) if self.upsert_queue else {}
+            if not first:
+                first = self.store.fetch([first_id])
+            if first_id not in first:
+                return []
+            previous = first[first_id]["metadata"].get("chunk_count")
+            if previous is not None:
+                return [f"{resume_id}_chunk_{idx}" for idx in range(count, previous)]
+            
+            # Stored before chunk_count was recorded: look for leftovers a page at a time
+            stale, start = [], count
+            while True:
+                page = [f"{resume_id}_chunk_{idx}" for idx in range(start, start + 64)]
+                found = self.store.fetch(page)
+                stale += [vid for vid in page if vid in found]
+                if len(found) < len(page):
+                    return stale
+                start += len(page)
+        except Exception as e:
+            logger.warning("Stale chunk lookup failed for %s: %s", resume_id, e)
+            return []
+    
+    def _write(self, results, pending, all_embeddings):
+        """Fill in results for the pending resumes and upsert their vectors"""
         vectors = []
-        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            vectors.append({
-                "id": f"{resume_id}_chunk_{idx}",
-                "values": embedding,
-                "metadata": {
-                    "resume_id": resume_id,
-                    "text": chunk,
-                    "chunk_index": idx
-                }
-            })
+        offset = 0
+        stale = []
+        for pos, resume_id, chunks, stale_ids in pending:
+            stale += stale_ids
+            embeddings = all_embeddings[offset:offset + len(chunks)]
+            offset += len(chunks)
+            results[pos] = (chunks, embeddings)
+            
+            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+                vectors.append({
+                    "id": f"{resume_id}_chunk_{idx}",
+                    "values": embedding,
+                    "metadata": {
+                        "resume_id": resume_id,
+                        "text": chunk.text,
+                        "section": chunk.section,
+                        "chunk_index": idx,
+                        "chunk_count": len(chunks)
+                    }
+                })
+        
+        if self.upsert_queue is not None:
+            self.upsert_queue.put(vectors)
+            if stale:
+                self.upsert_queue.delete(stale)
+            logger.debug("Queued %d vectors for upsert", len(vectors))
+        else:
+            self.store.upsert(vectors)
+            if stale:
+                self.store.delete(stale)
+            logger.debug("Stored %d vectors in vector index", len(vectors))
+        if stale:
+            logger.info("Deleting %d chunk(s) left over from an older chunking", len(stale))
         
-        self.index.upsert(vectors=vectors)
-        print(f"   ✅ Stored in Pinecone")
+        # Only once written (or queued): a failed upsert must not mark the resume as stored
+        with self._known_lock:
+            self._known_ids.update(resume_id for _, resume_id, _, _ in pending)
     
-    def search(self, query, top_k=3):
-        """Search for relevant chunks"""
+    def rank_chunks(self, query, chunks, embeddings, top_k=3, query_embedding=None, sections=None):
+        """
+        Rank one resume's chunks against a query in-process (no vector store round trip)
+        
+        sections (e.g. ["experience", "projects"]) restricts the ranking to those resume sections.
+        """
+        if sections is not None:
+            keep = [i for i, chunk in enumerate(chunks) if chunk.section in sections]
+            chunks = [chunks[i] for i in keep]
+            embeddings = [embeddings[i] for i in keep]
+        if not chunks:
+            return []
+        
+        if query_embedding is None:
+            query_embedding = self.embeddings.embed(query)
+        
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q /= max(float(np.linalg.norm(q)), 1e-12)
+        
+        scores = matrix @ q
+        k = min(top_k, len(chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        return [{"text": chunks[i].text, "section": chunks[i].section, "score": float(scores[i])} for i in top]
+    
+    def search(self, query, top_k=3, filter=None, sections=None):
+        """Search for relevant chunks across all stored resumes, optionally only in some sections"""
         query_embedding = self.embeddings.embed(query)
         
-        results = self.index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True
-        )
+        if sections is not None:
+            filter = {**(filter or {}), "section": {"$in": list(sections)}}
+        results = self.store.query(query_embedding, top_k=top_k, filter=filter)
         
         matches = []
-        for match in results.matches:
+        for match in results:
             matches.append({
-                "text": match.metadata.get("text", ""),
-                "score": match.score
+                "text": match["metadata"].get("text", ""),
+                "section": match["metadata"].get("section"),
+                "score": match["score"]
             })
         
         return matches
+    
+    def get_stats(self):
+        stats = self.store.stats()
+        if self.upsert_queue is not None:
+            stats["upsert_queue"] = self.upsert_queue.stats()
+        return stats
+    
+    def close(self):
+        if self.upsert_queue is not None:
+            self.upsert_queue.close()
 
 
-# Global instances
+# Global instances; the locks make concurrent first callers (warmup and early
+# requests) wait for one load instead of loading the model twice
 _embeddings = None
 _rag = None
+_embeddings_lock = threading.Lock()
+_rag_lock = threading.Lock()
 
 def get_embeddings():
     """Get or create embeddings service"""
     global _embeddings
     if _embeddings is None:
-        _embeddings = SimpleEmbeddings()
+        with _embeddings_lock:
+            if _embeddings is None:
+                _embeddings = SimpleEmbeddings()
     return _embeddings
 
 def get_rag():
     global _rag
     if _rag is None:
-        _rag = SimpleRAG()
+        with _rag_lock:
+            if _rag is None:
+                _rag = SimpleRAG()
     return _rag
+
+def save_embedding_cache():
+    """Persist the embedding cache (no-op unless EMBEDDING_CACHE_PATH is set)"""
+    if _embeddings is not None:
+        _embeddings.cache.save()
+
+
+def close_rag():
+    """Flush pending upserts (spilling what cannot be written) at shutdown"""
+    if _rag is not None:
+        _rag.close()
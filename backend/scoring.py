@@ -1,55 +1,134 @@
-
 from models import ExtractedInfo, JDRequirements, ScoreBreakdown
 from rag import get_rag
+from skills import canonicalize_skill
+from config import Config
+import logging
+import re
+
+
+logger = logging.getLogger(__name__)
+
+
+def calculate_skills_score(resume_info, jd_requirements, semantic=None):
+    """
+    Skills match (max 40)
+
+    With semantic matching (Config.SKILL_SEMANTIC_MATCH) a required skill is
+    matched when its embedding is close enough to one of the resume's skills,
+    and near misses earn partial credit; otherwise canonical names must match.
+    """
+    semantic = Config.SKILL_SEMANTIC_MATCH if semantic is None else semantic
+    if semantic and jd_requirements.required_skills:
+        try:
+            return _semantic_skills_score(resume_info, jd_requirements)
+        except Exception as e:
+            logger.warning("Semantic skill matching unavailable, using exact match: %s", e)
+
+    # Normalize skills to canonical taxonomy names ("k8s" == "Kubernetes"), lowercased
+    resume_skills = {canonicalize_skill(s).lower() for s in resume_info.skills}
+    required_skills = {canonicalize_skill(s).lower() for s in jd_requirements.required_skills}
 
-def calculate_skills_score(resume_info, jd_requirements):
-    # Normalize skills to lowercase
-    resume_skills = {s.lower() for s in resume_info.skills}
-    required_skills = {s.lower() for s in jd_requirements.required_skills}
-    
     if not required_skills:
         return 35.0, [], []
-    
+
     # Find matches
     matched = resume_skills & required_skills
     missing = required_skills - resume_skills
-    
+
     # Calculate score
     match_rate = len(matched) / len(required_skills)
     score = 40 * match_rate
-    
+
+    # Keep the JD's spelling and order for display
     return (
         round(score, 2),
-        [s.title() for s in matched],
-        [s.title() for s in missing]
+        [s for s in jd_requirements.required_skills if canonicalize_skill(s).lower() in matched],
+        [s for s in jd_requirements.required_skills if canonicalize_skill(s).lower() in missing]
     )
 
 
-def calculate_experience_score(resume_info, resume_id, jd_text):
-        rag = get_rag()
-        results = rag.search(jd_text[:500], top_k=3)
-        
+def _semantic_skills_score(resume_info, jd_requirements):
+    from skill_vectors import get_skill_vectors
+    from rag import get_embeddings
+
+    required = list(dict.fromkeys(jd_requirements.required_skills))
+    _, is_matched, credit = get_skill_vectors().match(
+        resume_info.skills, required, embeddings=get_embeddings()
+    )
+    matched = [s for s, hit in zip(required, is_matched) if hit]
+    missing = [s for s, hit in zip(required, is_matched) if not hit]
+    return round(40 * credit, 2), matched, missing
+
+
+def _required_years(jd_requirements):
+    if not jd_requirements or not jd_requirements.experience_required:
+        return None
+    match = re.search(r"\d+", jd_requirements.experience_required)
+    return int(match.group()) if match else None
+
+
+def calculate_experience_score(resume_info, resume_id, jd_text, results=None, jd_requirements=None):
+    """
+    Experience relevance (max 30)
+
+    Based on the similarity of the resume's best-matching chunks to the JD.
+    Pass `results` (e.g. from SimpleRAG.rank_chunks) to avoid a vector store
+    query; otherwise this resume's chunks are searched by resume_id. When the
+    JD states a years requirement, it contributes a third of the score.
+    """
+    try:
+        if results is None:
+            rag = get_rag()
+            results = rag.search(jd_text[:500], top_k=3, filter={"resume_id": resume_id})
+
         if not results:
             return 15.0
         avg_score = sum(r["score"] for r in results) / len(results)
         experience_score = avg_score * 30
-        
+
+        required_years = _required_years(jd_requirements)
+        if required_years and resume_info.years_of_experience is not None:
+            years_ratio = min(1.0, resume_info.years_of_experience / required_years)
+            experience_score = (2 / 3) * experience_score + (1 / 3) * years_ratio * 30
+
         return round(min(30, max(0, experience_score)), 2)
-    except:
+    except Exception:
         return 20.0  # Default
 
 
+# Anchored on both sides (abbreviations may end in a dot, hence (?!\w) not \b) so
+# "systems", "teams" or "Diploma." never read as a degree; bare "ms" / "bs" / "ba"
+# only count when a field follows
+_FIELD = r"(?=\s*(?:in|of|degree)\b|\s*[,(])"
+DEGREE_LEVELS = [
+    (4, re.compile(r"\b(?:ph\.?\s?d\.?|doctorate|doctor of)(?!\w)")),
+    (3, re.compile(r"\b(?:master'?s?|m\.s\.?|m\.?sc\.?|ms" + _FIELD + r"|mba|m\.?tech|m\.e\.|m\.a\.)(?!\w)")),
+    (2, re.compile(r"\b(?:bachelor'?s?|b\.s\.?|b\.?sc\.?|bs" + _FIELD + r"|b\.a\.|ba" + _FIELD
+                   + r"|b\.?tech|b\.e\.|undergraduate|(?:college|university|four-year|4-year) degree)(?!\w)")),
+    (1, re.compile(r"\b(?:associate'?s? (?:degree|of|in)|diploma)(?!\w)")),
+]
+
+
+def degree_level(text):
+    """Highest degree level mentioned: 4 PhD, 3 Master, 2 Bachelor, 1 Associate/Diploma, 0 none"""
+    text = (text or "").lower()
+    for level, pattern in DEGREE_LEVELS:
+        if pattern.search(text):
+            return level
+    return 0
+
+
 def calculate_education_score(resume_info, jd_requirements):
-    if not jd_requirements.education_required:
+    # A JD line that only looks like one ("MS Office", "no degree required") is no requirement
+    required_level = degree_level(jd_requirements.education_required)
+    if not required_level:
         return 12.0  # No requirement = good score
-    
+
     education_text = " ".join(resume_info.education).lower()
-    required = jd_requirements.education_required.lower()
-    
+    resume_level = degree_level(education_text)
+
     # Check if bachelor, master, etc mentioned
-    if "master" in required and "master" in education_text:
-        return 15.0
-    elif "bachelor" in required and ("bachelor" in education_text or "master" in education_text):
+    if resume_level >= required_level:
         return 15.0
     elif education_text:
         return 10.0
@@ -57,13 +136,15 @@ def calculate_education_score(resume_info, jd_requirements):
         return 5.0
 
 
-def calculate_ats_score(resume_info, jd_requirements, resume_id, jd_text, quality_score):
+def calculate_ats_score(resume_info, jd_requirements, resume_id, jd_text, quality_score, results=None):
     # Calculate each component
     skills_score, matched, missing = calculate_skills_score(resume_info, jd_requirements)
-    experience_score = calculate_experience_score(resume_info, resume_id, jd_text)
+    experience_score = calculate_experience_score(
+        resume_info, resume_id, jd_text, results=results, jd_requirements=jd_requirements
+    )
     education_score = calculate_education_score(resume_info, jd_requirements)
     quality_component = round((quality_score / 100) * 15, 2)
-    
+
     # Create breakdown
     breakdown = ScoreBreakdown(
         skills_score=skills_score,
@@ -72,5 +153,5 @@ def calculate_ats_score(resume_info, jd_requirements, resume_id, jd_text, qualit
         quality_score=quality_component,
         total_score=round(skills_score + experience_score + education_score + quality_component, 2)
     )
-    
+
     return (breakdown, matched, missing)
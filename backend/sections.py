@@ -0,0 +1,61 @@
+import re
+
+
+# Canonical section name -> header spellings seen in resumes
+SECTION_HEADERS = {
+    "summary": ["summary", "professional summary", "profile", "objective", "about me", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "internships", "internship"],
+    "education": ["education", "academic background", "academics", "qualifications", "education and training"],
+    "skills": ["skills", "technical skills", "core competencies", "technologies", "tech stack",
+               "key skills", "tools", "skills and tools"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses", "courses"],
+    "achievements": ["achievements", "awards", "honors", "accomplishments"],
+    "publications": ["publications", "research"],
+}
+
+_HEADER_LOOKUP = {
+    alias: name for name, aliases in SECTION_HEADERS.items() for alias in aliases
+}
+
+_BULLET_RE = re.compile(r"^\s*(?:[•●▪◦‣⁃∙\-\*–➢>]|\d{1,2}[.)])\s+")
+
+
+def detect_header(line):
+    """Return the canonical section name if line looks like a section header"""
+    cleaned = re.sub(r"[:|\-_=#*]+$", "", line.strip()).strip().lower()
+    cleaned = re.sub(r"\s+", " ", cleaned)
+    if not cleaned or len(cleaned) > 40:
+        return None
+    return _HEADER_LOOKUP.get(cleaned)
+
+
+def is_bullet(line):
+    return bool(_BULLET_RE.match(line))
+
+
+def split_sections(text):
+    """
+    Split resume text into [(section_name, [lines])] in document order
+
+    Text before the first recognized header is reported as "header"
+    (usually name and contact details).
+    """
+    sections = [("header", [])]
+    for line in (text or "").splitlines():
+        name = detect_header(line)
+        if name:
+            sections.append((name, []))
+        elif line.strip():
+            sections[-1][1].append(line.rstrip())
+    return [(name, lines) for name, lines in sections if lines or name != "header"]
+
+
+def section_map(text):
+    """{section_name: joined text}; repeated sections are concatenated"""
+    result = {}
+    for name, lines in split_sections(text):
+        body = "\n".join(lines)
+        result[name] = result[name] + "\n" + body if name in result else body
+    return result
@@ -0,0 +1,147 @@
+from skills import get_skill_matcher, canonicalize_skill
+from config import Config
+import numpy as np
+import threading
+import hashlib
+import logging
+import json
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+def _vocabulary_digest(skills):
+    payload = json.dumps([Config.EMBEDDING_MODEL] + list(skills))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SkillVectors:
+    """
+    Unit-length MiniLM embeddings for every canonical skill in the taxonomy
+
+    Stored as a float16 matrix (<path>.npy) plus the skill names
+    (<path>.json). Matching a resume against a JD is one matrix multiply:
+    each required skill takes its best cosine similarity among the resume's
+    skills, and counts as matched at or above the threshold.
+    """
+
+    def __init__(self, skills, matrix, threshold=None, floor=None):
+        self.skills = list(skills)
+        self.matrix = np.asarray(matrix, dtype=np.float32)
+        self.threshold = threshold if threshold is not None else Config.SKILL_MATCH_THRESHOLD
+        self.floor = floor if floor is not None else Config.SKILL_MATCH_FLOOR
+        self.digest = _vocabulary_digest(self.skills)
+        self._rows = {name.lower(): i for i, name in enumerate(self.skills)}
+
+    @classmethod
+    def build(cls, embeddings, skills):
+        vectors = np.asarray(embeddings.embed_batch(list(skills)), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return cls(skills, vectors)
+
+    @classmethod
+    def load(cls, path):
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        vectors = cls(meta["skills"], np.load(path + ".npy"))
+        vectors.digest = meta.get("digest")
+        return vectors
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.save(path + ".tmp.npy", self.matrix.astype(np.float16))
+        with open(path + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"model": Config.EMBEDDING_MODEL, "digest": self.digest,
+                       "skills": self.skills}, f)
+        os.replace(path + ".tmp.npy", path + ".npy")
+        os.replace(path + ".json.tmp", path + ".json")
+
+    def vectors(self, skills, embeddings=None):
+        """Rows for skills; skills outside the vocabulary are embedded (if a model is given) or zero"""
+        rows, unknown = [], []
+        for i, skill in enumerate(skills):
+            row = self._rows.get(skill.lower())
+            if row is None:
+                row = self._rows.get(canonicalize_skill(skill).lower())
+            if row is None:
+                unknown.append(i)
+                row = 0
+            rows.append(row)
+
+        out = self.matrix[rows]
+        out[unknown] = 0.0
+        if unknown and embeddings is not None:
+            encoded = np.asarray(embeddings.embed_batch([skills[i] for i in unknown]), dtype=np.float32)
+            encoded /= np.maximum(np.linalg.norm(encoded, axis=1, keepdims=True), 1e-12)
+            out[unknown] = encoded
+        return out
+
+    def match(self, resume_skills, jd_skills, embeddings=None):
+        """
+        Best similarity of each JD skill to the resume's skills
+
+        Returns (similarities, matched mask, credit): credit is 1 per matched
+        skill and rises linearly from 0 at `floor` to 1 at `threshold` for
+        near misses, averaged over the JD skills.
+        """
+        if not jd_skills:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=bool), 1.0
+        if not resume_skills:
+            return np.zeros(len(jd_skills), dtype=np.float32), np.zeros(len(jd_skills), dtype=bool), 0.0
+
+        jd = self.vectors(jd_skills, embeddings)
+        resume = self.vectors(resume_skills, embeddings)
+        best = (jd @ resume.T).max(axis=1)
+
+        matched = best >= self.threshold
+        credit = np.clip((best - self.floor) / (self.threshold - self.floor), 0.0, 1.0)
+        credit[matched] = 1.0
+        return best, matched, float(credit.mean())
+
+
+_vectors = None
+_vectors_lock = threading.Lock()
+
+def get_skill_vectors():
+    """Load the skill embedding matrix, building (and saving) it first if it is missing or stale"""
+    global _vectors
+    if _vectors is None:
+        with _vectors_lock:
+            if _vectors is None:
+                _vectors = _load_or_build(Config.SKILL_EMBEDDINGS_PATH)
+    return _vectors
+
+
+def _load_or_build(path):
+    skills = list(get_skill_matcher().categories)
+    if os.path.exists(path + ".npy") and os.path.exists(path + ".json"):
+        try:
+            vectors = SkillVectors.load(path)
+            if vectors.digest == _vocabulary_digest(skills):
+                logger.info("Loaded %d skill embeddings", len(vectors.skills))
+                return vectors
+            logger.info("Skill taxonomy changed, rebuilding skill embeddings")
+        except Exception as e:
+            logger.warning("Could not load skill embeddings: %s", e)
+
+    return build_skill_vectors(path)
+
+
+def build_skill_vectors(path=None):
+    from rag import get_embeddings
+
+    path = path or Config.SKILL_EMBEDDINGS_PATH
+    skills = list(get_skill_matcher().categories)
+    logger.info("Embedding %d skills", len(skills))
+    vectors = SkillVectors.build(get_embeddings(), skills)
+    vectors.save(path)
+    logger.info("Skill embeddings saved to %s.npy", path)
+    return vectors
+
+
+if __name__ == "__main__":
+    # Build ahead of time (e.g. in the Docker image) so startup only loads the file
+    from logging_setup import configure_logging
+    configure_logging()
+    build_skill_vectors()
@@ -0,0 +1,249 @@
+from collections import deque
+from typing import NamedTuple
+from config import Config
+import threading
+import logging
+import json
+import re
+
+
+logger = logging.getLogger(__name__)
+
+
+class SkillMatch(NamedTuple):
+    skill: str      # canonical name from the taxonomy
+    start: int      # character offsets into the scanned text
+    end: int
+    text: str       # the spelling that matched (e.g. "k8s")
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _joined(text, at, step):
+    """Whether the "&" or "/" at text[at] glues a short match to a letter beyond it (R&D, P&L, I/O)"""
+    if not 0 <= at < len(text) or text[at] not in "&/":
+        return False
+    beyond = at + step
+    if not (0 <= beyond < len(text) and text[beyond].isalpha()):
+        return False
+    if text[at] == "&":
+        return True
+    # "/" only between single letters: "UI/UX" and "C/C++" list two skills
+    after = beyond + step
+    return not (0 <= after < len(text) and (_is_word_char(text[after]) or text[after] in "+#"))
+
+
+def load_taxonomy(path=None):
+    """
+    Read the skill taxonomy JSON
+
+    A list of {"skill", "category", "aliases", "exact_aliases", "case_sensitive"}:
+    aliases match in any case, exact_aliases only as written ("RAG", "TS"), and
+    case_sensitive applies to the canonical name itself ("Go", "R", "Swift").
+    """
+    with open(path or Config.SKILL_TAXONOMY_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over every skill name and alias in the taxonomy
+
+    Text is lowercased once and scanned in a single pass; a match counts only
+    when it is not glued to surrounding word characters (so "Java" does not
+    match inside "JavaScript" and "C" does not match "C++"). Overlapping
+    matches resolve to the leftmost, then longest ("Spring Boot" over "Spring").
+    """
+
+    def __init__(self, taxonomy):
+        self.categories = {}
+        self._aliases = {}
+        # Pattern table: (lowercased pattern, canonical skill, exact spelling or None)
+        self._patterns = []
+        for entry in taxonomy:
+            skill = entry["skill"]
+            self.categories[skill] = entry.get("category")
+            self._add(skill, skill, skill if entry.get("case_sensitive") else None)
+            for alias in entry.get("aliases", []):
+                self._add(alias, skill, None)
+            for alias in entry.get("exact_aliases", []):
+                self._add(alias, skill, alias)
+        self._build()
+
+    def _add(self, pattern, skill, exact):
+        pattern = pattern.strip()
+        if not pattern:
+            return
+        self._aliases.setdefault(pattern.lower(), skill)
+        self._patterns.append((pattern.lower(), skill, exact))
+
+    def _build(self):
+        # Trie
+        self._goto = [{}]
+        self._output = [[]]
+        for pid, (pattern, _, _) in enumerate(self._patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._output.append([])
+                state = nxt
+            self._output[state].append(pid)
+
+        # Failure links (breadth first), folding each state's outputs into its own list
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def __len__(self):
+        return len(self.categories)
+
+    def canonicalize(self, name):
+        """Canonical skill for a name or alias ("k8s" -> "Kubernetes"), None if unknown"""
+        return self._aliases.get((name or "").strip().lower())
+
+    def find(self, text):
+        """All skill mentions in text as SkillMatch tuples, in order"""
+        if not text:
+            return []
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lowercased; keep offsets aligned
+            lowered = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self._patterns
+        candidates = []
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in output[state]:
+                pattern, skill, exact = patterns[pid]
+                start = i + 1 - len(pattern)
+                if exact is not None and text[start:i + 1] != exact:
+                    continue
+                if self._bounded(lowered, start, i + 1):
+                    candidates.append((start, -len(pattern), skill))
+
+        candidates.sort()
+        matches = []
+        last_end = 0
+        for start, neg_len, skill in candidates:
+            if start >= last_end:
+                last_end = start - neg_len
+                matches.append(SkillMatch(skill, start, last_end, text[start:last_end]))
+        return matches
+
+    @staticmethod
+    def _bounded(text, start, end):
+        # Skills like C++, C#, .NET and Node.js need custom boundaries instead of \b
+        if start > 0:
+            before = text[start - 1]
+            if _is_word_char(before) or before in "+#.":
+                return False
+        if end < len(text):
+            after = text[end]
+            if _is_word_char(after) or after in "+#":
+                return False
+            if after == "." and end + 1 < len(text) and _is_word_char(text[end + 1]):
+                return False
+        # One- and two-letter skills are also glued by "&" (R&D, P&L) and single-letter ones by "/"
+        if end - start <= 2:
+            for at, step in ((start - 1, -1), (end, 1)):
+                if _joined(text, at, step) and (text[at] == "&" or end - start == 1):
+                    return False
+        return True
+
+    def extract(self, text):
+        """Canonical skills mentioned in text, in order of first appearance"""
+        found = {}
+        for match in self.find(text):
+            found.setdefault(match.skill, match.start)
+        return list(found)
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+def get_skill_matcher():
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = SkillMatcher(load_taxonomy())
+                logger.info("Skill matcher compiled (%d skills, %d patterns)", len(_matcher), len(_matcher._patterns))
+    return _matcher
+
+
+# A line listing things: "Stack: Temporal, Dagster, dbt" or "Kafka | Flink | Pinot"
+_LIST_LABEL_RE = re.compile(r"^[^:,;|•]{1,40}:\s*")
+_LIST_SPLIT_RE = re.compile(r"\s*(?:[,;|•]|\s/\s|\band\b)\s*")
+_LIST_ITEM_RE = re.compile(r"^[A-Za-z][\w.+#/-]*(?: [\w.+#/-]+){0,2}$")
+# Items with these words are requirements prose ("strong communication skills"), not skill names
+_NOT_SKILL_RE = re.compile(
+    r"\b(?:experience|years?|skills?|knowledge|ability|understanding|familiarity|strong|excellent|good|"
+    r"proficien\w*|working|etc|other|similar|including|e\.g|degree|team|must|will|you|our)\b",
+    re.IGNORECASE
+)
+
+
+def extract_skill_phrases(text):
+    """
+    Items of list-like lines (three or more short, comma/pipe/bullet separated
+    entries) as written, in order: the skills of a stack the taxonomy does not
+    know yet
+    """
+    phrases = {}
+    for line in (text or "").splitlines():
+        line = _LIST_LABEL_RE.sub("", line.strip().lstrip("-•* "))
+        items = [item.strip(" .()") for item in _LIST_SPLIT_RE.split(line)]
+        items = [item for item in items if item]
+        if len(items) < 3:
+            continue
+        for item in items:
+            if _LIST_ITEM_RE.match(item) and not _NOT_SKILL_RE.search(item):
+                phrases.setdefault(item.lower(), item)
+    return list(phrases.values())
+
+
+def extract_skills(text, fallback=False):
+    """
+    Known skills mentioned in text, in order of first appearance
+
+    With fallback, text where the taxonomy finds fewer than SKILL_FALLBACK_MIN
+    skills also gets the unknown items of its skill lists, as written; the
+    semantic matcher (skill_vectors.py) embeds those on the fly.
+    """
+    matcher = get_skill_matcher()
+    skills = matcher.extract(text)
+    if fallback and len(skills) < Config.SKILL_FALLBACK_MIN:
+        known = {skill.lower() for skill in skills}
+        for phrase in extract_skill_phrases(text):
+            if matcher.canonicalize(phrase) is None and phrase.lower() not in known:
+                known.add(phrase.lower())
+                skills.append(phrase)
+    return skills
+
+
+def find_skills(text):
+    """Skill mentions with positions: [SkillMatch(skill, start, end, text)]"""
+    return get_skill_matcher().find(text)
+
+
+def canonicalize_skill(name):
+    """Canonical taxonomy name for a skill, or the name itself if it is not in the taxonomy"""
+    return get_skill_matcher().canonicalize(name) or (name or "").strip()
@@ -0,0 +1,18 @@
+#!/bin/sh
+# Container entrypoint: one embedding server process owns the model and
+# WEB_CONCURRENCY uvicorn workers reach it over a Unix socket
+# (EMBEDDING_BACKEND=remote), so adding workers does not add model copies.
+# Set EMBEDDING_SERVER=false to run a single self-contained worker instead.
+# VECTOR_BACKEND=local keeps its index in per-process memory maps; use one
+# worker with it.
+set -e
+
+if [ "${EMBEDDING_SERVER:-true}" = "true" ]; then
+    EMBEDDING_SERVER_BACKEND="${EMBEDDING_SERVER_BACKEND:-${EMBEDDING_BACKEND:-torch}}" python embedding_server.py &
+    export EMBEDDING_BACKEND=remote
+    WORKERS="${WEB_CONCURRENCY:-2}"
+else
+    WORKERS=1
+fi
+
+exec uvicorn main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS"
@@ -0,0 +1,64 @@
+from cache import AnalysisCache, make_cache_key
+import time
+
+
+def _cache(tmp_path, **kwargs):
+    kwargs.setdefault("memory_entries", 8)
+    kwargs.setdefault("max_entries", 2)
+    kwargs.setdefault("ttl_seconds", 3600)
+    return AnalysisCache(db_path=str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def test_key_ignores_whitespace_but_not_model():
+    key = make_cache_key("Python  developer\n", "Backend role", "model-a", "v1")
+    assert key == make_cache_key("Python developer", "Backend  role ", "model-a", "v1")
+    assert key != make_cache_key("Python developer", "Backend role", "model-b", "v1")
+
+
+def test_entries_persist_across_instances(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("a", "full", {"score": 80})
+
+    fresh = _cache(tmp_path)
+    assert fresh.get("a") == ("full", {"score": 80})
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = _cache(tmp_path, ttl_seconds=0.05)
+    cache.set("a", "full", {"score": 80})
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert _cache(tmp_path, ttl_seconds=0.05).get("a") is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("a", "full", {"n": 1})
+    time.sleep(0.01)
+    cache.set("b", "full", {"n": 2})
+    time.sleep(0.01)
+    cache.set("c", "full", {"n": 3})
+
+    fresh = _cache(tmp_path)
+    assert fresh.get("a") is None
+    assert fresh.get("b") is not None
+    assert fresh.get("c") is not None
+
+
+def test_memory_hits_keep_an_entry_from_disk_eviction(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("hot", "full", {"n": 1})
+    time.sleep(0.01)
+    cache.set("cold", "full", {"n": 2})
+    time.sleep(0.01)
+    # Served from the memory tier only
+    assert cache.get("hot") == ("full", {"n": 1})
+    assert cache.stats()["memory_hits"] == 1
+
+    cache.set("new", "full", {"n": 3})
+
+    fresh = _cache(tmp_path)
+    assert fresh.get("hot") is not None
+    assert fresh.get("cold") is None
+    assert fresh.get("new") is not None
@@ -0,0 +1,78 @@
+from chunking import chunk_resume, count_tokens, _SPECIAL_TOKENS
+
+
+RESUME = """Jane Doe
+jane@example.com
+
+SKILLS
+Python, Go, PostgreSQL, Kubernetes
+
+EXPERIENCE
+Backend Engineer, Acme (2019 - 2024)
+""" + "\n".join(f"- Shipped service number {i} to production with tests and docs" for i in range(30)) + """
+
+EDUCATION
+BSc Computer Science, State University
+"""
+
+HEADING = "Backend Engineer, Acme (2019 - 2024)"
+
+
+def test_chunks_fit_the_token_budget():
+    chunks = chunk_resume(RESUME, max_tokens=64, overlap_tokens=0)
+    assert len(chunks) > 3
+    for chunk in chunks:
+        assert count_tokens(chunk.text) <= 64 - _SPECIAL_TOKENS
+
+
+def test_over_long_line_is_cut_at_word_boundaries():
+    words = [f"word{i}" for i in range(200)]
+    chunks = chunk_resume("SUMMARY\n" + " ".join(words), max_tokens=32, overlap_tokens=0)
+    assert len(chunks) > 1
+    assert all(count_tokens(c.text) <= 32 - _SPECIAL_TOKENS for c in chunks)
+    assert " ".join(c.text for c in chunks).split() == words
+
+
+def test_continuation_chunks_repeat_the_heading():
+    chunks = [c for c in chunk_resume(RESUME, max_tokens=64, overlap_tokens=0) if "Shipped" in c.text]
+    assert len(chunks) > 1
+    assert all(c.text.startswith(HEADING) for c in chunks)
+    # Only the heading repeats: every bullet appears exactly once
+    bullets = [line for c in chunks for line in c.text.splitlines() if line.startswith("- ")]
+    assert len(bullets) == len(set(bullets)) == 30
+
+
+def test_overlap_carries_trailing_lines_into_the_next_chunk():
+    bullet = count_tokens("- Shipped service number 10 to production with tests and docs")
+    chunks = [c for c in chunk_resume(RESUME, max_tokens=64, overlap_tokens=bullet) if "Shipped" in c.text]
+    assert len(chunks) > 1
+    for previous, following in zip(chunks, chunks[1:]):
+        last = previous.text.splitlines()[-1]
+        lines = following.text.splitlines()
+        assert lines[0] == HEADING
+        assert lines[1] == last
+        assert count_tokens(following.text) <= 64 - _SPECIAL_TOKENS
+
+
+def test_overlap_never_carries_a_line_larger_than_the_overlap_budget():
+    chunks = [c for c in chunk_resume(RESUME, max_tokens=64, overlap_tokens=4) if "Shipped" in c.text]
+    bullets = [line for c in chunks for line in c.text.splitlines() if line.startswith("- ")]
+    assert len(bullets) == len(set(bullets))
+
+
+def test_chunks_never_span_sections_and_keep_document_order():
+    chunks = chunk_resume(RESUME, max_tokens=64, overlap_tokens=16)
+    sections = [c.section for c in chunks]
+    # Each section's chunks are contiguous
+    assert len(set(sections)) == len([s for i, s in enumerate(sections) if i == 0 or s != sections[i - 1]])
+    assert not any("BSc" in c.text and "Shipped" in c.text for c in chunks)
+    texts = "\n".join(c.text for c in chunks)
+    assert texts.index("Python") < texts.index("Shipped service number 0") < texts.index("BSc")
+
+
+def test_small_entries_are_not_split():
+    chunks = chunk_resume(RESUME, max_tokens=256, overlap_tokens=32)
+    education = [c for c in chunks if "BSc" in c.text]
+    assert len(education) == 1
+    skills = [c for c in chunks if "Kubernetes" in c.text]
+    assert len(skills) == 1 and "Shipped" not in skills[0].text
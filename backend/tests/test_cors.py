@@ -0,0 +1,15 @@
+from fastapi.testclient import TestClient
+from config import Config
+import main
+
+
+def test_rejected_upload_carries_cors_headers():
+    client = TestClient(main.app)
+    body = b"x" * (Config.UPLOAD_MAX_BODY_BYTES + 1)
+    response = client.post(
+        "/api/extract",
+        content=body,
+        headers={"Origin": "http://example.com", "Content-Type": "application/octet-stream"},
+    )
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == "http://example.com"
@@ -0,0 +1,125 @@
+from embedding_batcher import EmbeddingBatcher
+from concurrent.futures import TimeoutError
+import numpy as np
+import threading
+import asyncio
+import hashlib
+import pytest
+import time
+
+
+DIM = 4
+
+
+class _Backend:
+    """Hashed vectors; records every batch it is asked to encode"""
+
+    dimension = DIM
+
+    def __init__(self, delay=0.0, fail=None):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail is not None:
+            raise self.fail
+        return np.asarray([_vector(t) for t in texts], dtype=np.float32)
+
+
+def _vector(text):
+    seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).normal(size=DIM)
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(backend, **kwargs):
+        batcher = EmbeddingBatcher(backend, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.close()
+
+
+def test_concurrent_callers_share_a_forward_pass(make_batcher):
+    backend = _Backend()
+    batcher = make_batcher(backend, window_ms=100, max_batch=64)
+    requests = [[f"text {i}", f"text {i + 1}", "shared"] for i in range(8)]
+    results = [None] * len(requests)
+
+    def call(i):
+        results[i] = batcher.encode(requests[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(backend.calls) < len(requests)
+    # Deduplicated across callers, each caller gets its own rows in its own order
+    assert sum(len(c) for c in backend.calls) == len({t for r in requests for t in r})
+    for texts, vectors in zip(requests, results):
+        assert np.allclose(vectors, [_vector(t) for t in texts], atol=1e-6)
+    assert batcher.stats()["requests"] == len(requests)
+
+
+def test_max_batch_splits_batches(make_batcher):
+    backend = _Backend(delay=0.05)
+    batcher = make_batcher(backend, window_ms=50, max_batch=4)
+    futures = [batcher.submit([f"a{i}", f"b{i}"]) for i in range(6)]
+    for future in futures:
+        future.result(timeout=5)
+    assert all(len(call) <= 4 for call in backend.calls)
+
+
+def test_async_callers_merge_without_threads(make_batcher):
+    backend = _Backend()
+    batcher = make_batcher(backend, window_ms=50)
+
+    async def scenario():
+        return await asyncio.gather(*[asyncio.wrap_future(batcher.submit([f"t{i}"])) for i in range(32)])
+
+    results = asyncio.run(scenario())
+    assert len(backend.calls) == 1
+    assert all(np.allclose(r[0], _vector(f"t{i}"), atol=1e-6) for i, r in enumerate(results))
+
+
+def test_encode_error_reaches_every_caller(make_batcher):
+    backend = _Backend(fail=RuntimeError("model crashed"))
+    batcher = make_batcher(backend, window_ms=50)
+    futures = [batcher.submit([f"t{i}"]) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            future.result(timeout=5)
+
+
+def test_failure_after_encode_does_not_kill_the_batcher(make_batcher):
+    backend = _Backend()
+    batcher = make_batcher(backend, window_ms=0)
+    good = backend.encode
+    backend.encode = lambda texts: good(texts)[:0]  # too few rows: fails while splitting the batch
+
+    with pytest.raises(IndexError):
+        batcher.encode(["a", "b"])
+
+    backend.encode = good
+    assert np.allclose(batcher.encode(["c"]), [_vector("c")], atol=1e-6)
+
+
+def test_encode_times_out(make_batcher):
+    batcher = make_batcher(_Backend(delay=1.0), window_ms=0, timeout=0.1)
+    with pytest.raises(TimeoutError):
+        batcher.encode(["slow"])
+
+
+def test_empty_request(make_batcher):
+    batcher = make_batcher(_Backend(), window_ms=0)
+    assert batcher.encode([]).shape == (0, DIM)
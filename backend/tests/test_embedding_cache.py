@@ -0,0 +1,68 @@
+from embedding_cache import EmbeddingCache
+import numpy as np
+import os
+
+
+def _vec(seed):
+    v = np.random.default_rng(seed).standard_normal(8).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = EmbeddingCache(capacity=2, path="")
+    cache.put_many(["a", "b"], [_vec(1), _vec(2)])
+    assert cache.get("a") is not None  # b is now the oldest
+    cache.put("c", _vec(3))
+
+    assert cache.get_many(["a", "b", "c"])[1] is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_persist_in_lru_order(tmp_path):
+    path = str(tmp_path / "emb")
+    cache = EmbeddingCache(capacity=3, path=path)
+    cache.put_many(["a", "b", "c"], [_vec(1), _vec(2), _vec(3)])
+    cache.save()
+
+    # A smaller reload keeps the most recent entries
+    fresh = EmbeddingCache(capacity=2, path=path)
+    assert fresh.get("a") is None
+    np.testing.assert_allclose(fresh.get("c"), _vec(3), atol=1e-3)
+    assert not [f for f in os.listdir(tmp_path) if ".npy." in f or ".json." in f]
+
+
+def test_zero_capacity_loads_nothing(tmp_path):
+    path = str(tmp_path / "emb")
+    cache = EmbeddingCache(capacity=4, path=path)
+    cache.put_many(["a", "b"], [_vec(1), _vec(2)])
+    cache.save()
+
+    assert EmbeddingCache(capacity=0, path=path).stats()["entries"] == 0
+
+
+def test_other_model_never_sees_cached_vectors(tmp_path):
+    path = str(tmp_path / "emb")
+    cache = EmbeddingCache(capacity=4, path=path, namespace="torch:model-a")
+    cache.put("a", _vec(1))
+    cache.save()
+
+    assert EmbeddingCache(capacity=4, path=path, namespace="onnx:model-a:int8").get("a") is None
+    assert EmbeddingCache(capacity=4, path=path, namespace="torch:model-a").get("a") is not None
+
+
+def test_mismatched_files_are_ignored(tmp_path):
+    path = str(tmp_path / "emb")
+    old = EmbeddingCache(capacity=4, path=path)
+    old.put_many(["a", "b"], [_vec(1), _vec(2)])
+    old.save()
+    with open(path + ".keys.json", "rb") as f:
+        old_keys = f.read()
+
+    new = EmbeddingCache(capacity=4, path=path)
+    new.put_many(["c", "d"], [_vec(3), _vec(4)])
+    new.save()
+    # Crash between the two replaces: new vectors, old keys
+    with open(path + ".keys.json", "wb") as f:
+        f.write(old_keys)
+
+    assert EmbeddingCache(capacity=4, path=path).stats()["entries"] == 0
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+from executors import run_model
+from config import Config
+import health
+import asyncio
+import time
+import rag
+
+
+def test_embedding_probe_does_not_queue_behind_model_pool(monkeypatch):
+    encoded = []
+    backend = SimpleNamespace(encode=lambda texts: encoded.append(texts) or [[0.0] * 4])
+    monkeypatch.setattr(rag, "_embeddings", SimpleNamespace(backend=backend))
+
+    async def scenario():
+        # Every model thread busy for longer than the probe timeout
+        busy = [asyncio.ensure_future(run_model(time.sleep, 1.0)) for _ in range(Config.MODEL_WORKERS * 2)]
+        await asyncio.sleep(0.05)
+        monitor = health.HealthMonitor(timeout=0.5, history=5)
+        await monitor._probe("embedding_model")
+        await asyncio.gather(*busy)
+        return monitor.results["embedding_model"]
+
+    result = asyncio.run(scenario())
+    assert result.error is None
+    assert result.status == health.OK
+    assert encoded == [["health probe"]]
+
+
+def _down(monitor, name):
+    monitor.results[name].record(10, "down")
+    monitor.results[name].record(10, "down")
+
+
+def test_groq_outage_sheds_only_llm_backed_requests(monkeypatch):
+    monkeypatch.setattr(Config, "HEALTH_SHED_LOAD", True)
+    monitor = health.HealthMonitor(groq_interval=30)
+    _down(monitor, "groq")
+
+    assert monitor.should_shed() == "groq"
+    assert monitor.should_shed(health.LOCAL_DEPENDENCIES) is None
+    _down(monitor, "vector_index")
+    assert monitor.should_shed(health.LOCAL_DEPENDENCIES) == "vector_index"
+
+
+def test_fast_mode_is_served_while_groq_is_down(monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    monkeypatch.setattr(Config, "HEALTH_SHED_LOAD", True)
+    monitor = health.HealthMonitor(groq_interval=30)
+    _down(monitor, "groq")
+    monkeypatch.setattr(health, "_monitor", monitor)
+    monkeypatch.setattr(main, "get_health_monitor", lambda: monitor)
+
+    client = TestClient(main.app)
+    files = {"resume": ("resume.txt", b"too short", "text/plain")}
+    full = client.post("/api/analyze", data={"mode": "full", "jd_text": "Python"}, files=files)
+    fast = client.post("/api/analyze", data={"mode": "fast", "jd_text": "Python"}, files=files)
+    stream = client.post("/api/analyze/stream", data={"jd_text": "Python"}, files=files)
+
+    assert full.status_code == 503 and "groq" in full.json()["detail"]
+    assert "Retry-After" in full.headers
+    assert fast.status_code == 400  # reached the endpoint: the resume is too short
+    assert stream.status_code == 503
+
+
+def _probe_rounds(monitor, rounds, gap):
+    probed = []
+
+    async def probe(name):
+        probed.append(name)
+
+    async def scenario():
+        monitor._probe = probe
+        for _ in range(rounds):
+            await monitor.probe_all()
+            await asyncio.sleep(gap)
+
+    asyncio.run(scenario())
+    return probed
+
+
+def test_groq_probe_can_be_turned_off():
+    monitor = health.HealthMonitor(interval=0.01, groq_interval=0)
+    probed = _probe_rounds(monitor, 3, 0.02)
+    assert "groq" not in monitor.results
+    assert "groq" not in probed
+    assert probed.count("vector_index") == 3
+
+
+def test_groq_probe_runs_on_its_own_interval():
+    probed = _probe_rounds(health.HealthMonitor(interval=0.01, groq_interval=60), 3, 0.02)
+    assert probed.count("groq") == 1
+    assert probed.count("embedding_model") == 3
@@ -0,0 +1,23 @@
+from jobs import JobRegistry, make_jd_id
+import time
+
+
+def _embed(text):
+    return [0.0, 1.0, 0.0, 0.0]
+
+
+def test_memory_hits_keep_a_job_from_disk_eviction(tmp_path):
+    registry = JobRegistry(db_path=str(tmp_path / "jobs.sqlite3"), memory_entries=8, max_entries=2)
+    hot, _ = registry.register("Python developer with Django", embed=_embed)
+    time.sleep(0.01)
+    cold, _ = registry.register("Java developer with Spring", embed=_embed)
+    time.sleep(0.01)
+    # Served from the memory tier only
+    assert registry.get(hot.jd_id) is hot
+
+    registry.register("Go developer with Kubernetes", embed=_embed)
+
+    fresh = JobRegistry(db_path=str(tmp_path / "jobs.sqlite3"))
+    assert fresh.get(hot.jd_id) is not None
+    assert fresh.get(cold.jd_id) is None
+    assert fresh.get(make_jd_id("Go developer with Kubernetes")) is not None
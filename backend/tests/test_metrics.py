@@ -0,0 +1,93 @@
+from metrics import Registry, Counter, Gauge, Histogram, MetricsMiddleware, HTTP_SECONDS, REGISTRY
+from fastapi.testclient import TestClient
+from fastapi import FastAPI
+from upsert_queue import UpsertQueue
+import time
+import re
+
+
+# One sample line of the Prometheus text format: name{labels} value
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? (\+Inf|-Inf|NaN|-?[0-9.e+-]+)$')
+
+
+def _lines(registry):
+    text = registry.render()
+    assert text.endswith("\n")
+    return text.splitlines()
+
+
+def test_exposition_format():
+    registry = Registry()
+    requests = registry.register(Counter("app_requests_total", "Requests", ["route"]))
+    depth = registry.register(Gauge("app_queue_depth", "Queue depth"))
+    latency = registry.register(Histogram("app_latency_seconds", "Latency", ["op"], buckets=(0.1, 1.0)))
+    registry.add_collector(lambda: [("app_cached", "gauge", "Collected", {"cache": "a"}, 3)])
+
+    requests.inc(route='/say "hi"\n')
+    depth.set(7)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, op="read")
+    lines = _lines(registry)
+
+    for line in lines:
+        assert line.startswith("# ") or SAMPLE.match(line), line
+    assert "# TYPE app_requests_total counter" in lines
+    assert 'app_requests_total{route="/say \\"hi\\"\\n"} 1' in lines
+    assert "app_queue_depth 7" in lines
+    assert "# TYPE app_latency_seconds histogram" in lines
+    # Buckets are cumulative and end with +Inf == _count
+    assert 'app_latency_seconds_bucket{op="read",le="0.1"} 1' in lines
+    assert 'app_latency_seconds_bucket{op="read",le="1.0"} 2' in lines
+    assert 'app_latency_seconds_bucket{op="read",le="+Inf"} 3' in lines
+    assert 'app_latency_seconds_count{op="read"} 3' in lines
+    assert 'app_latency_seconds_sum{op="read"} 5.55' in lines
+    assert 'app_cached{cache="a"} 3' in lines
+
+
+def test_broken_collector_does_not_break_the_scrape():
+    registry = Registry()
+    registry.register(Gauge("app_up", "Up")).set(1)
+    registry.add_collector(lambda: 1 / 0)
+    assert _lines(registry)[-1] == "app_up 1"
+
+
+def test_http_metrics_use_route_templates():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/api/items/{item_id}")
+    def item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for item_id in ("a", "b", "c"):
+        client.get(f"/api/items/{item_id}")
+    client.get("/api/missing/xyz")
+    client.post("/api/items/a")
+
+    routes = {route for (_, route, _) in HTTP_SECONDS.snapshot()}
+    assert "/api/items/{item_id}" in routes
+    assert "unmatched" in routes
+    assert not routes & {"/api/items/a", "/api/items/b", "/api/items/c", "/api/missing/xyz"}
+    assert ("POST", "/api/items/{item_id}", "405") in HTTP_SECONDS.snapshot()
+
+
+def test_upsert_queue_reports_flushes_and_spills(tmp_path):
+    class Store:
+        def upsert(self, batch):
+            if batch[0]["id"] == "bad":
+                raise ConnectionError("down")
+
+    queue = UpsertQueue(Store(), batch_size=1, flush_interval=0.01, max_retries=0,
+                        spill_path=str(tmp_path / "spill.jsonl"))
+    queue.put([{"id": "good", "values": [0.0]}])
+    queue.put([{"id": "bad", "values": [0.0]}])
+    deadline = time.monotonic() + 2
+    while queue.spilled_vectors == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queue.close(timeout=2)
+
+    text = REGISTRY.render()
+    assert re.search(r'_upsert_flush_duration_seconds_count\{outcome="ok"\} [1-9]', text)
+    assert re.search(r'_upsert_flush_duration_seconds_count\{outcome="error"\} [1-9]', text)
+    assert re.search(r"_upsert_spilled_vectors_total [1-9]", text)
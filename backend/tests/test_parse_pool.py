@@ -0,0 +1,35 @@
+from docx import Document
+from io import BytesIO
+from parse import ParsePool
+import asyncio
+
+
+def _docx(text):
+    document = Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_cancelled_parse_does_not_leak_into_next_parse():
+    async def scenario():
+        pool = ParsePool(workers=1, timeout=30, memory_limit_mb=0)
+        try:
+            await pool.warm()
+            first = asyncio.ensure_future(pool.parse(_docx("ALICE SECRET RESUME\n" * 200), "alice.docx", "docx"))
+            # Let it send the document to the worker, then cancel while the reply is pending
+            await asyncio.sleep(0.01)
+            first.cancel()
+            try:
+                await first
+            except asyncio.CancelledError:
+                pass
+            return await pool.parse(_docx("BOB RESUME"), "bob.docx", "docx")
+        finally:
+            pool.shutdown()
+
+    text = asyncio.run(scenario())
+    assert "BOB RESUME" in text
+    assert "ALICE" not in text
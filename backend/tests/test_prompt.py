@@ -0,0 +1,67 @@
+from prompt import clean_text, fit_resume, fit_jd, prepare_prompt_inputs, dedupe_context, count_tokens
+
+
+RESUME = """Jane Doe
+jane@example.com
+
+SKILLS
+Python, Go, PostgreSQL
+
+EXPERIENCE
+Backend Engineer, Acme (2019 - 2024)
+""" + "\n".join(f"- Shipped service number {i} to production with tests and docs" for i in range(40)) + """
+
+EDUCATION
+BSc Computer Science, State University
+"""
+
+
+def test_line_break_hyphens_join_words_but_keep_compounds():
+    text = "Led develop-\nment of full-\nstack, real-\ntime and event-\ndriven systems with scikit-\nlearn end-to-\nend"
+    assert clean_text(text) == ("Led development of full-stack, real-time and event-driven systems "
+                                "with scikit-learn end-to-end")
+
+
+def test_clean_text_drops_page_furniture():
+    page = "Jane Doe\njane@example.com\nBuilt things\nPage 1 of 2"
+    cleaned = clean_text(page + "\n" + page.replace("1 of 2", "2 of 2"))
+    assert cleaned.count("jane@example.com") == 1
+    assert "Page" not in cleaned
+
+
+def test_fit_resume_keeps_high_priority_sections_in_order():
+    fitted = fit_resume(RESUME, 120)
+    assert count_tokens(fitted) <= 120
+    assert fitted.startswith("Jane Doe")
+    assert "SKILLS" in fitted and "EDUCATION" in fitted
+    # Experience is the section trimmed, and sections stay in document order
+    assert "number 39" not in fitted
+    assert fitted.index("SKILLS") < fitted.index("EXPERIENCE") < fitted.index("EDUCATION")
+
+
+def test_fit_resume_never_returns_empty_when_nothing_fits_whole():
+    header = "Jane Doe " + "keyword " * 200
+    fitted = fit_resume(header + "\nEXPERIENCE\n" + "Built things " * 100, 20)
+    assert fitted.startswith("Jane Doe")
+    assert 0 < count_tokens(fitted) <= 20
+
+
+def test_fit_jd_drops_benefits_first():
+    jd = "Requirements:\n" + "\n".join(f"- Skill {i}" for i in range(10)) + "\nBenefits:\n" + "- Free lunch\n" * 30
+    fitted = fit_jd(jd, 40)
+    assert "Skill 9" in fitted
+    assert count_tokens(fitted) <= 40
+
+
+def test_prepare_prompt_inputs_stays_within_budget():
+    jd = "Requirements:\n- Python\n- Kubernetes\n" * 20
+    context = "- Shipped service number 3 to production with tests and docs\n- Ran Kubernetes clusters"
+    inputs = prepare_prompt_inputs(RESUME, jd, context, budget=200)
+    assert inputs.report["trimmed"]
+    assert inputs.report["input_tokens"] <= 200
+    assert inputs.report["resume_tokens"] > 0
+
+
+def test_dedupe_context_drops_snippets_already_in_the_prompt():
+    context = "- Built Python services\n- Ran Kubernetes clusters\n- ran kubernetes clusters"
+    assert dedupe_context(context, "EXPERIENCE\nBuilt Python services") == "- Ran Kubernetes clusters"
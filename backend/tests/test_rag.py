@@ -0,0 +1,102 @@
+from vector_store import LocalVectorStore
+from config import Config
+import numpy as np
+import pytest
+import rag
+
+
+DIM = 8
+
+RESUME = """Jane Doe
+jane@example.com
+
+EXPERIENCE
+Backend Engineer, Acme (2019 - 2024)
+- Built Python services on Kubernetes
+- Cut p99 latency by 40%
+
+SKILLS
+Python, Go, PostgreSQL
+"""
+
+
+class _Embeddings:
+
+    def embed(self, text):
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts):
+        return [np.random.default_rng(abs(hash(t)) % 2**32).normal(size=DIM).tolist() for t in texts]
+
+    def cached_batch(self, texts):
+        return None
+
+
+class _FlakyStore(LocalVectorStore):
+
+    def __init__(self, path):
+        super().__init__(path, dimension=DIM)
+        self.failures = 0
+
+    def upsert(self, vectors):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("index unavailable")
+        super().upsert(vectors)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = _FlakyStore(str(tmp_path / "index"))
+    monkeypatch.setattr(rag, "get_embeddings", _Embeddings)
+    monkeypatch.setattr(rag, "create_vector_store", lambda: store)
+    monkeypatch.setattr(Config, "UPSERT_WRITE_BEHIND", False)
+    return store
+
+
+def test_failed_upsert_does_not_mark_resume_stored(store):
+    simple = rag.SimpleRAG()
+    resume_id = rag.make_resume_id(RESUME)
+
+    store.failures = 1
+    with pytest.raises(ConnectionError):
+        simple.store_resume(RESUME, resume_id)
+    assert not simple.has_resume(resume_id)
+
+    simple.store_resume(RESUME, resume_id)
+    assert simple.has_resume(resume_id)
+    assert store.stats()["total_vectors"] == len(simple.chunk_text(RESUME))
+
+
+def _stored_ids(store):
+    return {vid for vid in store._row_of}
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_rechunking_deletes_leftover_chunks(store, monkeypatch, write_behind):
+    resume_id = rag.make_resume_id(RESUME)
+    monkeypatch.setattr(Config, "CHUNK_MAX_TOKENS", 16)
+    rag.SimpleRAG().store_resume(RESUME, resume_id)
+    before = len(_stored_ids(store))
+
+    monkeypatch.setattr(Config, "CHUNK_MAX_TOKENS", 200)
+    monkeypatch.setattr(Config, "UPSERT_WRITE_BEHIND", write_behind)
+    simple = rag.SimpleRAG()  # a fresh process: nothing known in memory
+    chunks, _ = simple.store_resume(RESUME, resume_id)
+    simple.close()
+
+    assert len(chunks) < before
+    assert _stored_ids(store) == {f"{resume_id}_chunk_{idx}" for idx in range(len(chunks))}
+    assert len(simple.search("Kubernetes", top_k=10)) == len(chunks)
+
+
+def test_leftovers_of_vectors_without_chunk_count_are_found(store, monkeypatch):
+    resume_id = rag.make_resume_id(RESUME)
+    store.upsert([
+        {"id": f"{resume_id}_chunk_{idx}", "values": [1.0] * DIM, "metadata": {"text": f"old {idx}"}}
+        for idx in range(70)
+    ])
+
+    chunks, _ = rag.SimpleRAG().store_resume(RESUME, resume_id)
+
+    assert _stored_ids(store) == {f"{resume_id}_chunk_{idx}" for idx in range(len(chunks))}
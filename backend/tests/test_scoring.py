@@ -0,0 +1,51 @@
+from scoring import degree_level, calculate_education_score
+from models import ExtractedInfo, JDRequirements
+import pytest
+
+
+@pytest.mark.parametrize("text, level", [
+    ("PhD in Machine Learning", 4),
+    ("Ph.D., Stanford University", 4),
+    ("Doctor of Philosophy", 4),
+    ("Master of Science in Computer Science", 3),
+    ("M.S. in Data Science", 3),
+    ("MSc Statistics", 3),
+    ("MS in Electrical Engineering", 3),
+    ("MBA, Wharton", 3),
+    ("M.Tech, IIT Delhi", 3),
+    ("Bachelor's degree in Computer Science or related field", 2),
+    ("B.S. Computer Engineering", 2),
+    ("BSc (Hons) Mathematics", 2),
+    ("B.A. Economics", 2),
+    ("B.Tech in Information Technology", 2),
+    ("University degree in a quantitative field", 2),
+    ("Associate's degree in Networking", 1),
+    ("Diploma in Computer Applications", 1),
+    # Words that merely contain an abbreviation
+    ("B.S. Information Systems", 2),
+    ("Bachelor of Information Systems", 2),
+    ("Diploma.", 1),
+    ("Experience leading engineering teams", 0),
+    ("Built distributed systems and algorithms for ad programs", 0),
+    ("Proficient in MS Office", 0),
+    ("No degree required", 0),
+    ("Associate Software Engineer", 0),
+    ("", 0),
+    (None, 0),
+])
+def test_degree_level(text, level):
+    assert degree_level(text) == level
+
+
+@pytest.mark.parametrize("required, education, score", [
+    (None, ["B.S. Computer Science"], 12.0),
+    ("No degree required", [], 12.0),
+    ("Proficient in MS Office", [], 12.0),
+    ("Bachelor's degree in Computer Science", ["M.S. Information Systems"], 15.0),
+    ("Master's degree preferred", ["B.S. Information Systems"], 10.0),
+    ("Master's degree preferred", [], 5.0),
+])
+def test_education_score(required, education, score):
+    resume = ExtractedInfo(education=education)
+    jd = JDRequirements(education_required=required)
+    assert calculate_education_score(resume, jd) == score
@@ -0,0 +1,47 @@
+from skills import extract_skills
+import pytest
+
+
+@pytest.mark.parametrize("text, skills", [
+    ("Led R&D for the data platform", []),
+    ("Owned the P&L of a product line", []),
+    ("Ran Q&A sessions and M&A due diligence", []),
+    ("Built I/O schedulers", []),
+    ("Analysis in R and Python", ["R", "Python"]),
+    ("R, SQL", ["R", "SQL"]),
+    ("C/C++ firmware", ["C", "C++"]),
+    ("UI/UX design", ["UI Design"]),
+    ("Ran A/B tests", ["A/B Testing"]),
+    ("Designed the UI/API layer", ["UI Design"]),
+    ("R/Python pipelines", ["R", "Python"]),
+    ("JavaScript, not Java", ["JavaScript", "Java"]),
+])
+def test_short_skills_and_joiners(text, skills):
+    assert extract_skills(text) == skills
+
+
+def test_fallback_keeps_unknown_list_items_when_few_skills_are_known():
+    text = "Requirements:\n- Stack: Temporal, Cadence, Pinot and Tinybird\n- Own services end to end"
+    assert extract_skills(text) == []
+    assert extract_skills(text, fallback=True) == ["Temporal", "Cadence", "Pinot", "Tinybird"]
+
+
+def test_fallback_ignores_requirement_prose():
+    text = "Strong communication skills, 5 years of experience, a degree in CS"
+    assert extract_skills(text, fallback=True) == ["Communication"]
+
+
+def test_fallback_is_not_used_when_the_taxonomy_finds_enough():
+    text = "Python, Go, PostgreSQL, Temporal"
+    assert extract_skills(text, fallback=True) == ["Python", "Go", "PostgreSQL"]
+
+
+def test_unknown_skills_reach_jd_requirements_and_match_exactly():
+    from extract import extract_jd_requirements_fast, extract_resume_info_fast
+    from scoring import calculate_skills_score
+
+    jd = extract_jd_requirements_fast("Requirements:\n- Temporal, Pinot, Tinybird")
+    resume = extract_resume_info_fast("Jane Doe\nSKILLS\nTinybird, Temporal, Dagster\n")
+    _, matched, missing = calculate_skills_score(resume, jd, semantic=False)
+    assert matched == ["Temporal", "Tinybird"]
+    assert missing == ["Pinot"]
@@ -0,0 +1,97 @@
+from upsert_queue import UpsertQueue
+import upsert_queue
+import threading
+import json
+import time
+import os
+
+
+class _Store:
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.upserted = []
+
+    def upsert(self, batch):
+        if self.fail:
+            raise ConnectionError("store down")
+        self.upserted.extend(v["id"] for v in batch)
+
+
+def _write(path, ids):
+    with open(path, "w", encoding="utf-8") as f:
+        for vid in ids:
+            f.write(json.dumps({"id": vid, "values": [0.0], "metadata": {}}) + "\n")
+
+
+def test_spill_file_is_per_process(tmp_path):
+    base = str(tmp_path / "spill.jsonl")
+    queue = UpsertQueue(_Store(fail=True), max_retries=0, spill_path=base)
+    queue.put([{"id": "a", "values": [0.0]}])
+    queue.close(timeout=1)
+    assert os.listdir(tmp_path) == [f"spill.{os.getpid()}.jsonl"]
+
+
+def test_leftover_spills_replay_exactly_once(tmp_path):
+    base = str(tmp_path / "spill.jsonl")
+    _write(base, ["legacy"])
+    _write(str(tmp_path / "spill.999999999.jsonl"), ["dead-worker"])  # no such pid
+    _write(str(tmp_path / "spill.1.jsonl"), ["live-worker"])  # pid 1 is always running
+
+    stores = [_Store() for _ in range(4)]
+    queues = [None] * len(stores)
+
+    def start(i):
+        queues[i] = UpsertQueue(stores[i], flush_interval=0.05, spill_path=base)
+
+    threads = [threading.Thread(target=start, args=(i,)) for i in range(len(stores))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for queue in queues:
+        queue.close(timeout=1)
+
+    replayed = sorted(vid for store in stores for vid in store.upserted)
+    assert replayed == ["dead-worker", "legacy"]
+    assert sorted(os.listdir(tmp_path)) == ["spill.1.jsonl"]
+
+
+def _spilled(queue):
+    with open(queue.spill_path, encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f]
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_close_cuts_a_retry_backoff_short(tmp_path, monkeypatch):
+    monkeypatch.setattr(upsert_queue.random, "random", lambda: 1.0)  # first backoff: 0.75s
+    store = _Store(fail=True)
+    queue = UpsertQueue(store, batch_size=1, max_retries=10, spill_path=str(tmp_path / "spill.jsonl"))
+    queue.put([{"id": "a", "values": [0.0]}])
+    _wait_for(lambda: queue.failed_attempts > 0)
+
+    start = time.monotonic()
+    queue.close(timeout=5)
+    assert time.monotonic() - start < 0.3
+    assert _spilled(queue) == ["a"]
+
+
+def test_close_spills_a_batch_whose_upsert_hangs(tmp_path):
+    release = threading.Event()
+
+    class HangingStore:
+        def upsert(self, batch):
+            release.wait(5)
+
+    queue = UpsertQueue(HangingStore(), batch_size=1, spill_path=str(tmp_path / "spill.jsonl"))
+    queue.put([{"id": "a", "values": [0.0]}])
+    _wait_for(lambda: queue.depth() == 0)
+
+    queue.close(timeout=0.2)
+    release.set()
+    assert _spilled(queue) == ["a"]
@@ -0,0 +1,113 @@
+from vector_store import LocalVectorStore
+import numpy as np
+import pytest
+import os
+
+
+DIM = 8
+
+
+def _vector(vid, seed, **metadata):
+    values = np.random.default_rng(seed).normal(size=DIM)
+    return {"id": vid, "values": values.tolist(), "metadata": metadata}
+
+
+def _unit(values):
+    values = np.asarray(values, dtype=np.float32)
+    return values / np.linalg.norm(values)
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    return str(tmp_path / "index")
+
+
+def test_upsert_fetch_and_replace(store_dir):
+    store = LocalVectorStore(store_dir, dimension=DIM, compact_ratio=1.0)
+    store.upsert([_vector("a", 1, resume_id="r1"), _vector("b", 2, resume_id="r2")])
+    store.upsert([_vector("a", 3, resume_id="r1")])
+
+    found = store.fetch(["a", "b", "missing"])
+    assert set(found) == {"a", "b"}
+    assert np.allclose(found["a"]["values"], _unit(_vector("a", 3)["values"]), atol=1e-6)
+    assert store.stats()["total_vectors"] == 2
+    assert store.stats()["dead_rows"] == 1
+
+
+def test_query_ranks_and_filters(store_dir):
+    store = LocalVectorStore(store_dir, dimension=DIM)
+    vectors = [_vector(f"v{i}", i, resume_id="r1" if i % 2 else "r2") for i in range(10)]
+    store.upsert(vectors)
+
+    top = store.query(vectors[3]["values"], top_k=3)
+    assert top[0]["id"] == "v3"
+    assert top[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert [m["score"] for m in top] == sorted((m["score"] for m in top), reverse=True)
+
+    only_r2 = store.query(vectors[3]["values"], top_k=10, filter={"resume_id": "r2"})
+    assert len(only_r2) == 5
+    assert all(m["metadata"]["resume_id"] == "r2" for m in only_r2)
+    assert store.query(vectors[3]["values"], filter={"resume_id": {"$in": ["r3"]}}) == []
+
+
+def test_compaction_keeps_live_rows(store_dir):
+    store = LocalVectorStore(store_dir, dimension=DIM, compact_ratio=0.5)
+    store.upsert([_vector("a", 1), _vector("b", 2)])
+    store.upsert([_vector("a", 3), _vector("b", 4)])  # half the rows dead: compacts
+
+    assert store.stats()["dead_rows"] == 0
+    assert os.path.getsize(store.vectors_path) == 2 * DIM * 4
+    reopened = LocalVectorStore(store_dir, dimension=DIM)
+    assert np.allclose(reopened.fetch(["b"])["b"]["values"], _unit(_vector("b", 4)["values"]), atol=1e-6)
+
+
+def test_torn_vector_row_is_cut_before_later_appends(store_dir):
+    store = LocalVectorStore(store_dir, dimension=DIM)
+    store.upsert([_vector("a", 1)])
+    # Crash mid-append: half a row reached vectors.bin, its metadata line never did
+    with open(store.vectors_path, "ab") as f:
+        f.write(b"\x00" * (DIM * 4 // 2))
+
+    reopened = LocalVectorStore(store_dir, dimension=DIM)
+    reopened.upsert([_vector("b", 2)])
+
+    again = LocalVectorStore(store_dir, dimension=DIM)
+    found = again.fetch(["a", "b"])
+    assert np.allclose(found["a"]["values"], _unit(_vector("a", 1)["values"]), atol=1e-6)
+    assert np.allclose(found["b"]["values"], _unit(_vector("b", 2)["values"]), atol=1e-6)
+
+
+def test_torn_metadata_line_and_extra_rows_are_dropped(store_dir):
+    store = LocalVectorStore(store_dir, dimension=DIM)
+    store.upsert([_vector("a", 1), _vector("b", 2)])
+    # Crash mid-append the other way round: a full row, a torn metadata line
+    with open(store.vectors_path, "ab") as f:
+        f.write(np.ones(DIM, dtype=np.float32).tobytes())
+    with open(store.meta_path, "a", encoding="utf-8") as f:
+        f.write('{"id": "c", "meta')
+
+    reopened = LocalVectorStore(store_dir, dimension=DIM)
+    assert reopened.stats()["total_vectors"] == 2
+    reopened.upsert([_vector("d", 4)])
+    found = LocalVectorStore(store_dir, dimension=DIM).fetch(["a", "c", "d"])
+    assert set(found) == {"a", "d"}
+    assert np.allclose(found["d"]["values"], _unit(_vector("d", 4)["values"]), atol=1e-6)
+
+
+def test_delete_survives_reopen_and_compaction(store_dir):
+    store = LocalVectorStore(store_dir, dimension=DIM, compact_ratio=1.0)
+    store.upsert([_vector("a", 1), _vector("b", 2), _vector("c", 3)])
+    store.delete(["b", "missing"])
+
+    assert set(store.fetch(["a", "b", "c"])) == {"a", "c"}
+    assert "b" not in {m["id"] for m in store.query(_vector("b", 2)["values"], top_k=5)}
+
+    reopened = LocalVectorStore(store_dir, dimension=DIM, compact_ratio=1.0)
+    assert set(reopened.fetch(["a", "b", "c"])) == {"a", "c"}
+    assert reopened.stats()["total_vectors"] == 2
+
+    reopened.upsert([_vector("b", 4)])
+    reopened.compact()
+    compacted = LocalVectorStore(store_dir, dimension=DIM)
+    assert set(compacted.fetch(["a", "b", "c"])) == {"a", "b", "c"}
+    assert compacted.stats()["dead_rows"] == 0
@@ -0,0 +1,52 @@
+from warmup import Warmup
+import warmup
+import asyncio
+
+
+def test_failed_stage_is_retried_until_ready(monkeypatch):
+    monkeypatch.setattr(warmup, "_timed_import", lambda name: 0.0)
+    calls = {"index": 0, "model": 0}
+
+    def load_model():
+        calls["model"] += 1
+
+    def connect_index():
+        calls["index"] += 1
+        if calls["index"] < 3:
+            raise ConnectionError("index unreachable")
+
+    monkeypatch.setattr(Warmup, "STAGES", [("embedding_model", load_model), ("vector_index", connect_index)])
+
+    async def scenario():
+        w = Warmup(retry_seconds=0.01, retry_max_seconds=0.02)
+        await asyncio.wait_for(w.start(), 5)
+        return w
+
+    w = asyncio.run(scenario())
+    assert w.ready
+    assert w.error is None
+    assert w.attempts == 3
+    # Stages that loaded are not redone on retry
+    assert calls == {"index": 3, "model": 1}
+
+
+def test_stop_cancels_a_retrying_warmup(monkeypatch):
+    monkeypatch.setattr(warmup, "_timed_import", lambda name: 0.0)
+
+    def broken():
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(Warmup, "STAGES", [("vector_index", broken)])
+
+    async def scenario():
+        w = Warmup(retry_seconds=60, retry_max_seconds=60)
+        task = w.start()
+        while w.state != "failed":
+            await asyncio.sleep(0.005)
+        await w.stop()
+        return w, task
+
+    w, task = asyncio.run(scenario())
+    assert task.cancelled()
+    assert not w.ready
+    assert w.next_retry_s == 60
@@ -0,0 +1,244 @@
+from collections import OrderedDict
+from metrics import ERRORS, UPSERT_FLUSH_SECONDS, UPSERT_SPILLED
+from config import Config
+import threading
+import logging
+import random
+import json
+import glob
+import time
+import re
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+class UpsertQueue:
+    """
+    Write-behind queue in front of a vector store
+
+    put() and delete() return immediately. A background thread coalesces
+    writes from all requests (a later vector or deletion of the same ID
+    replaces an earlier one) and flushes them in batches of up to
+    batch_size, or every flush_interval seconds. Failed batches are retried with exponential backoff; anything
+    still unwritten after max_retries, or at shutdown, is appended to a spill
+    file that is replayed on the next start. close() cuts a retry backoff
+    short, and spills a batch whose upsert is still running when its timeout
+    expires (upserts are idempotent by ID, so a replay of it is harmless).
+
+    Each process spills to its own file (the pid goes before the extension),
+    so workers sharing UPSERT_SPILL_PATH never append to one file. At start a
+    queue claims leftover files by renaming them, which only one process can
+    win, and skips files of other processes that are still running.
+    """
+
+    def __init__(self, store, batch_size=None, flush_interval=None, max_retries=None, spill_path=None):
+        self.store = store
+        self.batch_size = batch_size or Config.UPSERT_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.UPSERT_FLUSH_INTERVAL
+        self.max_retries = max_retries if max_retries is not None else Config.UPSERT_MAX_RETRIES
+        self.spill_base = spill_path or Config.UPSERT_SPILL_PATH
+        stem, ext = os.path.splitext(self.spill_base)
+        self.spill_path = f"{stem}.{os.getpid()}{ext}"
+
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._stopped = threading.Event()  # set by close(), wakes a retry backoff
+        self._in_flight = None  # batch the flush thread is writing, if any
+        self._spill_lock = threading.Lock()
+
+        self.flushed_batches = 0
+        self.flushed_vectors = 0
+        self.failed_attempts = 0
+        self.spilled_vectors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+        self._replay_spill()
+        self._thread = threading.Thread(target=self._run, name="upsert-queue", daemon=True)
+        self._thread.start()
+
+    def put(self, vectors):
+        if not vectors:
+            return
+        with self._cond:
+            for vector in vectors:
+                self._pending[vector["id"]] = vector
+                self._pending.move_to_end(vector["id"])
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def delete(self, ids):
+        """Queue deletions behind any earlier writes of the same IDs"""
+        self.put([{"id": vid, "deleted": True} for vid in ids])
+
+    def pending(self, ids):
+        """Vectors still waiting to be written, as {id: {"values", "metadata"}}"""
+        with self._cond:
+            found = {}
+            for vid in ids:
+                vector = self._pending.get(vid)
+                if vector is not None and not vector.get("deleted"):
+                    found[vid] = {"values": vector["values"], "metadata": vector.get("metadata", {})}
+            return found
+
+    def depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _take_batch(self):
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popitem(last=False)[1])
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(timeout=self.flush_interval)
+                if self._stopping:
+                    return
+                batch = self._in_flight = self._take_batch()
+            if batch:
+                self._flush(batch)
+                with self._cond:
+                    self._in_flight = None
+
+    def _flush(self, batch):
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                self._write(batch)
+            except Exception as e:
+                UPSERT_FLUSH_SECONDS.observe(time.perf_counter() - start, outcome="error")
+                self.failed_attempts += 1
+                if attempt == self.max_retries or self._stopping:
+                    logger.error("Upsert of %d vectors failed, spilling to disk: %s", len(batch), e)
+                    ERRORS.inc(stage="vector_upsert")
+                    self._spill(batch)
+                    return
+                delay = min(30.0, 0.5 * (2 ** attempt)) * (0.5 + random.random())
+                logger.warning("Upsert failed (attempt %d), retrying in %.1fs: %s", attempt + 1, delay, e)
+                if self._stopped.wait(delay):
+                    logger.error("Shutting down during upsert retries, spilling %d vectors", len(batch))
+                    ERRORS.inc(stage="vector_upsert")
+                    self._spill(batch)
+                    return
+                continue
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            UPSERT_FLUSH_SECONDS.observe(elapsed_ms / 1000, outcome="ok")
+            self.flushed_batches += 1
+            self.flushed_vectors += len(batch)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+            return
+
+    def _write(self, batch):
+        # An ID occurs once per batch, so upserts and deletions do not need to interleave
+        upserts = [v for v in batch if not v.get("deleted")]
+        deletions = [v["id"] for v in batch if v.get("deleted")]
+        if upserts:
+            self.store.upsert(upserts)
+        if deletions:
+            self.store.delete(deletions)
+
+    def _spill(self, batch):
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        # close() and a flush thread that outlived it may both spill
+        with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+            for vector in batch:
+                f.write(json.dumps(vector) + "\n")
+        self.spilled_vectors += len(batch)
+        UPSERT_SPILLED.inc(len(batch))
+
+    def _spill_files(self):
+        """(path, owner pid or None) of every spill file under spill_base, this process's included"""
+        stem, ext = os.path.splitext(self.spill_base)
+        owned = re.compile(re.escape(stem) + r"(?:\.(\d+))?" + re.escape(ext) + "$")
+        for path in glob.glob(glob.escape(stem) + "*" + glob.escape(ext)):
+            match = owned.match(path)
+            if match:
+                yield path, int(match.group(1)) if match.group(1) else None
+
+    def _replay_spill(self):
+        vectors = []
+        for path, pid in self._spill_files():
+            if pid is not None and pid != os.getpid() and _pid_alive(pid):
+                continue  # a running worker may still be appending to it
+            # The rename is the claim: if two workers start together only one replays a file
+            claimed = f"{path}.replay-{os.getpid()}"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            with open(claimed, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        vectors.append(json.loads(line))
+            os.remove(claimed)
+        if vectors:
+            logger.info("Replaying %d spilled vectors", len(vectors))
+            self.put(vectors)
+
+    def close(self, timeout=10.0):
+        """Flush what we can within timeout, spill the rest"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._stopped.set()
+        self._thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        with self._cond:
+            stuck = self._in_flight if self._thread.is_alive() else None
+        if stuck:
+            logger.error("Upsert of %d vectors still running at shutdown, spilling them", len(stuck))
+            self._spill(stuck)
+
+        while time.monotonic() < deadline:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                break
+            start = time.perf_counter()
+            try:
+                self._write(batch)
+                UPSERT_FLUSH_SECONDS.observe(time.perf_counter() - start, outcome="ok")
+                self.flushed_batches += 1
+                self.flushed_vectors += len(batch)
+            except Exception:
+                UPSERT_FLUSH_SECONDS.observe(time.perf_counter() - start, outcome="error")
+                self._spill(batch)
+
+        with self._cond:
+            remaining = list(self._pending.values())
+            self._pending.clear()
+        if remaining:
+            self._spill(remaining)
+
+    def stats(self):
+        return {
+            "depth": self.depth(),
+            "flushed_batches": self.flushed_batches,
+            "flushed_vectors": self.flushed_vectors,
+            "failed_attempts": self.failed_attempts,
+            "spilled_vectors": self.spilled_vectors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushed_batches, 2) if self.flushed_batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2)
+        }
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,365 @@
+from metrics import VECTOR_SECONDS
+from config import Config
+import numpy as np
+import threading
+import logging
+import json
+import time
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+def _matches_filter(metadata, filter):
+    """Subset of Pinecone metadata filters: {"key": value} and {"key": {"$eq"/"$in": ...}}"""
+    for key, cond in filter.items():
+        value = metadata.get(key)
+        if isinstance(cond, dict):
+            if "$eq" in cond and value != cond["$eq"]:
+                return False
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class PineconeVectorStore:
+    """Vector store backed by a Pinecone serverless index"""
+
+    upsert_batch_size = 100
+    delete_batch_size = 1000
+
+    def __init__(self):
+        from pinecone import Pinecone
+
+        self.pc = Pinecone(api_key=Config.PINECONE_API_KEY)
+        self.index_name = Config.PINECONE_INDEX_NAME
+
+        # Skip index creation check in production to speed up cold starts
+        # Set SKIP_INDEX_CHECK=true in Render environment variables
+        skip_check = os.getenv("SKIP_INDEX_CHECK", "false").lower() == "true"
+
+        if not skip_check:
+            self._create_index_if_needed()
+        else:
+            logger.info("Skipping index check (production mode)")
+
+        self.index = self.pc.Index(self.index_name)
+        logger.info("Connected to Pinecone: %s", self.index_name)
+
+    def _create_index_if_needed(self):
+        from pinecone import ServerlessSpec
+
+        existing = [idx.name for idx in self.pc.list_indexes()]
+
+        if self.index_name not in existing:
+            logger.info("Creating index: %s", self.index_name)
+            self.pc.create_index(
+                name=self.index_name,
+                dimension=Config.EMBEDDING_DIMENSION,  # all-MiniLM-L6-v2 = 384 dimensions
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region="us-east-1")
+            )
+            time.sleep(3)
+
+    @VECTOR_SECONDS.time(backend="pinecone", op="upsert")
+    def upsert(self, vectors):
+        for i in range(0, len(vectors), self.upsert_batch_size):
+            self.index.upsert(vectors=vectors[i:i + self.upsert_batch_size])
+
+    @VECTOR_SECONDS.time(backend="pinecone", op="fetch")
+    def fetch(self, ids):
+        """Return {id: {"values": [...], "metadata": {...}}} for the IDs that exist"""
+        response = self.index.fetch(ids=list(ids))
+        return {
+            vid: {"values": list(vec.values), "metadata": dict(vec.metadata or {})}
+            for vid, vec in response.vectors.items()
+        }
+
+    @VECTOR_SECONDS.time(backend="pinecone", op="delete")
+    def delete(self, ids):
+        ids = list(ids)
+        for i in range(0, len(ids), self.delete_batch_size):
+            self.index.delete(ids=ids[i:i + self.delete_batch_size])
+
+    @VECTOR_SECONDS.time(backend="pinecone", op="query")
+    def query(self, vector, top_k=3, filter=None):
+        results = self.index.query(
+            vector=list(vector),
+            top_k=top_k,
+            include_metadata=True,
+            filter=filter
+        )
+        return [
+            {"id": match.id, "score": match.score, "metadata": dict(match.metadata or {})}
+            for match in results.matches
+        ]
+
+    @VECTOR_SECONDS.time(backend="pinecone", op="stats")
+    def stats(self):
+        stats = self.index.describe_index_stats()
+        return {
+            "backend": "pinecone",
+            "index": self.index_name,
+            "dimension": stats.dimension,
+            "total_vectors": stats.total_vector_count
+        }
+
+
+class LocalVectorStore:
+    """
+    Single-node vector store on local disk
+
+    - vectors.bin: append-only matrix of unit-normalized rows, memory-mapped on load
+    - meta.jsonl: sidecar log with one metadata line per row
+
+    Upserting an existing ID appends a new row and the older row is treated
+    as dead; deleting one appends a dead tombstone row. Compaction rewrites
+    both files once enough rows are dead.
+    """
+
+    def __init__(self, path=None, dimension=None, dtype=None, compact_ratio=None):
+        self.path = path or Config.LOCAL_INDEX_DIR
+        self.dimension = dimension or Config.EMBEDDING_DIMENSION
+        self.dtype = np.dtype(dtype or Config.LOCAL_INDEX_DTYPE)
+        self.compact_ratio = compact_ratio if compact_ratio is not None else Config.LOCAL_INDEX_COMPACT_RATIO
+
+        os.makedirs(self.path, exist_ok=True)
+        self.vectors_path = os.path.join(self.path, "vectors.bin")
+        self.meta_path = os.path.join(self.path, "meta.jsonl")
+
+        self._lock = threading.Lock()
+        self._load()
+        logger.info("Local vector index ready: %s (%d vectors)", self.path, self._live)
+
+    def _load(self):
+        ids, metadata, tombstones = [], [], []
+        meta_clean = True
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn trailing line from a crash mid-append; nothing after it is trusted
+                        meta_clean = False
+                        break
+                    ids.append(entry["id"])
+                    metadata.append(entry["metadata"])
+                    tombstones.append(entry.get("deleted", False))
+
+        row_size = self.dimension * self.dtype.itemsize
+        stored_size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        # A crash between the two appends can leave either file ahead; trust the shorter one.
+        # A torn trailing row is cut too, or every later append would land misaligned.
+        rows = min(len(ids), stored_size // row_size)
+        if stored_size != rows * row_size:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(rows * row_size)
+        if len(ids) > rows or not meta_clean:
+            ids, metadata, tombstones = ids[:rows], metadata[:rows], tombstones[:rows]
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                for vid, meta, deleted in zip(ids, metadata, tombstones):
+                    f.write(json.dumps(self._entry(vid, meta, deleted)) + "\n")
+
+        alive = np.ones(rows, dtype=bool)
+        row_of = {}
+        for row, (vid, deleted) in enumerate(zip(ids, tombstones)):
+            if vid in row_of:
+                alive[row_of[vid]] = False
+            if deleted:
+                alive[row] = False
+                row_of.pop(vid, None)
+            else:
+                row_of[vid] = row
+
+        self._ids = ids
+        self._metadata = metadata
+        self._alive = alive
+        self._row_of = row_of
+        self._live = int(alive.sum())
+        self._matrix = self._map(rows)
+
+    @staticmethod
+    def _entry(vid, metadata, deleted=False):
+        entry = {"id": vid, "metadata": metadata}
+        if deleted:
+            entry["deleted"] = True
+        return entry
+
+    def _map(self, rows):
+        if rows == 0:
+            return np.zeros((0, self.dimension), dtype=self.dtype)
+        return np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dimension))
+
+    def _normalize(self, vectors):
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @VECTOR_SECONDS.time(backend="local", op="upsert")
+    def upsert(self, vectors):
+        if not vectors:
+            return
+
+        matrix = self._normalize([v["values"] for v in vectors]).astype(self.dtype)
+
+        with self._lock:
+            start = len(self._ids)
+            meta_lines = []
+            alive = np.concatenate([self._alive, np.ones(len(vectors), dtype=bool)])
+
+            for offset, vector in enumerate(vectors):
+                row = start + offset
+                old_row = self._row_of.get(vector["id"])
+                if old_row is not None:
+                    alive[old_row] = False
+                self._row_of[vector["id"]] = row
+                meta_lines.append(json.dumps({"id": vector["id"], "metadata": vector.get("metadata", {})}))
+
+            with open(self.vectors_path, "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self.meta_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(meta_lines) + "\n")
+
+            self._ids = self._ids + [v["id"] for v in vectors]
+            self._metadata = self._metadata + [v.get("metadata", {}) for v in vectors]
+            self._alive = alive
+            self._live = int(alive.sum())
+            self._matrix = self._map(len(self._ids))
+
+            if self._should_compact():
+                self._compact()
+
+    @VECTOR_SECONDS.time(backend="local", op="delete")
+    def delete(self, ids):
+        with self._lock:
+            ids = [vid for vid in dict.fromkeys(ids) if vid in self._row_of]
+            if not ids:
+                return
+            start = len(self._ids)
+            alive = np.concatenate([self._alive, np.zeros(len(ids), dtype=bool)])
+            for vid in ids:
+                alive[self._row_of.pop(vid)] = False
+
+            # Zero rows keep the two files aligned; the tombstone flag marks them on load
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.zeros((len(ids), self.dimension), dtype=self.dtype).tobytes())
+            with open(self.meta_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(json.dumps(self._entry(vid, {}, True)) for vid in ids) + "\n")
+
+            self._ids = self._ids + ids
+            self._metadata = self._metadata + [{} for _ in ids]
+            self._alive = alive
+            self._live = int(alive.sum())
+            self._matrix = self._map(start + len(ids))
+
+            if self._should_compact():
+                self._compact()
+
+    @VECTOR_SECONDS.time(backend="local", op="fetch")
+    def fetch(self, ids):
+        with self._lock:
+            matrix, metadata, row_of = self._matrix, self._metadata, self._row_of
+
+        found = {}
+        for vid in ids:
+            row = row_of.get(vid)
+            if row is not None and row < len(metadata):
+                found[vid] = {
+                    "values": np.asarray(matrix[row], dtype=np.float32).tolist(),
+                    "metadata": metadata[row]
+                }
+        return found
+
+    @VECTOR_SECONDS.time(backend="local", op="query")
+    def query(self, vector, top_k=3, filter=None):
+        with self._lock:
+            matrix, metadata, alive, ids = self._matrix, self._metadata, self._alive, self._ids
+
+        if len(ids) == 0:
+            return []
+
+        query = self._normalize(vector)[0]
+        if matrix.dtype != np.float32:
+            # BLAS has no float16 GEMV; upcast the (small) matrix for the product
+            scores = np.asarray(matrix, dtype=np.float32) @ query
+        else:
+            scores = matrix @ query
+
+        mask = alive
+        if filter:
+            mask = mask & np.fromiter((_matches_filter(m, filter) for m in metadata), dtype=bool, count=len(metadata))
+        scores = np.where(mask, scores, -np.inf)
+
+        candidates = int(mask.sum())
+        k = min(top_k, candidates)
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"id": ids[row], "score": float(scores[row]), "metadata": metadata[row]}
+            for row in top
+        ]
+
+    def _should_compact(self):
+        dead = len(self._ids) - self._live
+        return dead > 0 and dead / max(len(self._ids), 1) >= self.compact_ratio
+
+    def compact(self):
+        """Rewrite the files keeping only live rows"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        live_rows = np.flatnonzero(self._alive)
+
+        tmp_vectors = self.vectors_path + ".tmp"
+        tmp_meta = self.meta_path + ".tmp"
+        with open(tmp_vectors, "wb") as f:
+            f.write(np.ascontiguousarray(self._matrix[live_rows]).tobytes())
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            for row in live_rows:
+                f.write(json.dumps({"id": self._ids[row], "metadata": self._metadata[row]}) + "\n")
+
+        # Drop the old mapping before replacing the file underneath it
+        self._matrix = None
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_meta, self.meta_path)
+
+        self._ids = [self._ids[row] for row in live_rows]
+        self._metadata = [self._metadata[row] for row in live_rows]
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._row_of = {vid: row for row, vid in enumerate(self._ids)}
+        self._live = len(self._ids)
+        self._matrix = self._map(len(self._ids))
+        logger.info("Compacted local vector index to %d vectors", self._live)
+
+    @VECTOR_SECONDS.time(backend="local", op="stats")
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "local",
+                "path": self.path,
+                "dimension": self.dimension,
+                "dtype": self.dtype.name,
+                "total_vectors": self._live,
+                "dead_rows": len(self._ids) - self._live
+            }
+
+
+def create_vector_store():
+    """Pick the vector store backend from Config.VECTOR_BACKEND"""
+    backend = Config.VECTOR_BACKEND.lower()
+    if backend == "local":
+        return LocalVectorStore()
+    if backend == "pinecone":
+        return PineconeVectorStore()
+    raise ValueError(f"Unknown VECTOR_BACKEND: {Config.VECTOR_BACKEND}")
@@ -0,0 +1,162 @@
+"""
+Background warmup after startup, and the readiness state behind /api/ready
+
+main.py no longer imports the heavy modules (langgraph, langchain_groq,
+torch / onnxruntime, pinecone) at load time, so the server starts accepting
+connections at once. Warmup then imports them and loads the embedding model,
+the vector index connection and the LLM client on the model pool. Requests
+that arrive first simply wait on the same locked singletons, so nothing is
+loaded twice.
+
+A stage that fails (e.g. Pinecone unreachable at boot) is retried with
+exponential backoff; stages that already loaded are not redone, and
+/api/ready turns 200 as soon as a retry gets through.
+"""
+
+from config import Config
+import importlib
+import asyncio
+import logging
+import time
+import sys
+
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_import(name):
+    """Seconds spent importing name (0.0 if it was already imported)"""
+    if name in sys.modules:
+        return 0.0
+    start = time.perf_counter()
+    importlib.import_module(name)
+    return round(time.perf_counter() - start, 3)
+
+
+def _load_embeddings():
+    from rag import get_embeddings
+    get_embeddings()
+
+
+def _connect_index():
+    from rag import get_rag
+    get_rag()
+
+
+def _load_llm():
+    from llm import get_llm
+    get_llm(temperature=0.3)  # the analysis client
+
+
+def _load_skills():
+    from skills import get_skill_matcher
+    get_skill_matcher()
+    if Config.SKILL_SEMANTIC_MATCH:
+        from skill_vectors import get_skill_vectors
+        get_skill_vectors()
+
+
+class Warmup:
+    """Runs the warmup stages until they all succeed and records how long each took"""
+
+    STAGES = [
+        ("embedding_model", _load_embeddings),
+        ("vector_index", _connect_index),
+        ("llm_client", _load_llm),
+        ("skills", _load_skills),
+    ]
+
+    def __init__(self, retry_seconds=None, retry_max_seconds=None):
+        self.retry_seconds = retry_seconds or Config.WARMUP_RETRY_SECONDS
+        self.retry_max_seconds = retry_max_seconds or Config.WARMUP_RETRY_MAX_SECONDS
+        self.state = "pending"  # pending -> warming -> ready, or warming <-> failed while retrying
+        self.error = None
+        self.attempts = 0
+        self.next_retry_s = None
+        self.started_at = None
+        self.imports = {}
+        self.stages = {}
+        self.total_s = None
+        self._task = None
+
+    def start(self):
+        """Schedule warmup on the running loop (idempotent)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Cancel a warmup that is still retrying"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def run(self):
+        self.started_at = time.perf_counter()
+        delay = self.retry_seconds
+        while True:
+            self.state = "warming"
+            self.attempts += 1
+            self.next_retry_s = None
+            try:
+                await self._attempt()
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                self.next_retry_s = delay
+                self.total_s = round(time.perf_counter() - self.started_at, 3)
+                logger.exception("Warmup attempt %d failed, retrying in %.0fs: %s", self.attempts, delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max_seconds)
+                continue
+
+            self.state = "ready"
+            self.error = None
+            self.total_s = round(time.perf_counter() - self.started_at, 3)
+            logger.info("Warmup complete in %.2fs: %s", self.total_s, self.stages,
+                        extra={"imports_s": self.imports, "stages_s": self.stages})
+            return
+
+    async def _attempt(self):
+        from executors import run_model
+
+        runtime = {"onnx": "onnxruntime", "torch": "sentence_transformers"}.get(Config.EMBEDDING_BACKEND)
+        for name in ("langchain_groq", "langgraph.graph", "graph", runtime):
+            if name is None or name in self.imports:
+                continue  # remote embeddings (the model lives in the embedding server), or done already
+            try:
+                self.imports[name] = await run_model(_timed_import, name)
+            except ImportError as e:
+                # e.g. onnxruntime missing: the backend falls back to torch
+                self.imports[name] = f"unavailable: {e}"
+
+        for name, fn in self.STAGES:
+            if name in self.stages:
+                continue  # loaded on an earlier attempt
+            start = time.perf_counter()
+            await run_model(fn)
+            self.stages[name] = round(time.perf_counter() - start, 3)
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def status(self):
+        return {
+            "state": self.state,
+            "error": self.error,
+            "attempts": self.attempts,
+            "next_retry_s": self.next_retry_s,
+            "imports_s": self.imports,
+            "stages_s": self.stages,
+            "warmup_s": self.total_s,
+        }
+
+
+_warmup = Warmup()
+
+def get_warmup():
+    return _warmup